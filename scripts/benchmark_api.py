@@ -0,0 +1,367 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Benchmark API Throughput (concurrent /detect and large batches)
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import orjson
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow endpoint is skipped without it
+    pa = None
+
+CATEGORIES = ['grocery', 'restaurant', 'gas', 'online', 'travel', 'entertainment']
+CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata']
+DEVICES = ['mobile', 'desktop', 'tablet']
+
+def make_transaction(i, rng):
+    """Build a random /detect payload"""
+    return {
+        'transaction_id': f'bench_{i}',
+        'user_id': f'user_{rng.integers(0, 500)}',
+        'amount': round(float(rng.lognormal(4, 1)), 2),
+        'merchant_category': CATEGORIES[rng.integers(0, len(CATEGORIES))],
+        'location_city': CITIES[rng.integers(0, len(CITIES))],
+        'device_type': DEVICES[rng.integers(0, len(DEVICES))],
+        'timestamp': f'2024-01-01T{rng.integers(0, 24):02d}:{rng.integers(0, 60):02d}:00'
+    }
+
+async def run_load(url, n_requests, concurrency, seed=42, duplicate_rate=0.0):
+    """
+    Fire n_requests single-transaction /detect calls, `concurrency` at a time
+
+    Transaction ids are unique per run, so nothing is answered from the
+    API's result cache unless duplicate_rate asks for retries.
+
+    Args:
+        duplicate_rate: Share of requests resending an earlier payload
+            (an upstream retry)
+
+    Returns:
+        Dict with throughput and latency percentiles
+    """
+    rng = np.random.default_rng(seed)
+    run_id = time.time_ns()
+    payloads = []
+    for i in range(n_requests):
+        if payloads and rng.random() < duplicate_rate:
+            payloads.append(payloads[rng.integers(0, len(payloads))])
+        else:
+            payload = make_transaction(i, rng)
+            payload['transaction_id'] = f'bench_{run_id}_{i}'
+            payloads.append(payload)
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker(client):
+        nonlocal errors, next_index
+        while next_index < n_requests:
+            payload = payloads[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(f'{url}/detect', json=payload)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'concurrency': concurrency,
+        'requests': n_requests,
+        'errors': errors,
+        'throughput': n_requests / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99))
+    }
+
+async def run_overload(url, seconds, detect_concurrency=32, batch_concurrency=4,
+                       batch_rows=5000, seed=42):
+    """
+    Mix /detect traffic with bulk columnar uploads for a fixed time
+
+    Batch clients that are refused (503) back off briefly and retry, like
+    a well-behaved bulk client would.
+
+    Returns:
+        Dict with /detect latency percentiles and degraded count, and
+        batches accepted/refused
+    """
+    rng = np.random.default_rng(seed)
+    payloads = [make_transaction(i, rng) for i in range(1000)]
+    rows = [make_transaction(i, rng) for i in range(batch_rows)]
+    batch_body = orjson.dumps({field: [row[field] for row in rows] for field in rows[0]})
+
+    counts = {'detect_ok': 0, 'detect_degraded': 0, 'detect_errors': 0,
+              'batch_ok': 0, 'batch_refused': 0, 'batch_errors': 0}
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def detect_worker(client, offset):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f'{url}/detect', json=payloads[i % len(payloads)])
+                if response.status_code == 200:
+                    counts['detect_ok'] += 1
+                    counts['detect_degraded'] += response.json().get('degraded', False)
+                else:
+                    counts['detect_errors'] += 1
+            except httpx.HTTPError:
+                counts['detect_errors'] += 1
+            latencies.append(time.perf_counter() - start)
+            i += detect_concurrency
+
+    async def batch_worker(client):
+        while time.perf_counter() < deadline:
+            try:
+                response = await client.post(f'{url}/detect/batch/columnar', content=batch_body,
+                                             headers={'Content-Type': 'application/json'})
+                if response.status_code == 200:
+                    counts['batch_ok'] += 1
+                elif response.status_code == 503:
+                    counts['batch_refused'] += 1
+                    await asyncio.sleep(0.5)
+                else:
+                    counts['batch_errors'] += 1
+            except httpx.HTTPError:
+                counts['batch_errors'] += 1
+
+    concurrency = detect_concurrency + batch_concurrency
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120.0) as client:
+        await asyncio.gather(
+            *[detect_worker(client, i) for i in range(detect_concurrency)],
+            *[batch_worker(client) for _ in range(batch_concurrency)]
+        )
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        **counts,
+        'detect_per_second': counts['detect_ok'] / seconds,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99))
+    }
+
+def run_batch(url, n_rows, repeats=3, seed=42):
+    """
+    Time the batch endpoints (JSON rows, JSON columns, Arrow) for one batch size
+
+    Returns:
+        Dict with the best-of-`repeats` seconds for each endpoint
+        (arrow_seconds is None without pyarrow)
+    """
+    rng = np.random.default_rng(seed)
+    rows = [make_transaction(i, rng) for i in range(n_rows)]
+    columns = {field: [row[field] for row in rows] for field in rows[0]}
+
+    json_headers = {'Content-Type': 'application/json'}
+    cases = [
+        ('row_seconds', '/detect/batch', orjson.dumps({'transactions': rows}), json_headers, orjson.loads),
+        ('columnar_seconds', '/detect/batch/columnar', orjson.dumps(columns), json_headers, orjson.loads)
+    ]
+
+    timings = {'arrow_seconds': None}
+    if pa is not None:
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        arrow_type = 'application/vnd.apache.arrow.stream'
+        cases.append((
+            'arrow_seconds', '/detect/batch/arrow', sink.getvalue().to_pybytes(),
+            {'Content-Type': arrow_type, 'Accept': arrow_type},
+            lambda content: pa.ipc.open_stream(content).read_all()
+        ))
+
+    with httpx.Client(timeout=600.0) as client:
+        for name, path, body, headers, decode in cases:
+            best = None
+            for _ in range(repeats):
+                start = time.perf_counter()
+                response = client.post(f'{url}{path}', content=body, headers=headers)
+                response.raise_for_status()
+                decode(response.content)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+    return {'rows': n_rows, **timings}
+
+async def run_stream(url, n_rows, chunk_rows=1000, seed=42):
+    """
+    Send n_rows through /detect/stream while reading results concurrently
+
+    Uses a raw chunked HTTP/1.1 request so the body is generated on the fly
+    (never held in memory) and the response is consumed as it arrives.
+
+    Returns:
+        Dict with rows sent, result lines received and seconds taken
+    """
+    host, port = url.split('://')[1].split(':')
+    reader, writer = await asyncio.open_connection(host, int(port))
+    rng = np.random.default_rng(seed)
+
+    async def send():
+        writer.write(b'POST /detect/stream HTTP/1.1\r\n'
+                     b'Host: ' + host.encode() + b'\r\n'
+                     b'Content-Type: application/x-ndjson\r\n'
+                     b'Transfer-Encoding: chunked\r\n\r\n')
+        for start in range(0, n_rows, chunk_rows):
+            body = b''.join(orjson.dumps(make_transaction(i, rng)) + b'\n'
+                            for i in range(start, min(n_rows, start + chunk_rows)))
+            writer.write(b'%x\r\n%s\r\n' % (len(body), body))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def receive():
+        await reader.readuntil(b'\r\n\r\n')  # status line + headers
+        lines = 0
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if size == 0:
+                return lines
+            lines += (await reader.readexactly(size + 2)).count(b'\n') - 1
+
+    start = time.perf_counter()
+    _, received = await asyncio.gather(send(), receive())
+    elapsed = time.perf_counter() - start
+    writer.close()
+
+    return {'rows': n_rows, 'received': received, 'seconds': elapsed}
+
+def peak_rss_mb(pid):
+    """Peak resident memory of a process in MB (Linux only, else None)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def start_server(port):
+    """Start uvicorn for the API in a subprocess and wait until it answers"""
+    api_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'api')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=api_dir,
+        stdout=subprocess.DEVNULL
+    )
+
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f'{url}/health/ready').status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("API did not start within 60s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API throughput")
+    parser.add_argument('--url', help="Running API to target (default: start one locally)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', default='1,8,32,64',
+                        help="Comma-separated concurrency levels")
+    parser.add_argument('--duplicate-rate', type=float, default=0.0,
+                        help="Share of /detect requests that are retries of "
+                             "earlier ones (exercises the result cache)")
+    parser.add_argument('--batch-sizes', default='',
+                        help="Comma-separated batch sizes to benchmark the batch "
+                             "endpoints at instead (e.g. 1000,10000,100000)")
+    parser.add_argument('--stream-rows', default='',
+                        help="Comma-separated row counts to push through "
+                             "/detect/stream instead (e.g. 100000,1000000)")
+    parser.add_argument('--overload', type=float, default=0,
+                        help="Seconds of mixed /detect + bulk batch traffic to "
+                             "run instead (exercises admission control)")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("API THROUGHPUT BENCHMARK")
+    print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
+    print("="*60)
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args.port)
+        print(f"✓ API started on {url}")
+
+    try:
+        if args.overload:
+            asyncio.run(run_load(url, 20, 4))
+            result = asyncio.run(run_overload(url, args.overload))
+            print(f"\n/detect   {result['detect_per_second']:.1f} req/s | p50 {result['p50_ms']:.1f} ms | "
+                  f"p95 {result['p95_ms']:.1f} ms | p99 {result['p99_ms']:.1f} ms | "
+                  f"degraded {result['detect_degraded']}/{result['detect_ok']} | "
+                  f"errors {result['detect_errors']}")
+            print(f"batches   {result['batch_ok']} scored | {result['batch_refused']} refused | "
+                  f"{result['batch_errors']} errors")
+        elif args.stream_rows:
+            print(f"\n{'rows':>9} {'seconds':>9} {'rows/s':>9} {'server peak MB':>15}")
+            for n_rows in [int(n) for n in args.stream_rows.split(',')]:
+                result = asyncio.run(run_stream(url, n_rows))
+                assert result['received'] == n_rows, "Missing results"
+                peak = peak_rss_mb(process.pid) if process is not None else None
+                print(f"{n_rows:>9} {result['seconds']:>9.2f} "
+                      f"{n_rows / result['seconds']:>9.0f} "
+                      f"{peak if peak is not None else float('nan'):>15.0f}")
+        elif args.batch_sizes:
+            print(f"\n{'rows':>8} {'/batch s':>10} {'columnar s':>12} {'arrow s':>10} {'rows/s arrow':>14}")
+            for n_rows in [int(n) for n in args.batch_sizes.split(',')]:
+                result = run_batch(url, n_rows)
+                arrow = result['arrow_seconds']
+                print(f"{result['rows']:>8} {result['row_seconds']:>10.3f} "
+                      f"{result['columnar_seconds']:>12.3f} "
+                      f"{arrow if arrow is not None else float('nan'):>10.3f} "
+                      f"{n_rows / arrow if arrow else float('nan'):>14.0f}")
+        else:
+            # Warm up model and connection paths before measuring
+            asyncio.run(run_load(url, 20, 4))
+
+            print(f"\n{'conc':>6} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+            for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                result = asyncio.run(run_load(url, args.requests, concurrency,
+                                              duplicate_rate=args.duplicate_rate))
+                print(f"{result['concurrency']:>6} {result['throughput']:>10.1f} "
+                      f"{result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} "
+                      f"{result['p99_ms']:>10.1f} {result['errors']:>8}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print("\n✓ Benchmark complete")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Profile API Cold Start (imports, model load, liveness/readiness)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'api')
+
+PHASES_SNIPPET = (
+    "import json, time\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "main.startup_timings['import_main'] = time.perf_counter() - start\n"
+    "if main.active_models is None:\n"
+    "    main.load_models()\n"
+    "main.warm_up()\n"
+    "print('TIMINGS ' + json.dumps(main.startup_timings))\n"
+)
+
+def run_python(code, lazy, importtime=False):
+    """Run a snippet in a fresh interpreter from src/api"""
+    env = dict(os.environ, LAZY_STARTUP='true' if lazy else 'false')
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    return subprocess.run(command, cwd=API_DIR, env=env, capture_output=True, text=True)
+
+def import_breakdown(stderr, top=12):
+    """
+    Sum -X importtime self times by top-level package
+
+    Returns:
+        List of (package, seconds), most expensive first
+    """
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, _, name = line[len('import time:'):].split('|')
+            totals[name.strip().split('.')[0]] += int(self_us)
+        except ValueError:
+            continue
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [(package, us / 1e6) for package, us in ranked[:top]]
+
+def measure_probes(lazy, port, timeout=120.0):
+    """
+    Start uvicorn and time how long until /health/live and /health/ready answer 200
+
+    Returns:
+        Dict with live_seconds and ready_seconds (None if never reached)
+    """
+    env = dict(os.environ, LAZY_STARTUP='true' if lazy else 'false')
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    url = f'http://127.0.0.1:{port}'
+    result = {'live_seconds': None, 'ready_seconds': None}
+    try:
+        while time.perf_counter() - start < timeout:
+            for probe in ['live', 'ready']:
+                key = f'{probe}_seconds'
+                if result[key] is not None:
+                    continue
+                try:
+                    if httpx.get(f'{url}/health/{probe}', timeout=1.0).status_code == 200:
+                        result[key] = time.perf_counter() - start
+                except httpx.HTTPError:
+                    pass
+            if result['ready_seconds'] is not None:
+                break
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait()
+
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API cold start")
+    parser.add_argument('--eager', action='store_true',
+                        help="Profile the default eager mode instead of LAZY_STARTUP")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--target-live', type=float, default=1.5,
+                        help="Max seconds from launch to /health/live (fails above)")
+    parser.add_argument('--target-ready', type=float, default=8.0,
+                        help="Max seconds from launch to /health/ready (fails above)")
+    args = parser.parse_args()
+    lazy = not args.eager
+
+    print("="*60)
+    print("API COLD START PROFILE")
+    print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
+    print("="*60)
+    print(f"Mode: {'LAZY_STARTUP' if lazy else 'eager'}")
+
+    # Step 1: Phase timings recorded by the app itself
+    print("\n[STEP 1] Startup phases (fresh interpreter)...")
+    completed = run_python(PHASES_SNIPPET, lazy)
+    timings = None
+    for line in completed.stdout.splitlines():
+        if line.startswith('TIMINGS '):
+            timings = json.loads(line[len('TIMINGS '):])
+    if timings is None:
+        print(f"✗ Could not import the API:\n{completed.stderr[-2000:]}")
+        return 1
+    for phase in ['import_main', 'module_import', 'ml_imports', 'model_load', 'warm_up']:
+        if phase in timings:
+            print(f"  {phase:<16} {timings[phase]:>8.3f}s")
+
+    # Step 2: Where import time goes
+    print("\n[STEP 2] Import cost by package (self time, all phases)...")
+    completed = run_python(PHASES_SNIPPET, lazy, importtime=True)
+    for package, seconds in import_breakdown(completed.stderr):
+        print(f"  {package:<24} {seconds:>8.3f}s")
+
+    # Step 3: End to end as an orchestrator sees it
+    print("\n[STEP 3] Probe timings (process launch -> HTTP 200)...")
+    probes = measure_probes(lazy, args.port)
+    failures = []
+    for probe, target in [('live', args.target_live), ('ready', args.target_ready)]:
+        seconds = probes[f'{probe}_seconds']
+        passed = seconds is not None and seconds <= target
+        if not passed:
+            failures.append(probe)
+        shown = f"{seconds:.3f}s" if seconds is not None else "never"
+        print(f"  /health/{probe:<6} {shown:>9}  (target {target:.2f}s) "
+              f"{'✓' if passed else '✗'}")
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"✗ COLD START TARGET MISSED: {', '.join(failures)}")
+        print("="*60)
+        return 1
+    print("✓ COLD START WITHIN TARGET")
+    print("="*60)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
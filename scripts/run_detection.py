@@ -1,131 +1,144 @@
 """
 STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
-Run Anomaly Detection on New Data
+Run Anomaly Detection on New Data (chunked, parallel, resumable)
 """
 
 import sys
 sys.path.append('src')
 
 from data_pipeline.data_generator import TransactionGenerator
-from models.isolation_forest_detector import IsolationForestDetector
-from scoring.anomaly_scorer import AnomalyScorer
+from scoring.batch_job import BatchScoringJob, iter_file_chunks, iter_query_chunks, source_fingerprint
 from alerts.alert_manager import AlertManager
-import joblib
-import pandas as pd
-import numpy as np
+import argparse
+import os
+import shutil
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Score transactions in chunks across a process pool. Rerun with the "
+                    "same --output to resume a crashed run from its last completed chunk."
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--input', help="Parquet or CSV file of transactions")
+    source.add_argument('--query', help="Postgres SELECT returning transactions (needs a stable ORDER BY)")
+    parser.add_argument('--output', default=None,
+                        help="Output directory for scored parts and the checkpoint "
+                             "(default: data/scored/<input name>)")
+    parser.add_argument('--chunk-size', type=int, default=int(os.getenv('BATCH_CHUNK_SIZE', '100000')))
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count; 0 = score in this process)")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet',
+                        help="Output file format")
+    parser.add_argument('--model-version', default=None,
+                        help="Model registry version (default: active one)")
+    parser.add_argument('--restart', action='store_true',
+                        help="Discard an existing checkpoint and output instead of resuming")
+    parser.add_argument('--no-db', action='store_true',
+                        help="Keep alerts in the outbox instead of inserting them")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
     print("="*60)
     print("ANOMALY DETECTION SYSTEM")
     print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
     print("="*60)
-    
-    # Step 1: Load models
-    print("\n[STEP 1] Loading trained models...")
-    
+
+    # Step 1: Choose the input
+    print("\n[STEP 1] Preparing input...")
+    if args.query:
+        source = source_fingerprint(query=args.query)
+        chunks = iter_query_chunks(args.query, args.chunk_size)
+        output_dir = args.output or os.path.join('data', 'scored', 'query-' + source.split(':')[1])
+        print(f"  Streaming query results in chunks of {args.chunk_size}")
+    else:
+        path = args.input
+        if path is None:
+            # Demo: a small generated batch with known fraud, scored afresh each time
+            path = os.path.join('data', 'demo_transactions.csv')
+            os.makedirs('data', exist_ok=True)
+            TransactionGenerator(seed=999).generate_dataset(n_normal=100, n_fraud=5).to_csv(path, index=False)
+            args.restart = True
+            print(f"  Generated 105 demo transactions in {path}")
+        source = source_fingerprint(path=path)
+        chunks = iter_file_chunks(path, args.chunk_size)
+        output_dir = args.output or os.path.join('data', 'scored', os.path.splitext(os.path.basename(path))[0])
+        print(f"  Reading {path} in chunks of {args.chunk_size}")
+
+    if args.restart and os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+        print(f"  Discarded previous run in {output_dir}")
+    print(f"  Output: {output_dir}")
+
+    # Step 2: Score
+    print("\n[STEP 2] Scoring chunks...")
+    job = BatchScoringJob(
+        output_dir,
+        model_version=args.model_version,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        output_format=args.format,
+        # Shared with earlier runs so --restart never discards undelivered alerts
+        outbox_dir=os.path.join('data', 'alert_outbox'),
+        alert_manager=None if args.no_db else AlertManager()
+    )
     try:
-        if_detector = IsolationForestDetector()
-        if_detector.load('models/isolation_forest.pkl')
-        
-        feature_engineer = joblib.load('models/feature_engineer.pkl')
-        
-        print("✓ Models loaded successfully")
-    except Exception as e:
+        summary = job.run(chunks, source, top_k_columns=['transaction_id', 'amount', 'anomaly_score',
+                                                         'risk_level', 'is_fraud'])
+    except FileNotFoundError as e:
         print(f"✗ Error loading models: {e}")
         print("Please run 'python scripts/train_models_aggressive.py' first")
-        return
-    
-    # Step 2: Generate new transactions to score
-    print("\n[STEP 2] Generating new transactions...")
-    generator = TransactionGenerator(seed=999)
-    df = generator.generate_dataset(n_normal=100, n_fraud=5)
-    print(f"  Generated {len(df)} transactions to analyze")
-    
-    # Step 3: Engineer features
-    print("\n[STEP 3] Engineering features...")
-    df_features = feature_engineer.create_features(df)
-    X = feature_engineer.get_feature_matrix(df_features)
-    
-    # Step 4: Detect anomalies with optimal threshold
-    print("\n[STEP 4] Running anomaly detection...")
-    
-    # Load optimal threshold
-    try:
-        threshold_data = joblib.load('models/optimal_threshold.pkl')
-        optimal_threshold = threshold_data['threshold']
-        print(f"  Using optimal threshold: {optimal_threshold:.4f}")
-    except:
-        optimal_threshold = 0.5
-        print(f"  Using default threshold: {optimal_threshold}")
-    
-    # Get scores
-    scores = if_detector.predict_proba(X)
-    
-    # Apply optimal threshold
-    predictions = np.where(scores >= optimal_threshold, -1, 1)
-    
-    # Step 5: Score and prioritize
-    print("\n[STEP 5] Scoring and prioritizing...")
-    scorer = AnomalyScorer()
-    df_scored = scorer.score_transactions(df_features, scores)
-    
-    # Step 6: Generate alerts
-    print("\n[STEP 6] Generating alerts...")
-    alert_manager = AlertManager()
-    
-    # Create alerts for high-risk transactions
-    alerts_created = 0
-    for idx, row in df_scored.iterrows():
-        if row['risk_level'] in ['CRITICAL', 'HIGH']:
-            alert_id = alert_manager.create_alert(
-                transaction_id=row['transaction_id'],
-                score=row['anomaly_score'],
-                risk_level=row['risk_level'],
-                priority=row['priority']
-            )
-            if alert_id:
-                alerts_created += 1
-    
-    # Step 7: Results summary
+        return 1
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+
+    # Step 3: Results summary
     print("\n" + "="*60)
     print("DETECTION RESULTS")
     print("="*60)
-    
-    print(f"\nTransactions Analyzed: {len(df)}")
-    print(f"Anomalies Detected: {(predictions == -1).sum()}")
-    print(f"Alerts Created: {alerts_created}")
-    
+
+    rows_per_second = summary['rows'] / summary['seconds'] if summary['chunks_this_run'] else 0
+    print(f"\nModel Version: {summary['model_version']}")
+    print(f"Transactions Analyzed: {summary['rows']} in {summary['chunks']} chunks "
+          f"({summary['chunks_this_run']} this run, {summary['seconds']:.1f}s)")
+    if summary['chunks_this_run'] == summary['chunks'] and rows_per_second:
+        print(f"Throughput: {rows_per_second:,.0f} rows/s")
+    print(f"Anomalies Detected: {summary['anomalies']}")
+    print(f"Alerts Created: {summary['alerts_written']}")
+    if summary['alerts_pending']:
+        print(f"  {summary['alerts_pending']} alerts kept in outbox for the next run")
+
     print("\nRisk Distribution:")
-    risk_dist = df_scored['risk_level'].value_counts()
-    for level, count in risk_dist.items():
+    for level, count in sorted(summary['risk_levels'].items(), key=lambda item: -item[1]):
         print(f"  {level}: {count}")
-    
-    print("\nTop 10 Highest Risk Transactions:")
-    top_risks = df_scored.nlargest(10, 'anomaly_score')[
-        ['transaction_id', 'amount', 'anomaly_score', 'risk_level', 'is_fraud']
-    ]
-    print(top_risks.to_string(index=False))
-    
-    # Actual performance
-    actual_fraud = df_scored['is_fraud'].sum()
-    detected_fraud = df_scored[df_scored['is_anomaly'] == 1]['is_fraud'].sum()
-    
-    print(f"\nActual Fraud in Batch: {actual_fraud}")
-    print(f"Fraud Caught: {detected_fraud}")
-    if actual_fraud > 0:
-        detection_rate = detected_fraud / actual_fraud * 100
-        print(f"Detection Rate: {detection_rate:.1f}%")
-        
-        if detection_rate >= 80:
-            print("✓ EXCELLENT - Catching most fraud!")
-        elif detection_rate >= 60:
-            print("✓ GOOD - Decent detection rate")
-        else:
-            print("⚠ WARNING - Low detection rate, consider retraining")
-    
+
+    if len(summary['top']):
+        print("\nTop 10 Highest Risk Transactions (this run):")
+        print(summary['top'].to_string(index=False))
+
+    # Actual performance, when the input is labelled
+    if 'fraud' in summary:
+        actual_fraud = summary['fraud']
+        detected_fraud = summary['fraud_caught']
+        print(f"\nActual Fraud in Input: {actual_fraud}")
+        print(f"Fraud Caught: {detected_fraud}")
+        if actual_fraud > 0:
+            detection_rate = detected_fraud / actual_fraud * 100
+            print(f"Detection Rate: {detection_rate:.1f}%")
+
+            if detection_rate >= 80:
+                print("✓ EXCELLENT - Catching most fraud!")
+            elif detection_rate >= 60:
+                print("✓ GOOD - Decent detection rate")
+            else:
+                print("⚠ WARNING - Low detection rate, consider retraining")
+
     print("\n" + "="*60)
     print("✓ DETECTION COMPLETE!")
     print("="*60)
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
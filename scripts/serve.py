@@ -0,0 +1,201 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Pre-Forking API Server (models shared copy-on-write across workers)
+"""
+
+import argparse
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'api')
+
+# Native thread pools (BLAS/OpenMP) read these when numpy is first imported
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS']
+
+def limit_threads(workers, cpus):
+    """
+    Split the CPUs between workers so they don't oversubscribe them
+
+    Sets native thread pool sizes and the API's scoring executor size
+    before numpy/sklearn are imported. Values already set in the
+    environment are kept.
+
+    Returns:
+        Threads per worker
+    """
+    threads = max(1, cpus // workers)
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(threads))
+    os.environ.setdefault('SCORING_WORKERS', str(threads))
+    os.environ.setdefault('MODEL_N_JOBS', '1')
+    return threads
+
+def memory_usage_mb(pid):
+    """
+    RSS, PSS and USS of a process in MB (Linux /proc only)
+
+    PSS splits shared pages between the processes sharing them and USS
+    counts only private pages, so USS is what each extra worker costs.
+
+    Returns:
+        Dict with rss/pss/uss, or None if unavailable
+    """
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return None
+
+    return {
+        'rss': fields.get('Rss', 0) / 1024,
+        'pss': fields.get('Pss', 0) / 1024,
+        'uss': (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024
+    }
+
+def run_worker(index, sock, ready_fd, args):
+    """Child process: serve the preloaded app on the shared socket"""
+    import uvicorn
+    import main
+
+    # Each worker gets its own outbox directory - segment files aren't
+    # safe to share between processes
+    base_outbox = os.getenv('ALERT_OUTBOX_DIR', 'data/alert_outbox')
+    if base_outbox:
+        os.environ['ALERT_OUTBOX_DIR'] = os.path.join(base_outbox, f'worker-{index}')
+
+    class WorkerServer(uvicorn.Server):
+        async def startup(self, sockets=None):
+            await super().startup(sockets=sockets)
+            os.write(ready_fd, b'.')
+
+    config = uvicorn.Config(main.app, log_level=args.log_level, access_log=False)
+    WorkerServer(config).run(sockets=[sock])
+    os._exit(0)
+
+def main_loop():
+    parser = argparse.ArgumentParser(description="Pre-forking anomaly detection API server")
+    parser.add_argument('--host', default=os.getenv('API_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('API_PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('API_WORKERS', '2')))
+    parser.add_argument('--log-level', default='warning')
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    threads = limit_threads(args.workers, cpus)
+
+    print("="*60)
+    print("ANOMALY DETECTION API - PRE-FORK SERVER")
+    print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
+    print("="*60)
+    print(f"Workers: {args.workers} | CPUs: {cpus} | Threads per worker: {threads}")
+
+    # Step 1: Load models once in the parent
+    start = time.perf_counter()
+    sys.path.insert(0, API_DIR)
+    os.environ['LAZY_STARTUP'] = 'False'  # workers must inherit loaded models
+    import gc
+    import uvicorn
+    import main
+    if main.active_models is None:
+        print("✗ Models failed to load - run 'python scripts/train_models_aggressive.py' first")
+        return 1
+    main.warm_up()
+    load_seconds = time.perf_counter() - start
+    print(f"✓ Models loaded and warmed up in {load_seconds:.2f}s")
+
+    # Keep the loaded objects out of the collector's reach so GC passes in
+    # the workers don't write to (and so un-share) the model pages
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    ready_read, ready_write = os.pipe()
+    workers = {}
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            run_worker(index, sock, ready_write, args)
+        workers[pid] = index
+        return pid
+
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    # Step 2: Fork workers and wait for all of them to finish startup
+    fork_start = time.perf_counter()
+    for index in range(args.workers):
+        spawn(index)
+
+    ready = 0
+    deadline = time.monotonic() + args.startup_timeout
+    while ready < args.workers and not stopping:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([ready_read], [], [], remaining)[0]:
+            print("⚠ Timed out waiting for workers to start")
+            break
+        ready += len(os.read(ready_read, args.workers - ready))
+    ready_seconds = time.perf_counter() - fork_start
+    print(f"✓ {ready}/{args.workers} workers ready in {ready_seconds:.2f}s "
+          f"(total startup {load_seconds + ready_seconds:.2f}s)")
+    print(f"✓ Listening on http://{args.host}:{args.port}")
+
+    # Step 3: Report memory - shared model pages show up in RSS but not USS
+    parent_mem = memory_usage_mb(os.getpid())
+    if parent_mem is not None:
+        print(f"\n{'process':>12} {'RSS MB':>9} {'PSS MB':>9} {'USS MB':>9}")
+        print(f"{'parent':>12} {parent_mem['rss']:>9.1f} {parent_mem['pss']:>9.1f} {parent_mem['uss']:>9.1f}")
+        for pid, index in sorted(workers.items(), key=lambda item: item[1]):
+            mem = memory_usage_mb(pid)
+            if mem is not None:
+                print(f"{'worker ' + str(index):>12} {mem['rss']:>9.1f} {mem['pss']:>9.1f} {mem['uss']:>9.1f}")
+
+    # Step 4: Supervise - replace workers that die unexpectedly
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        index = workers.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"⚠ Worker {index} (pid {pid}) exited with status {status} - restarting")
+            spawn(index)
+
+    sock.close()
+    print("✓ Server stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_loop())
@@ -0,0 +1,190 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Streaming Detection Daemon (file tail or in-process queue source)
+"""
+
+import sys
+sys.path.append('src')
+
+import argparse
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import pandas as pd
+
+from alerts.alert_outbox import AlertOutbox
+from api.metrics import MetricsRegistry, PROMETHEUS_CONTENT_TYPE
+from models.isolation_forest_detector import IsolationForestDetector
+from models.model_registry import ModelRegistry
+from streaming.daemon import StreamingDetector
+from streaming.sources import FileTailSource, QueueSource
+from streaming.user_state import UserFeatureState
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score a transaction stream continuously")
+    parser.add_argument('--source', choices=['file', 'queue'], default='file',
+                        help="'file' follows an NDJSON file; 'queue' feeds generated "
+                             "transactions through an in-process queue (demo/benchmark)")
+    parser.add_argument('--path', default=os.getenv('STREAM_FILE', 'data/stream/transactions.ndjson'),
+                        help="NDJSON file to follow (file source)")
+    parser.add_argument('--rate', type=float, default=2000,
+                        help="Transactions per second to generate (queue source)")
+    parser.add_argument('--seconds', type=float, default=None,
+                        help="Stop after this long (default: until SIGINT/SIGTERM)")
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('STREAM_BATCH_SIZE', '500')))
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.getenv('STREAM_MAX_WAIT_MS', '200')))
+    parser.add_argument('--state-path', default=os.getenv('STREAM_STATE_PATH', 'data/stream/user_state.pkl'),
+                        help="User state snapshot file ('' = keep state in memory only)")
+    parser.add_argument('--max-users', type=int, default=int(os.getenv('STREAM_MAX_USERS', '1000000')))
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('STREAM_METRICS_PORT', '0')),
+                        help="Serve Prometheus metrics on this port (0 = off)")
+    parser.add_argument('--report-interval', type=float, default=10.0)
+    parser.add_argument('--model-version', default=None)
+    parser.add_argument('--no-db', action='store_true',
+                        help="Keep alerts in the outbox instead of inserting them")
+    return parser.parse_args()
+
+def serve_metrics(registry, port):
+    """Serve registry.render() at /metrics from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+def produce(source, rate, stop):
+    """Feed generated transactions into a QueueSource at `rate` per second"""
+    from data_pipeline.data_generator import TransactionGenerator
+    import contextlib
+    import io
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = TransactionGenerator(seed=999).generate_dataset(n_normal=19000, n_fraud=1000)
+    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%dT%H:%M:%S')
+    records = df.drop(columns=['is_fraud']).to_dict('records')
+
+    start = time.monotonic()
+    sent = 0
+    while not stop.is_set():
+        # Send whatever is due, then sleep briefly - keeps the rate without a sleep per record
+        due = int((time.monotonic() - start) * rate)
+        while sent < due:
+            source.put(records[sent % len(records)])
+            sent += 1
+        time.sleep(0.005)
+
+def main():
+    args = parse_args()
+
+    print("="*60)
+    print("STREAMING DETECTION DAEMON")
+    print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
+    print("="*60)
+
+    # Step 1: Load the model
+    print("\n[STEP 1] Loading model...")
+    try:
+        version, directory = ModelRegistry(os.getenv('MODEL_PATH', 'models')).resolve(args.model_version)
+        detector = IsolationForestDetector()
+        detector.load(os.path.join(directory, 'isolation_forest.pkl'))
+        detector.model.set_params(n_jobs=1)
+        feature_names = joblib.load(os.path.join(directory, 'feature_engineer.pkl')).get_feature_names()
+    except Exception as e:
+        print(f"✗ Error loading models: {e}")
+        print("Please run 'python scripts/train_models_aggressive.py' first")
+        return 1
+    print(f"✓ Model version {version}")
+
+    # Step 2: Source, state and alert pipeline
+    print("\n[STEP 2] Connecting source and alert pipeline...")
+    stop = threading.Event()
+    if args.source == 'file':
+        os.makedirs(os.path.dirname(args.path) or '.', exist_ok=True)
+        source = FileTailSource(args.path)
+        print(f"✓ Following {args.path} from byte {source.committed}")
+    else:
+        source = QueueSource(maxsize=100000)
+        threading.Thread(target=produce, args=(source, args.rate, stop), name='producer', daemon=True).start()
+        print(f"✓ In-process queue, {args.rate:,.0f} generated transactions/s")
+
+    user_state = UserFeatureState(max_users=args.max_users)
+    state_path = args.state_path or None
+    if state_path:
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        if user_state.restore(state_path):
+            print(f"✓ Restored state for {len(user_state)} users")
+
+    outbox = AlertOutbox(os.getenv('ALERT_OUTBOX_DIR', 'data/alert_outbox'))
+    writer = None
+    if not args.no_db:
+        from alerts.alert_manager import AlertManager
+        from alerts.alert_writer import AlertWriter
+        writer = AlertWriter(AlertManager(), outbox=outbox,
+                             flush_interval=float(os.getenv('ALERT_FLUSH_INTERVAL', '0.5')))
+        writer.start()
+
+    daemon = StreamingDetector(
+        source, detector, feature_names, user_state, outbox,
+        batch_size=args.batch_size,
+        max_wait=args.max_wait_ms / 1000.0,
+        report_interval=args.report_interval,
+        state_path=state_path
+    )
+
+    if args.metrics_port:
+        registry = MetricsRegistry()
+        daemon.register_metrics(registry)
+        serve_metrics(registry, args.metrics_port)
+        print(f"✓ Metrics on :{args.metrics_port}/metrics")
+
+    def shutdown(signum, frame):
+        daemon.stop()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    if args.seconds:
+        threading.Timer(args.seconds, daemon.stop).start()
+
+    # Step 3: Consume until stopped
+    print("\n[STEP 3] Consuming...")
+    start = time.monotonic()
+    try:
+        daemon.run()
+    finally:
+        stop.set()
+        if writer is not None:
+            writer.stop()
+        else:
+            outbox.close()
+        source.close()
+
+    elapsed = time.monotonic() - start
+    stats = daemon.stats
+    print("\n" + "="*60)
+    print("✓ STREAM STOPPED")
+    print("="*60)
+    print(f"  Scored: {stats['records']} in {stats['batches']} batches "
+          f"({stats['records'] / elapsed:,.0f} rec/s average)")
+    print(f"  Alerts: {stats['alerts']} | Invalid: {stats['invalid']} | Lag at exit: {daemon.lag()}")
+    summary = daemon.batch_seconds.summary()
+    print(f"  Batch latency: {summary}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,62 +6,63 @@ Model Training Script
 import sys
 sys.path.append('src')
 
-from data_pipeline.data_generator import TransactionGenerator
-from data_pipeline.feature_engineering import FeatureEngineer
-from models.ensemble_detector import EnsembleDetector
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
-import numpy as np
+from models.model_registry import ModelRegistry
+from models.training_stages import assemble_ensemble, build_training_pipeline
+import argparse
 import os
+import time
+
+# Every stage's output is cached under its params - a rerun with an
+# unchanged config reuses them all
+CONFIG = {
+    'seed': 42,
+    'n_normal': 10000,
+    'n_fraud': 500,
+    'test_size': 0.3,
+    'split_seed': 42,
+    'contamination': 0.10,
+    'n_estimators': 100,
+    'n_neighbors': 20,
+    'weights': {'isolation_forest': 0.6, 'lof': 0.4},
+    'target_recall': None  # Evaluate by ensemble voting
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the ensemble detector")
+    parser.add_argument('--contamination', type=float, default=CONFIG['contamination'])
+    parser.add_argument('--workers', type=int, default=int(os.getenv('TRAINING_WORKERS', '2')),
+                        help="Processes for stages that can run side by side (0 = inline)")
+    parser.add_argument('--cache-dir', default=os.getenv('TRAINING_CACHE_DIR', 'data/training_cache'))
+    parser.add_argument('--force', nargs='*', default=[], metavar='STAGE',
+                        help="Rerun these stages even if cached")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    config = dict(CONFIG, contamination=args.contamination)
+
     print("="*60)
     print("ANOMALY DETECTION MODEL TRAINING")
     print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
     print("="*60)
     
-    # Step 1: Generate data
-    print("\n[STEP 1] Generating training data...")
-    generator = TransactionGenerator(seed=42)
-    df = generator.generate_dataset(n_normal=10000, n_fraud=500)
-    
-    # Step 2: Feature engineering
-    print("\n[STEP 2] Engineering features...")
-    engineer = FeatureEngineer()
-    df_features = engineer.create_features(df)
-    
-    # Step 3: Prepare data
-    print("\n[STEP 3] Preparing training data...")
-    X = engineer.get_feature_matrix(df_features)
-    y = df_features['is_fraud'].values
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
-    )
+    # Steps 1-5: generate -> features -> split -> IF | LOF -> scores -> evaluate
+    print(f"\n[STEP 1-5] Running training pipeline (cache: {args.cache_dir})...")
+    start = time.perf_counter()
+    pipeline = build_training_pipeline(config, args.cache_dir, workers=args.workers)
+    results = pipeline.run(force=args.force)
+    ran = [name for name, result in results.items() if result['status'] == 'ran']
+    print(f"  Pipeline done in {time.perf_counter() - start:.1f}s "
+          f"({len(ran)} of {len(results)} stages ran)")
     
-    print(f"  Training set: {X_train.shape[0]} samples")
-    print(f"  Test set: {X_test.shape[0]} samples")
-    print(f"  Fraud rate (train): {y_train.mean()*100:.2f}%")
-    print(f"  Fraud rate (test): {y_test.mean()*100:.2f}%")
+    split = pipeline.load('split')
+    print(f"  Training set: {split['X_train'].shape[0]} samples")
+    print(f"  Test set: {split['X_test'].shape[0]} samples")
+    print(f"  Fraud rate (train): {split['y_train'].mean()*100:.2f}%")
+    print(f"  Fraud rate (test): {split['y_test'].mean()*100:.2f}%")
     
-    # Step 4: Train ensemble model
-    print("\n[STEP 4] Training ensemble model...")
-    model = EnsembleDetector(contamination=0.10)
-    model.fit(X_train)
-    
-    # Step 5: Evaluate
-    print("\n[STEP 5] Evaluating model...")
-    
-    # Predictions
-    y_pred = model.predict(X_test)
-    y_pred_binary = (y_pred == -1).astype(int)
-    
-    # Get scores
-    y_scores = model.predict_proba(X_test)
-    
-    # Confusion Matrix
-    cm = confusion_matrix(y_test, y_pred_binary)
+    evaluation = pipeline.load('evaluate')
+    cm = evaluation['confusion_matrix']
     
     print("\n" + "="*60)
     print("EVALUATION RESULTS")
@@ -72,16 +73,10 @@ def main():
     print(f"Actual Normal:        {cm[0,0]:>6}      |      {cm[0,1]:>6}")
     print(f"Actual Fraud:         {cm[1,0]:>6}      |      {cm[1,1]:>6}")
     
-    # Metrics
-    tp = cm[1,1]
-    fp = cm[0,1]
-    tn = cm[0,0]
-    fn = cm[1,0]
-    
-    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
-    fpr = fp / (fp + tn) if (fp + tn) > 0 else 0
+    precision = evaluation['precision']
+    recall = evaluation['recall']
+    f1 = evaluation['f1']
+    fpr = evaluation['fpr']
     
     print(f"\nPerformance Metrics:")
     print(f"  Precision:  {precision:.3f} (accuracy of fraud predictions)")
@@ -107,12 +102,26 @@ def main():
     
     os.makedirs('models', exist_ok=True)
     
+    model = assemble_ensemble(pipeline.load('isolation_forest'), pipeline.load('lof'), config['weights'])
     model.if_detector.save('models/isolation_forest.pkl')
     model.lof_detector.save('models/lof.pkl')
     
     # Save feature engineer
     import joblib
-    joblib.dump(engineer, 'models/feature_engineer.pkl')
+    joblib.dump(pipeline.load('features')['engineer'], 'models/feature_engineer.pkl')
+    
+    # Step 7: Publish as a new version - running APIs pick it up without a restart
+    print(f"\n[STEP 7] Publishing model version...")
+    registry = ModelRegistry('models')
+    version = registry.publish('models', metadata={
+        'script': 'train_models',
+        'detection_rate': float(detection_rate),
+        'false_positive_rate': float(false_positive_rate)
+    })
+    registry.activate(version)
+    for removed in registry.prune(keep=int(os.getenv('MODEL_REGISTRY_KEEP', '5'))):
+        print(f"  Pruned old version {removed}")
+    pipeline.prune(keep=int(os.getenv('TRAINING_CACHE_KEEP', '3')))
     
     print("\n" + "="*60)
     print("✓ TRAINING COMPLETE!")
@@ -121,6 +130,7 @@ def main():
     print("  - models/isolation_forest.pkl")
     print("  - models/lof.pkl")
     print("  - models/feature_engineer.pkl")
+    print(f"\nActive model version: {version}")
 
 if __name__ == "__main__":
     main()
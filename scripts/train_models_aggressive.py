@@ -6,86 +6,71 @@ AGGRESSIVE Model Training - Optimized for High Recall
 import sys
 sys.path.append('src')
 
-from data_pipeline.data_generator import TransactionGenerator
-from data_pipeline.feature_engineering import FeatureEngineer
-from models.ensemble_detector import EnsembleDetector
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, precision_recall_curve
-import numpy as np
+from models.model_registry import ModelRegistry
+from models.training_stages import assemble_ensemble, build_training_pipeline
+import argparse
 import os
+import time
+
+# Every stage's output is cached under its params - changing only
+# target_recall reruns threshold and evaluate, not the model fits
+CONFIG = {
+    'seed': 42,
+    'n_normal': 8000,
+    'n_fraud': 1200,  # Higher fraud rate for better learning
+    'test_size': 0.3,
+    'split_seed': 42,
+    'contamination': 0.08,  # Much higher!
+    'n_estimators': 100,
+    'n_neighbors': 20,
+    'weights': {'isolation_forest': 0.6, 'lof': 0.4},
+    'target_recall': 0.90
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the high-recall ensemble")
+    parser.add_argument('--contamination', type=float, default=CONFIG['contamination'])
+    parser.add_argument('--target-recall', type=float, default=CONFIG['target_recall'])
+    parser.add_argument('--workers', type=int, default=int(os.getenv('TRAINING_WORKERS', '2')),
+                        help="Processes for stages that can run side by side (0 = inline)")
+    parser.add_argument('--cache-dir', default=os.getenv('TRAINING_CACHE_DIR', 'data/training_cache'))
+    parser.add_argument('--force', nargs='*', default=[], metavar='STAGE',
+                        help="Rerun these stages even if cached")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    config = dict(CONFIG, contamination=args.contamination, target_recall=args.target_recall)
+
     print("="*60)
     print("AGGRESSIVE TRAINING - HIGH RECALL MODE")
     print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
     print("="*60)
     
-    # Step 1: Generate MORE fraud data for better learning
-    print("\n[STEP 1] Generating training data with higher fraud rate...")
-    generator = TransactionGenerator(seed=42)
-    df = generator.generate_dataset(n_normal=8000, n_fraud=1200)
-    
-    # Step 2: Feature engineering
-    print("\n[STEP 2] Engineering features...")
-    engineer = FeatureEngineer()
-    df_features = engineer.create_features(df)
-    
-    # Step 3: Prepare data
-    print("\n[STEP 3] Preparing training data...")
-    X = engineer.get_feature_matrix(df_features)
-    y = df_features['is_fraud'].values
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
-    )
-    
-    print(f"  Training set: {X_train.shape[0]} samples")
-    print(f"  Test set: {X_test.shape[0]} samples")
-    print(f"  Fraud rate (train): {y_train.mean()*100:.2f}%")
-    print(f"  Fraud rate (test): {y_test.mean()*100:.2f}%")
-    
-    # Step 4: Train with HIGHER contamination
-    print("\n[STEP 4] Training ensemble model (AGGRESSIVE MODE)...")
-    model = EnsembleDetector(contamination=0.08)  # Much higher!
-    model.fit(X_train)
-    
-    # Step 5: Get probability scores
-    print("\n[STEP 5] Calculating anomaly scores...")
-    y_scores_test = model.predict_proba(X_test)
-    
-    # Step 6: Find optimal threshold for 85%+ recall
-    print("\n[STEP 6] Finding optimal threshold for high recall...")
-    precisions, recalls, thresholds = precision_recall_curve(y_test, y_scores_test)
-    
-    # Find threshold that gives recall >= 0.85
-    target_recall = 0.90
-    best_threshold = 0.5
-    best_precision = 0
-    best_f1 = 0
-    
-    for i in range(len(thresholds)):
-        if recalls[i] >= target_recall:
-            precision = precisions[i]
-            recall = recalls[i]
-            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-            
-            if f1 > best_f1:
-                best_f1 = f1
-                best_precision = precision
-                best_threshold = thresholds[i]
-    
+    # Steps 1-8: generate -> features -> split -> IF | LOF -> scores -> threshold -> evaluate
+    print(f"\n[STEP 1-8] Running training pipeline (cache: {args.cache_dir})...")
+    start = time.perf_counter()
+    pipeline = build_training_pipeline(config, args.cache_dir, workers=args.workers)
+    results = pipeline.run(force=args.force)
+    ran = [name for name, result in results.items() if result['status'] == 'ran']
+    print(f"  Pipeline done in {time.perf_counter() - start:.1f}s "
+          f"({len(ran)} of {len(results)} stages ran)")
+    
+    split = pipeline.load('split')
+    print(f"  Training set: {split['X_train'].shape[0]} samples")
+    print(f"  Test set: {split['X_test'].shape[0]} samples")
+    print(f"  Fraud rate (train): {split['y_train'].mean()*100:.2f}%")
+    print(f"  Fraud rate (test): {split['y_test'].mean()*100:.2f}%")
+    
+    threshold = pipeline.load('threshold')
+    best_threshold = threshold['threshold']
+    target_recall = threshold['target_recall']
     print(f"  Optimal threshold: {best_threshold:.4f}")
-    print(f"  Expected precision: {best_precision:.3f}")
+    print(f"  Expected precision: {threshold['precision']:.3f}")
     print(f"  Expected recall: ≥{target_recall}")
     
-    # Step 7: Apply optimal threshold
-    print("\n[STEP 7] Applying optimal threshold...")
-    y_pred_binary = (y_scores_test >= best_threshold).astype(int)
-    
-    # Step 8: Evaluate
-    print("\n[STEP 8] Evaluating model...")
-    cm = confusion_matrix(y_test, y_pred_binary)
+    evaluation = pipeline.load('evaluate')
+    cm = evaluation['confusion_matrix']
     
     print("\n" + "="*60)
     print("EVALUATION RESULTS")
@@ -96,16 +81,10 @@ def main():
     print(f"Actual Normal:        {cm[0,0]:>6}      |      {cm[0,1]:>6}")
     print(f"Actual Fraud:         {cm[1,0]:>6}      |      {cm[1,1]:>6}")
     
-    # Calculate metrics
-    tp = cm[1,1]
-    fp = cm[0,1]
-    tn = cm[0,0]
-    fn = cm[1,0]
-    
-    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
-    fpr = fp / (fp + tn) if (fp + tn) > 0 else 0
+    precision = evaluation['precision']
+    recall = evaluation['recall']
+    f1 = evaluation['f1']
+    fpr = evaluation['fpr']
     
     print(f"\nPerformance Metrics:")
     print(f"  Precision:  {precision:.3f} (accuracy of fraud predictions)")
@@ -131,12 +110,13 @@ def main():
     
     os.makedirs('models', exist_ok=True)
     
+    model = assemble_ensemble(pipeline.load('isolation_forest'), pipeline.load('lof'), config['weights'])
     model.if_detector.save('models/isolation_forest.pkl')
     model.lof_detector.save('models/lof.pkl')
     
     # Save feature engineer
     import joblib
-    joblib.dump(engineer, 'models/feature_engineer.pkl')
+    joblib.dump(pipeline.load('features')['engineer'], 'models/feature_engineer.pkl')
     
     # Save optimal threshold
     joblib.dump({
@@ -146,6 +126,22 @@ def main():
         'achieved_precision': precision
     }, 'models/optimal_threshold.pkl')
     
+    # Step 10: Publish as a new version - running APIs pick it up without a restart
+    print(f"\n[STEP 10] Publishing model version...")
+    registry = ModelRegistry('models')
+    version = registry.publish('models', metadata={
+        'script': 'train_models_aggressive',
+        'threshold': float(best_threshold),
+        'achieved_recall': float(recall),
+        'achieved_precision': float(precision),
+        'detection_rate': float(detection_rate),
+        'false_positive_rate': float(false_positive_rate)
+    })
+    registry.activate(version)
+    for removed in registry.prune(keep=int(os.getenv('MODEL_REGISTRY_KEEP', '5'))):
+        print(f"  Pruned old version {removed}")
+    pipeline.prune(keep=int(os.getenv('TRAINING_CACHE_KEEP', '3')))
+    
     print("\n" + "="*60)
     print("✓ AGGRESSIVE TRAINING COMPLETE!")
     print("="*60)
@@ -155,6 +151,7 @@ def main():
     print("  - models/feature_engineer.pkl")
     print("  - models/optimal_threshold.pkl (NEW)")
     print(f"\nOptimal threshold ({best_threshold:.4f}) will be used for detection")
+    print(f"Active model version: {version}")
 
 if __name__ == "__main__":
     main()
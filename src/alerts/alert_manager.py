@@ -5,16 +5,35 @@ Alert Management System
 
 import pandas as pd
 from datetime import datetime
+import base64
+import uuid
 import psycopg2
+from psycopg2.extras import execute_values
 import os
 from dotenv import load_dotenv
+from .connection_pool import get_shared_pool
+from .alert_statistics import AlertStatistics
 
 load_dotenv()
 
+# Risk level -> alert severity
+SEVERITY_MAP = {
+    'CRITICAL': 'CRITICAL',
+    'HIGH': 'HIGH',
+    'MEDIUM': 'MEDIUM',
+    'LOW': 'LOW'
+}
+
 class AlertManager:
     """Manage fraud alerts and investigations"""
     
-    def __init__(self):
+    def __init__(self, pool=None, suppressor=None):
+        """
+        Args:
+            pool: ConnectionPool to use (defaults to the process-wide pool)
+            suppressor: Optional AlertSuppressor coalescing repeat alerts
+                per (user_id, severity)
+        """
         self.conn_params = {
             'host': os.getenv('DB_HOST', 'localhost'),
             'port': os.getenv('DB_PORT', '5432'),
@@ -22,8 +41,14 @@ class AlertManager:
             'user': os.getenv('DB_USER'),
             'password': os.getenv('DB_PASSWORD')
         }
+        self.pool = pool or get_shared_pool(self.conn_params)
+        self.suppressor = suppressor
+        self.statistics = AlertStatistics(
+            self._count_alerts,
+            reconcile_interval=float(os.getenv('ALERT_STATS_RECONCILE_INTERVAL', '300'))
+        )
     
-    def create_alert(self, transaction_id, score, risk_level, priority):
+    def create_alert(self, transaction_id, score, risk_level, priority, user_id=None):
         """
         Create a new alert in database
         
@@ -32,93 +57,369 @@ class AlertManager:
             score: Anomaly score
             risk_level: Risk level string
             priority: Priority (1-5)
+            user_id: User ID, used to coalesce repeat alerts when a
+                suppressor is configured
         
         Returns:
-            alert_id
+            alert_id (the existing alert's id if this one was coalesced)
         """
+        if self.suppressor is not None and user_id is not None:
+            alert_ids = self.create_alerts([{
+                'transaction_id': transaction_id,
+                'score': score,
+                'risk_level': risk_level,
+                'priority': priority,
+                'user_id': user_id
+            }])
+            return alert_ids[0] if alert_ids else None
+        
         try:
-            conn = psycopg2.connect(**self.conn_params)
-            cursor = conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Determine alert type based on score
+                alert_type = 'MODEL_BASED'
+                
+                # Determine severity
+                severity = SEVERITY_MAP.get(risk_level, 'LOW')
+                
+                # Insert alert
+                cursor.execute("""
+                    INSERT INTO alerts (
+                        transaction_id, alert_type, severity, priority, status
+                    )
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING alert_id
+                """, (transaction_id, alert_type, severity, priority, 'OPEN'))
+                
+                alert_id = cursor.fetchone()[0]
+                
+                conn.commit()
+                cursor.close()
             
-            # Determine alert type based on score
-            alert_type = 'MODEL_BASED'
+            self.statistics.record_created(severity)
             
-            # Determine severity
-            severity_map = {
-                'CRITICAL': 'CRITICAL',
-                'HIGH': 'HIGH',
-                'MEDIUM': 'MEDIUM',
-                'LOW': 'LOW'
-            }
-            severity = severity_map.get(risk_level, 'LOW')
+            return alert_id
             
-            # Insert alert
-            cursor.execute("""
-                INSERT INTO alerts (
-                    transaction_id, alert_type, severity, priority, status
-                )
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING alert_id
-            """, (transaction_id, alert_type, severity, priority, 'OPEN'))
+        except Exception as e:
+            print(f"Error creating alert: {e}")
+            return None
+    
+    def create_alerts(self, alerts):
+        """
+        Create many alerts in a single round trip
+        
+        With a suppressor configured, alerts carrying a user_id that
+        repeat an open (user_id, severity) alert - or an earlier alert in
+        the same call - are not inserted; they return the existing
+        alert_id and add to its hit_count instead.
+        
+        Args:
+            alerts: List of dicts with create_alert's arguments
+                (transaction_id, score, risk_level, priority, optional user_id)
+        
+        Returns:
+            List of alert_ids in input order, or None on error
+        """
+        if not alerts:
+            return []
+        
+        alert_ids = [None] * len(alerts)
+        new_idx = []
+        repeats = []  # (index, user_id, severity) of in-call duplicates
+        seen = set()
+        
+        for i, alert in enumerate(alerts):
+            severity = SEVERITY_MAP.get(alert['risk_level'], 'LOW')
+            user_id = alert.get('user_id')
             
-            alert_id = cursor.fetchone()[0]
+            if self.suppressor is None or user_id is None:
+                new_idx.append(i)
+                continue
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+            existing = self.suppressor.lookup(user_id, severity)
+            if existing is not None:
+                alert_ids[i] = existing
+            elif (user_id, severity) in seen:
+                repeats.append((i, user_id, severity))
+            else:
+                seen.add((user_id, severity))
+                new_idx.append(i)
+        
+        rows = [
+            (
+                alerts[i]['transaction_id'],
+                'MODEL_BASED',
+                SEVERITY_MAP.get(alerts[i]['risk_level'], 'LOW'),
+                int(alerts[i]['priority']),
+                'OPEN'
+            )
+            for i in new_idx
+        ]
+        
+        # Fully suppressed - hit counts wait for the next write or flush
+        if not rows and not repeats:
+            return alert_ids
+        
+        hits = {}
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                if rows:
+                    # Multi-row VALUES; RETURNING order follows VALUES order
+                    results = execute_values(cursor, """
+                        INSERT INTO alerts (
+                            transaction_id, alert_type, severity, priority, status
+                        )
+                        VALUES %s
+                        RETURNING alert_id
+                    """, rows, page_size=len(rows), fetch=True)
+                    
+                    for i, row in zip(new_idx, results):
+                        alert_ids[i] = row[0]
+                
+                if self.suppressor is not None:
+                    for i in new_idx:
+                        user_id = alerts[i].get('user_id')
+                        if user_id is not None:
+                            severity = SEVERITY_MAP.get(alerts[i]['risk_level'], 'LOW')
+                            self.suppressor.register(user_id, severity, alert_ids[i])
+                    for i, user_id, severity in repeats:
+                        alert_ids[i] = self.suppressor.lookup(user_id, severity)
+                    
+                    # Piggyback accumulated repeat counts on this transaction
+                    hits = self.suppressor.collect_hits()
+                    self._write_hits(cursor, hits)
+                
+                conn.commit()
+                cursor.close()
             
-            return alert_id
+            for row in rows:
+                self.statistics.record_created(row[2])
+            
+            return alert_ids
             
         except Exception as e:
-            print(f"Error creating alert: {e}")
+            if hits:
+                self.suppressor.restore_hits(hits)
+            print(f"Error creating alerts: {e}")
             return None
     
+    def flush_suppressed_hits(self):
+        """Write repeat counts held by the suppressor (e.g. on shutdown)"""
+        if self.suppressor is None:
+            return
+        
+        hits = self.suppressor.collect_hits()
+        if not hits:
+            return
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                self._write_hits(cursor, hits)
+                conn.commit()
+                cursor.close()
+        except Exception as e:
+            self.suppressor.restore_hits(hits)
+            print(f"Error writing alert hit counts: {e}")
+    
+    def _write_hits(self, cursor, hits):
+        """Add coalesced repeat counts to their alerts"""
+        if not hits:
+            return
+        
+        execute_values(cursor, """
+            UPDATE alerts
+            SET hit_count = alerts.hit_count + v.hits,
+                last_hit_at = CURRENT_TIMESTAMP
+            FROM (VALUES %s) AS v (alert_id, hits)
+            WHERE alerts.alert_id = v.alert_id
+        """, list(hits.items()), page_size=len(hits))
+    
+    @staticmethod
+    def build_alert_records(df_scored, risk_levels=('CRITICAL', 'HIGH')):
+        """
+        Select alert-worthy rows from AnomalyScorer output
+        
+        Args:
+            df_scored: DataFrame from AnomalyScorer.score_transactions
+            risk_levels: Risk levels that raise an alert
+        
+        Returns:
+            List of alert dicts for create_alerts
+        """
+        high_risk = df_scored[df_scored['risk_level'].isin(risk_levels)]
+        
+        records = [
+            {
+                'transaction_id': transaction_id,
+                'score': float(score),
+                'risk_level': risk_level,
+                'priority': int(priority)
+            }
+            for transaction_id, score, risk_level, priority in zip(
+                high_risk['transaction_id'].tolist(),
+                high_risk['anomaly_score'].tolist(),
+                high_risk['risk_level'].tolist(),
+                high_risk['priority'].tolist()
+            )
+        ]
+        
+        if 'user_id' in high_risk.columns:
+            for record, user_id in zip(records, high_risk['user_id'].tolist()):
+                record['user_id'] = user_id
+        
+        return records
+    
     def get_open_alerts(self, limit=100):
         """Get open alerts ordered by priority"""
-        try:
-            conn = psycopg2.connect(**self.conn_params)
-            
-            query = """
-                SELECT 
+        df, _ = self.get_open_alerts_page(limit=limit)
+        return df
+    
+    def get_open_alerts_page(self, limit=100, after=None):
+        """
+        Get one page of open alerts using keyset (seek) pagination
+        
+        Pages are ordered by priority, newest first within a priority, and
+        continue strictly after the `after` cursor, so deep pages cost the
+        same as the first (served by idx_alerts_open_queue).
+        
+        Args:
+            limit: Page size
+            after: Cursor returned with the previous page (None = first page)
+        
+        Returns:
+            (DataFrame of alerts, cursor for the next page or None)
+        """
+        columns = """
                     alert_id,
                     transaction_id,
                     severity,
                     priority,
-                    created_at
-                FROM alerts
-                WHERE status = 'OPEN'
-                ORDER BY priority ASC, created_at DESC
-                LIMIT %s
-            """
+                    created_at"""
+        try:
+            if after is None:
+                query = f"""
+                    SELECT {columns}
+                    FROM alerts
+                    WHERE status = 'OPEN'
+                    ORDER BY priority ASC, created_at DESC, alert_id DESC
+                    LIMIT %s
+                """
+                params = (limit,)
+            else:
+                priority, created_at, alert_id = after
+                query = f"""
+                    SELECT {columns}
+                    FROM alerts
+                    WHERE status = 'OPEN'
+                      AND (priority > %s
+                           OR (priority = %s AND (created_at, alert_id) < (%s, %s)))
+                    ORDER BY priority ASC, created_at DESC, alert_id DESC
+                    LIMIT %s
+                """
+                params = (priority, priority, created_at, alert_id, limit)
+            
+            with self.pool.connection() as conn:
+                df = pd.read_sql(query, conn, params=params)
             
-            df = pd.read_sql(query, conn, params=(limit,))
-            conn.close()
+            next_cursor = None
+            if len(df) == limit:
+                last = df.iloc[-1]
+                next_cursor = (int(last['priority']), last['created_at'].to_pydatetime(),
+                               int(last['alert_id']))
             
-            return df
+            return df, next_cursor
             
         except Exception as e:
             print(f"Error fetching alerts: {e}")
-            return pd.DataFrame()
+            return pd.DataFrame(), None
+    
+    def iter_open_alerts(self, batch_size=1000):
+        """
+        Stream every open alert through a server-side cursor
+        
+        Rows are fetched `batch_size` at a time, so memory stays flat no
+        matter how large the backlog is. The pooled connection is held
+        until the generator is exhausted or closed.
+        
+        Yields:
+            Dict per alert, in get_open_alerts order
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(name=f"open_alerts_{uuid.uuid4().hex}")
+            cursor.itersize = batch_size
+            try:
+                cursor.execute("""
+                    SELECT 
+                        alert_id,
+                        transaction_id,
+                        severity,
+                        priority,
+                        created_at
+                    FROM alerts
+                    WHERE status = 'OPEN'
+                    ORDER BY priority ASC, created_at DESC, alert_id DESC
+                """)
+                
+                names = None
+                for row in cursor:
+                    if names is None:
+                        names = [col[0] for col in cursor.description]
+                    yield dict(zip(names, row))
+            finally:
+                cursor.close()
+    
+    @staticmethod
+    def encode_cursor(cursor):
+        """Turn a page cursor into an opaque URL-safe token"""
+        if cursor is None:
+            return None
+        priority, created_at, alert_id = cursor
+        raw = f"{priority}|{created_at.isoformat()}|{alert_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(token):
+        """Parse a token from encode_cursor (raises ValueError if malformed)"""
+        if not token:
+            return None
+        try:
+            priority, created_at, alert_id = base64.urlsafe_b64decode(token.encode()).decode().split('|')
+            return int(priority), datetime.fromisoformat(created_at), int(alert_id)
+        except Exception:
+            raise ValueError(f"Invalid cursor: {token}")
     
     def update_alert_status(self, alert_id, status, resolution=None, notes=None):
         """Update alert status"""
         try:
-            conn = psycopg2.connect(**self.conn_params)
-            cursor = conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Return the previous status so the counters can be moved
+                cursor.execute("""
+                    UPDATE alerts
+                    SET status = %s,
+                        resolution = %s,
+                        investigation_notes = %s,
+                        resolved_at = CASE WHEN %s IN ('RESOLVED', 'FALSE_POSITIVE') 
+                                          THEN CURRENT_TIMESTAMP ELSE NULL END
+                    FROM (
+                        SELECT alert_id, status FROM alerts WHERE alert_id = %s FOR UPDATE
+                    ) AS previous
+                    WHERE alerts.alert_id = previous.alert_id
+                    RETURNING previous.status, alerts.severity
+                """, (status, resolution, notes, status, alert_id))
+                
+                updated = cursor.fetchone()
+                
+                conn.commit()
+                cursor.close()
             
-            cursor.execute("""
-                UPDATE alerts
-                SET status = %s,
-                    resolution = %s,
-                    investigation_notes = %s,
-                    resolved_at = CASE WHEN %s IN ('RESOLVED', 'FALSE_POSITIVE') 
-                                      THEN CURRENT_TIMESTAMP ELSE NULL END
-                WHERE alert_id = %s
-            """, (status, resolution, notes, status, alert_id))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+            if updated is not None:
+                self.statistics.record_status_change(updated[0], status, updated[1])
             
             print(f"✓ Alert {alert_id} updated to {status}")
             
@@ -126,25 +427,33 @@ class AlertManager:
             print(f"Error updating alert: {e}")
     
     def get_alert_statistics(self):
-        """Get alert statistics"""
+        """Get alert statistics (served from in-process counters)"""
         try:
-            conn = psycopg2.connect(**self.conn_params)
-            
-            query = """
-                SELECT 
-                    status,
-                    severity,
-                    COUNT(*) as count
-                FROM alerts
-                GROUP BY status, severity
-                ORDER BY status, severity
-            """
-            
-            df = pd.read_sql(query, conn)
-            conn.close()
-            
-            return df
+            return pd.DataFrame(
+                self.statistics.snapshot(),
+                columns=['status', 'severity', 'count']
+            )
             
         except Exception as e:
             print(f"Error fetching statistics: {e}")
             return pd.DataFrame()
+    
+    def _count_alerts(self):
+        """Full GROUP BY over alerts - used to reconcile the counters"""
+        query = """
+            SELECT 
+                status,
+                severity,
+                COUNT(*) as count
+            FROM alerts
+            GROUP BY status, severity
+            ORDER BY status, severity
+        """
+        
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            cursor.close()
+        
+        return rows
@@ -0,0 +1,203 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Durable Local Alert Outbox
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+
+class AlertOutbox:
+    """
+    Append-only on-disk log of alerts waiting to reach the database
+
+    Alerts are appended as JSON lines to an active segment and fsynced in
+    groups (every `fsync_batch` records or `fsync_interval` seconds), so a
+    burst costs one fsync instead of one per alert. Segments are sealed
+    when they reach `segment_max_records` or on replay; sealed segments
+    are bulk-inserted by replay() and deleted once the database has them.
+    A segment left open by a crash is sealed on the next start.
+    """
+
+    def __init__(self, directory, segment_max_records=10000, fsync_batch=100,
+                 fsync_interval=0.05):
+        """
+        Args:
+            directory: Where segment files live
+            segment_max_records: Records per segment before rotating
+            fsync_batch: Records appended before forcing an fsync
+            fsync_interval: Max seconds an appended record waits for fsync
+        """
+        self.directory = directory
+        self.segment_max_records = segment_max_records
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._file = None
+        self._active_path = None
+        self._active_records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        # Recover segments left open by a previous process
+        for path in sorted(glob.glob(os.path.join(directory, 'segment-*.open'))):
+            os.replace(path, path[:-len('.open')] + '.jsonl')
+
+        self._next_seq = self._max_seq() + 1
+
+    def append(self, alert, durable=False):
+        """Append one alert (see append_many)"""
+        self.append_many([alert], durable=durable)
+
+    def append_many(self, alerts, durable=False):
+        """
+        Append alerts to the active segment
+
+        Args:
+            alerts: List of alert dicts (create_alert's arguments)
+            durable: fsync before returning instead of waiting for the batch
+        """
+        if not alerts:
+            return
+
+        with self._lock:
+            start = 0
+            while start < len(alerts):
+                if self._file is None:
+                    self._open_segment()
+
+                end = min(len(alerts), start + self.segment_max_records - self._active_records)
+                self._file.write(''.join(json.dumps(alert) + '\n' for alert in alerts[start:end]))
+                self._active_records += end - start
+                self._unsynced += end - start
+                start = end
+
+                if self._active_records >= self.segment_max_records:
+                    self._seal()
+
+            if (durable or self._unsynced >= self.fsync_batch or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def sync(self):
+        """fsync everything appended so far"""
+        with self._lock:
+            self._sync()
+
+    def rotate(self):
+        """Seal the active segment so it can be replayed"""
+        with self._lock:
+            self._seal()
+
+    def pending_segments(self):
+        """Sealed segments waiting for replay, oldest first"""
+        return sorted(glob.glob(os.path.join(self.directory, 'segment-*.jsonl')))
+
+    def pending_count(self):
+        """Alerts on disk not yet written to the database"""
+        total = self._active_records
+        for path in self.pending_segments():
+            with open(path) as f:
+                total += sum(1 for line in f if line.strip())
+        return total
+
+    def replay(self, alert_manager, batch_size=1000, seal_active=True):
+        """
+        Bulk-insert sealed segments and delete them once stored
+
+        Stops at the first failed insert and keeps the rest on disk for
+        the next attempt.
+
+        Args:
+            alert_manager: AlertManager used for create_alerts
+            batch_size: Alerts per bulk insert
+            seal_active: Seal the active segment first so it is included
+
+        Returns:
+            Number of alerts written to the database
+        """
+        with self._replay_lock:
+            if seal_active:
+                self.rotate()
+
+            written = 0
+            for path in self.pending_segments():
+                alerts = self._read_segment(path)
+
+                for start in range(0, len(alerts), batch_size):
+                    chunk = alerts[start:start + batch_size]
+                    if alert_manager.create_alerts(chunk) is None:
+                        # Keep only what the database didn't get
+                        self._rewrite_segment(path, alerts[start:])
+                        return written
+                    written += len(chunk)
+
+                os.remove(path)
+
+            return written
+
+    def close(self):
+        """fsync and close the active segment (it stays pending)"""
+        with self._lock:
+            self._seal()
+
+    def _open_segment(self):
+        self._active_path = os.path.join(self.directory, f"segment-{self._next_seq:010d}.open")
+        self._next_seq += 1
+        self._file = open(self._active_path, 'a')
+        self._active_records = 0
+
+    def _sync(self):
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal(self):
+        if self._file is None:
+            return
+        self._sync()
+        self._file.close()
+        self._file = None
+
+        sealed = self._active_path[:-len('.open')] + '.jsonl'
+        if self._active_records:
+            os.replace(self._active_path, sealed)
+        else:
+            os.remove(self._active_path)
+        self._active_records = 0
+
+    def _read_segment(self, path):
+        alerts = []
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    alerts.append(json.loads(line))
+                except ValueError:
+                    # Torn final write from a crash - nothing after it was acknowledged
+                    break
+        return alerts
+
+    def _rewrite_segment(self, path, alerts):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(''.join(json.dumps(alert) + '\n' for alert in alerts))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _max_seq(self):
+        seqs = [
+            int(os.path.basename(path).split('-')[1].split('.')[0])
+            for path in glob.glob(os.path.join(self.directory, 'segment-*'))
+        ]
+        return max(seqs, default=0)
@@ -0,0 +1,106 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Incrementally Maintained Alert Statistics
+"""
+
+import threading
+import time
+
+class AlertStatistics:
+    """
+    Alert counts by (status, severity) kept in process
+
+    Counters are bumped as alerts are created and change status, so reads
+    cost O(number of status/severity pairs) instead of a GROUP BY over the
+    whole alerts table. Every `reconcile_interval` seconds a background
+    refresh replaces the counters with the table's real counts, which
+    corrects drift from writes made by other processes.
+    """
+
+    def __init__(self, count_fn, reconcile_interval=300, clock=time.monotonic):
+        """
+        Args:
+            count_fn: Callable returning (status, severity, count) rows from the table
+            reconcile_interval: Seconds between reconciliations
+            clock: Time source (seconds)
+        """
+        self.count_fn = count_fn
+        self.reconcile_interval = reconcile_interval
+        self.clock = clock
+
+        self.last_reconciled = None
+
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._reconciling = False
+
+    def record_created(self, severity, n=1):
+        """Count newly created (OPEN) alerts"""
+        self._add('OPEN', severity, n)
+
+    def record_status_change(self, old_status, new_status, severity):
+        """Move one alert between status buckets"""
+        if old_status == new_status:
+            return
+        with self._lock:
+            self._bump(old_status, severity, -1)
+            self._bump(new_status, severity, 1)
+
+    def snapshot(self):
+        """
+        Get current counts
+
+        The first call reconciles synchronously; later calls trigger a
+        background reconciliation when the counters are stale.
+
+        Returns:
+            List of dicts with status, severity and count, sorted like the
+            original GROUP BY query
+        """
+        if self.last_reconciled is None:
+            self.reconcile()
+        elif self.clock() - self.last_reconciled >= self.reconcile_interval:
+            self._reconcile_in_background()
+
+        with self._lock:
+            items = sorted(self._counts.items())
+
+        return [
+            {'status': status, 'severity': severity, 'count': count}
+            for (status, severity), count in items
+            if count > 0
+        ]
+
+    def reconcile(self):
+        """Replace counters with the table's actual counts"""
+        try:
+            rows = self.count_fn()
+        except Exception as e:
+            print(f"Error reconciling alert statistics: {e}")
+            rows = None
+
+        with self._lock:
+            if rows is not None:
+                self._counts = {
+                    (status, severity): int(count)
+                    for status, severity, count in rows
+                }
+            # Also back off after a failure so reads don't hammer the database
+            self.last_reconciled = self.clock()
+            self._reconciling = False
+
+    def _reconcile_in_background(self):
+        with self._lock:
+            if self._reconciling:
+                return
+            self._reconciling = True
+
+        threading.Thread(target=self.reconcile, name='alert-stats-reconcile', daemon=True).start()
+
+    def _add(self, status, severity, n):
+        with self._lock:
+            self._bump(status, severity, n)
+
+    def _bump(self, status, severity, n):
+        key = (status, severity)
+        self._counts[key] = self._counts.get(key, 0) + n
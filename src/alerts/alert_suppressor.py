@@ -0,0 +1,104 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Alert Deduplication and Storm Suppression
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class AlertSuppressor:
+    """
+    Coalesce repeat alerts for the same user and severity
+
+    The first alert for a (user_id, severity) key is written normally and
+    remembered for `ttl_seconds`. Repeats inside that window reuse the
+    original alert_id and only bump a hit counter, so a card-testing burst
+    from one user produces one alert row per TTL instead of one per
+    transaction. Memory is capped at `max_entries` keys (oldest evicted).
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=100000, clock=time.monotonic):
+        """
+        Args:
+            ttl_seconds: How long an alert absorbs repeats for its key
+            max_entries: Max keys tracked at once
+            clock: Time source (seconds)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self.stats = {'new': 0, 'suppressed': 0, 'evicted': 0}
+
+        self._entries = OrderedDict()  # key -> (alert_id, expires_at), oldest first
+        self._pending_hits = {}  # alert_id -> repeats not yet written
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, user_id, severity):
+        """
+        Check whether an alert is already open for this key
+
+        Counts a hit against the existing alert when there is one.
+
+        Returns:
+            Existing alert_id, or None if a new alert should be written
+        """
+        key = (user_id, severity)
+
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            alert_id = entry[0]
+            self._pending_hits[alert_id] = self._pending_hits.get(alert_id, 0) + 1
+            self.stats['suppressed'] += 1
+            return alert_id
+
+    def register(self, user_id, severity, alert_id):
+        """Remember a newly written alert so repeats are coalesced into it"""
+        key = (user_id, severity)
+
+        with self._lock:
+            now = self.clock()
+            self._entries.pop(key, None)
+            self._entries[key] = (alert_id, now + self.ttl_seconds)
+            self.stats['new'] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def collect_hits(self):
+        """
+        Take the repeat counts accumulated since the last call
+
+        Returns:
+            Dict of alert_id -> number of suppressed repeats
+        """
+        with self._lock:
+            hits = self._pending_hits
+            self._pending_hits = {}
+        return hits
+
+    def restore_hits(self, hits):
+        """Put back hit counts whose write failed"""
+        with self._lock:
+            for alert_id, n in hits.items():
+                self._pending_hits[alert_id] = self._pending_hits.get(alert_id, 0) + n
+
+    def _expire(self, now):
+        """Drop keys whose TTL has passed (entries are in expiry order)"""
+        while self._entries:
+            key, (alert_id, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+            self.stats['evicted'] += 1
@@ -0,0 +1,262 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Background Alert Writer
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+class AlertWriter:
+    """
+    Write alerts to the database in bulk from a background thread
+
+    Callers enqueue alerts and return immediately. A worker thread drains
+    the bounded queue and flushes through AlertManager.create_alerts when
+    `batch_size` alerts are waiting or `flush_interval` seconds have passed.
+    When the queue is full, submit waits up to `put_timeout` (backpressure)
+    and then spills the alert to a JSON-lines file that is replayed once
+    the writer catches up.
+
+    With an AlertOutbox, alerts are written ahead to the durable outbox
+    instead of the in-memory queue, and the worker replays the outbox
+    into the database every `flush_interval` seconds, so nothing is lost
+    while the database is slow or down.
+    """
+
+    def __init__(self, alert_manager, max_queue_size=10000, batch_size=500,
+                 flush_interval=0.5, put_timeout=0.05, spill_path=None,
+                 replay_interval=5.0, outbox=None):
+        """
+        Args:
+            alert_manager: AlertManager used for bulk inserts
+            max_queue_size: Alerts held in memory before backpressure kicks in
+            batch_size: Alerts per bulk insert
+            flush_interval: Max seconds an alert waits before being flushed
+            put_timeout: Seconds submit blocks on a full queue before spilling
+            spill_path: JSON-lines file for overflow and failed writes
+                (None = drop and count them)
+            replay_interval: Min seconds between spill replay attempts
+            outbox: Optional AlertOutbox used as a write-ahead log
+        """
+        self.alert_manager = alert_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spill_path = spill_path
+        self.replay_interval = replay_interval
+        self.outbox = outbox
+
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'spilled': 0,
+            'dropped': 0,
+            'replayed': 0
+        }
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._next_replay = 0.0
+
+    @property
+    def queue_depth(self):
+        """Alerts waiting in memory to be written"""
+        return self._queue.qsize()
+
+    def start(self):
+        """Start the background writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        target = self._run_outbox if self.outbox is not None else self._run
+        self._thread = threading.Thread(target=target, name='alert-writer', daemon=True)
+        self._thread.start()
+        print("✓ Alert writer started")
+
+    def stop(self, timeout=10.0):
+        """
+        Drain the queue and stop the writer
+
+        Args:
+            timeout: Seconds to wait for the final flush
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        # Flush anything still queued (e.g. the thread never started)
+        leftover = self._drain(self._queue.qsize())
+        if leftover:
+            self._flush(leftover)
+        if self.outbox is not None:
+            self._replay_outbox()
+            self.outbox.close()
+        self.alert_manager.flush_suppressed_hits()
+
+        print(f"✓ Alert writer stopped ({self.stats['written']} written, "
+              f"{self.stats['spilled']} spilled, {self.stats['dropped']} dropped)")
+
+    def submit(self, alert):
+        """
+        Queue an alert for writing
+
+        Args:
+            alert: Dict with create_alert's arguments
+                (transaction_id, score, risk_level, priority)
+
+        Returns:
+            True if the alert was accepted (queued or spilled to disk)
+        """
+        self._count('submitted')
+
+        if self.outbox is not None:
+            return self._spill([alert])
+
+        try:
+            self._queue.put(alert, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            return self._spill([alert])
+
+    def submit_many(self, alerts):
+        """
+        Queue several alerts for writing
+
+        Returns:
+            Number of alerts accepted
+        """
+        if self.outbox is not None:
+            self._count('submitted', len(alerts))
+            return len(alerts) if self._spill(alerts) else 0
+
+        return sum(1 for alert in alerts if self.submit(alert))
+
+    def _run(self):
+        """Worker loop - flush by size or time until stopped and drained"""
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                if time.monotonic() >= self._next_replay:
+                    self.replay_spill()
+                    self.alert_manager.flush_suppressed_hits()
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._flush(batch)
+
+    def _run_outbox(self):
+        """Worker loop in write-ahead mode - replay the outbox periodically"""
+        while not self._stop.wait(self.flush_interval):
+            self._replay_outbox()
+            if time.monotonic() >= self._next_replay:
+                self._next_replay = time.monotonic() + self.replay_interval
+                self.alert_manager.flush_suppressed_hits()
+
+    def _replay_outbox(self):
+        written = self.outbox.replay(self.alert_manager, batch_size=self.batch_size)
+        self._count('written', written)
+
+    def _drain(self, n):
+        """Take up to n alerts off the queue without blocking"""
+        items = []
+        for _ in range(n):
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _flush(self, batch):
+        """Bulk insert a batch, spilling it if the database write fails"""
+        alert_ids = self.alert_manager.create_alerts(batch)
+        if alert_ids is None:
+            self._spill(batch)
+        else:
+            self._count('written', len(alert_ids))
+
+    def _spill(self, alerts):
+        """Append alerts to the outbox or spill file"""
+        if self.outbox is None and not self.spill_path:
+            self._count('dropped', len(alerts))
+            return False
+
+        try:
+            if self.outbox is not None:
+                self.outbox.append_many(alerts)
+                return True
+            self._append_spill(alerts)
+            self._count('spilled', len(alerts))
+            return True
+        except Exception as e:
+            print(f"Error spilling alerts: {e}")
+            self._count('dropped', len(alerts))
+            return False
+
+    def _append_spill(self, alerts):
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with open(self.spill_path, 'a') as f:
+                for alert in alerts:
+                    f.write(json.dumps(alert) + '\n')
+
+    def replay_spill(self):
+        """
+        Write spilled alerts back through the database
+
+        Returns:
+            Number of alerts replayed
+        """
+        if not self.spill_path:
+            return 0
+
+        self._next_replay = time.monotonic() + self.replay_interval
+        replay_path = self.spill_path + '.replay'
+        if not os.path.exists(self.spill_path) and not os.path.exists(replay_path):
+            return 0
+
+        # Move the file aside so new spills don't race with the replay
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                os.replace(self.spill_path, replay_path)
+
+        with open(replay_path) as f:
+            alerts = [json.loads(line) for line in f if line.strip()]
+
+        replayed = 0
+        for start in range(0, len(alerts), self.batch_size):
+            chunk = alerts[start:start + self.batch_size]
+            if self.alert_manager.create_alerts(chunk) is None:
+                # Database still unavailable - keep the remainder for later
+                self._append_spill(alerts[start:])
+                break
+            replayed += len(chunk)
+
+        os.remove(replay_path)
+        self._count('replayed', replayed)
+        self._count('written', replayed)
+        return replayed
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
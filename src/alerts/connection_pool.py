@@ -0,0 +1,228 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Database Connection Pool
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PostgreSQL connections
+
+    Connections are reused across calls instead of paying the TCP and
+    auth handshake per query. Idle connections are health-checked before
+    being handed out, and checkout blocks for at most `timeout` seconds
+    when all `max_size` connections are in use.
+    """
+
+    def __init__(self, conn_params, min_size=1, max_size=10, timeout=5.0,
+                 health_check_interval=30.0, connect=None):
+        """
+        Args:
+            conn_params: Keyword arguments for psycopg2.connect
+            min_size: Connections opened up front and kept idle
+            max_size: Hard cap on open connections
+            timeout: Seconds to wait for a free connection before failing
+            health_check_interval: Idle seconds after which a connection is
+                pinged before reuse
+            connect: Connection factory (defaults to psycopg2.connect)
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+
+        self.conn_params = conn_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect or psycopg2.connect
+
+        self._idle = deque()  # (connection, last_used)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        for _ in range(min_size):
+            try:
+                conn = self._connect(**self.conn_params)
+            except Exception as e:
+                print(f"Warning: Could not open pooled connection: {e}")
+                break
+            self._size += 1
+            self._idle.append((conn, time.monotonic()))
+
+    @property
+    def size(self):
+        """Number of open connections (idle + checked out)"""
+        return self._size
+
+    @property
+    def idle_count(self):
+        """Number of idle connections"""
+        return len(self._idle)
+
+    def getconn(self, timeout=None):
+        """
+        Check a connection out of the pool
+
+        Args:
+            timeout: Seconds to wait (defaults to the pool timeout)
+
+        Returns:
+            psycopg2 connection
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolError("connection pool is closed")
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        conn, last_used = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolError(f"timed out after {timeout}s waiting for a connection")
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    return self._connect(**self.conn_params)
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            if self._is_healthy(conn, last_used):
+                return conn
+
+            # Stale connection - drop it and try again
+            self._discard(conn)
+
+    def putconn(self, conn, discard=False):
+        """
+        Return a connection to the pool
+
+        Args:
+            conn: Connection obtained from getconn
+            discard: Close the connection instead of keeping it
+        """
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            keep = not (discard or conn.closed or self._closed)
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+
+        self._discard(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of a `with` block"""
+        conn = self.getconn(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def close(self):
+        """Close idle connections and refuse new checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn, last_used):
+        """Check an idle connection is still usable"""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        """Close a connection and free its slot"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+def get_shared_pool(conn_params):
+    """
+    Get the process-wide pool for a set of connection parameters
+
+    Pool sizing comes from DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE,
+    DB_POOL_TIMEOUT and DB_POOL_HEALTH_CHECK_INTERVAL.
+    """
+    key = tuple(sorted((k, str(v)) for k, v in conn_params.items()))
+
+    with _shared_pools_lock:
+        pool = _shared_pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                conn_params,
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+                health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))
+            )
+            _shared_pools[key] = pool
+
+    return pool
+
+def close_shared_pools():
+    """Close every process-wide pool (call on shutdown)"""
+    with _shared_pools_lock:
+        pools = list(_shared_pools.values())
+        _shared_pools.clear()
+
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,200 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Admission Control and Degraded-Mode Switching
+"""
+
+import asyncio
+import math
+import threading
+import time
+
+from api.metrics import Histogram, LATENCY_BUCKETS
+
+# Request priorities - batch work is deferred and shed before interactive
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+
+class Overloaded(Exception):
+    """Request refused by admission control (maps to HTTP 503)"""
+
+    def __init__(self, reason, retry_after=1):
+        """
+        Args:
+            reason: Why the request was refused
+            retry_after: Seconds the client should wait before retrying
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Decide which scoring requests to run, defer or refuse under load
+
+    Two signals drive it:
+    - in-flight requests per priority (hard caps), and
+    - scoring queue delay: how long work waits for a scoring executor
+      thread, as an exponentially weighted average that decays towards
+      zero while nothing is being scored.
+
+    Batch requests wait up to batch_wait_ms for one of a few batch slots
+    and are refused outright once queue delay passes target_queue_ms;
+    interactive requests are only refused at the overall cap. When queue
+    delay stays above degrade_queue_ms for degrade_after_s, `degraded`
+    turns on (callers switch to cheaper scoring) and stays on until delay
+    has been back under target_queue_ms for recover_after_s.
+
+    acquire/release run on the event loop; record_queue_delay and
+    `degraded` may be called from any thread.
+    """
+
+    def __init__(self, max_in_flight=256, batch_max_in_flight=2, batch_wait_ms=1000,
+                 target_queue_ms=100, degrade_queue_ms=250, degrade_after_s=2.0,
+                 recover_after_s=5.0, decay_s=1.0, enabled=True):
+        """
+        Args:
+            max_in_flight: Requests of any priority admitted at once
+            batch_max_in_flight: Batch requests admitted at once
+            batch_wait_ms: Longest a batch request waits for a slot
+            target_queue_ms: Queue delay above which batch work is shed
+            degrade_queue_ms: Queue delay that (if sustained) triggers degraded mode
+            degrade_after_s: How long delay must stay high before degrading
+            recover_after_s: How long delay must stay under target to recover
+            decay_s: Time constant for the queue delay decaying while idle
+            enabled: False admits everything and never degrades
+        """
+        self.max_in_flight = max_in_flight
+        self.batch_max_in_flight = batch_max_in_flight
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.target_queue = target_queue_ms / 1000.0
+        self.degrade_queue = degrade_queue_ms / 1000.0
+        self.degrade_after = degrade_after_s
+        self.recover_after = recover_after_s
+        self.decay = decay_s
+        self.enabled = enabled
+
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.in_flight = {INTERACTIVE: 0, BATCH: 0}
+        self.rejected = {INTERACTIVE: 0, BATCH: 0}
+        self.degraded_transitions = 0
+
+        self._batch_slots = asyncio.Semaphore(batch_max_in_flight)
+        self._delay = 0.0
+        self._delay_at = time.monotonic()
+        self._degraded = False
+        self._over_since = None
+        self._under_since = None
+        self._lock = threading.Lock()
+
+    async def acquire(self, priority=INTERACTIVE):
+        """
+        Admit one request, waiting for a batch slot if needed
+
+        Every successful acquire must be paired with release(priority).
+
+        Raises:
+            Overloaded: Request refused
+        """
+        if not self.enabled:
+            self.in_flight[priority] += 1
+            return
+
+        if sum(self.in_flight.values()) >= self.max_in_flight:
+            self._reject(priority, "Too many requests in flight")
+
+        if priority == BATCH:
+            if self.queue_delay() > self.target_queue:
+                self._reject(priority, "Scoring queue is backed up - batch work is shed first", 5)
+            try:
+                await asyncio.wait_for(self._batch_slots.acquire(), self.batch_wait)
+            except asyncio.TimeoutError:
+                self._reject(priority, "No batch capacity available", 5)
+
+        self.in_flight[priority] += 1
+
+    def release(self, priority=INTERACTIVE):
+        """Release a request admitted by acquire()"""
+        self.in_flight[priority] -= 1
+        if priority == BATCH and self.enabled:
+            self._batch_slots.release()
+
+    def track(self, fn, *args):
+        """
+        Wrap fn for an executor so its queue delay is recorded when it starts
+
+        Returns:
+            Zero-argument callable running fn(*args)
+        """
+        submitted = time.monotonic()
+
+        def run():
+            self.record_queue_delay(time.monotonic() - submitted)
+            return fn(*args)
+        return run
+
+    def record_queue_delay(self, seconds):
+        """Fold one executor queue wait into the average"""
+        self.queue_wait.observe(seconds)
+        with self._lock:
+            now = time.monotonic()
+            self._delay = 0.8 * self._decayed(now) + 0.2 * seconds
+            self._delay_at = now
+            self._update_mode(now)
+
+    def queue_delay(self):
+        """Current (decayed) average scoring queue delay in seconds"""
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+    @property
+    def degraded(self):
+        """True while scoring should use the cheaper degraded mode"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._update_mode(time.monotonic())
+            return self._degraded
+
+    def stats(self):
+        """In-flight and refused counts, queue delay and mode"""
+        return {
+            'enabled': self.enabled,
+            'degraded': self.degraded,
+            'queue_delay_seconds': self.queue_delay(),
+            'in_flight': dict(self.in_flight),
+            'rejected': dict(self.rejected),
+            'degraded_transitions': self.degraded_transitions
+        }
+
+    def _reject(self, priority, reason, retry_after=1):
+        self.rejected[priority] += 1
+        raise Overloaded(reason, retry_after)
+
+    def _decayed(self, now):
+        """Average delay decayed for the time since the last sample (lock held)"""
+        return self._delay * math.exp(-(now - self._delay_at) / self.decay)
+
+    def _update_mode(self, now):
+        """Enter or leave degraded mode once a condition has held long enough (lock held)"""
+        delay = self._decayed(now)
+        self._over_since = (self._over_since or now) if delay > self.degrade_queue else None
+        if delay > self.target_queue:
+            self._under_since = None
+        elif self._under_since is None:
+            # Nothing may have looked while the delay decayed - date the
+            # recovery from when it actually fell under target
+            crossed = self._delay_at
+            if self._delay > self.target_queue > 0:
+                crossed += self.decay * math.log(self._delay / self.target_queue)
+            self._under_since = min(crossed, now)
+
+        if not self._degraded and self._over_since is not None \
+                and now - self._over_since >= self.degrade_after:
+            self._degraded = True
+            self.degraded_transitions += 1
+            print(f"⚠ Entering degraded scoring mode (queue delay {delay * 1000:.0f} ms)")
+        elif self._degraded and self._under_since is not None \
+                and now - self._under_since >= self.recover_after:
+            self._degraded = False
+            self.degraded_transitions += 1
+            print("✓ Leaving degraded scoring mode")
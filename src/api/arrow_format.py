@@ -0,0 +1,79 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Arrow IPC Encoding for Batch Scoring
+"""
+
+# Optional and imported on first use - the Arrow endpoint reports 501 without it
+pa = None
+
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+
+REQUIRED_COLUMNS = ['transaction_id', 'user_id', 'amount', 'merchant_category',
+                    'location_city', 'device_type']
+
+RESULT_COLUMNS = ['transaction_id', 'anomaly_score', 'risk_level', 'priority', 'is_anomaly']
+
+def is_available():
+    """True if pyarrow can be imported (imports it on the first call)"""
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+        except ImportError:
+            return False
+        pa = pyarrow
+    return True
+
+def decode_batch(body):
+    """
+    Decode an Arrow IPC stream of transactions into a DataFrame
+
+    The request bytes are wrapped, not copied, and numeric columns are
+    handed to pandas without per-row conversion. `timestamp` is optional
+    and may be an Arrow timestamp or ISO strings.
+
+    Args:
+        body: Raw request bytes (Arrow IPC stream format)
+
+    Returns:
+        DataFrame with the transaction columns
+
+    Raises:
+        ValueError: Payload isn't a readable Arrow stream or lacks columns
+    """
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {e}")
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    columns = REQUIRED_COLUMNS + (['timestamp'] if 'timestamp' in table.column_names else [])
+    return table.select(columns).to_pandas(split_blocks=True)
+
+def encode_results(df_scored, summary):
+    """
+    Encode scored rows as an Arrow IPC stream
+
+    Args:
+        df_scored: Scored DataFrame in request order
+        summary: Batch totals, stored as schema metadata
+
+    Returns:
+        IPC stream bytes
+    """
+    table = pa.table({
+        'transaction_id': pa.array(df_scored['transaction_id'], type=pa.string()),
+        'anomaly_score': pa.array(df_scored['anomaly_score'].to_numpy(dtype='float64')),
+        'risk_level': pa.array(df_scored['risk_level'], type=pa.string()),
+        'priority': pa.array(df_scored['priority'].to_numpy(dtype='int8')),
+        'is_anomaly': pa.array(df_scored['is_anomaly'].to_numpy(dtype=bool))
+    })
+    table = table.replace_schema_metadata({key: str(value) for key, value in summary.items()})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,160 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Dynamic Micro-Batching for Single-Transaction Requests
+"""
+
+import asyncio
+import time
+
+from api.metrics import Histogram, LATENCY_BUCKETS, BATCH_SIZE_BUCKETS
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item requests into one scoring call
+
+    Callers await submit(item). The first waiting item opens a batch that
+    closes when `max_batch_size` items have arrived or `max_wait_ms` has
+    passed, whichever comes first. The batch is scored with one call to
+    `batch_fn` on `executor` and each caller gets its own result back, so
+    feature engineering and model overhead are paid per batch instead of
+    per transaction. Several batches can be scoring at once (bounded by
+    the executor).
+    """
+
+    def __init__(self, batch_fn, executor=None, max_batch_size=64, max_wait_ms=5.0, runner=None):
+        """
+        Args:
+            batch_fn: Callable taking a list of items and returning a list
+                of results in the same order (runs on the executor)
+            executor: concurrent.futures executor (None = loop default)
+            max_batch_size: Max items scored together
+            max_wait_ms: Max time the first item in a batch waits for company
+            runner: Coroutine function runner(fn, *args) used instead of
+                the executor to run batch_fn (e.g. to add instrumentation)
+        """
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.runner = runner
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.latency = Histogram(LATENCY_BUCKETS)
+
+        self._queue = None
+        self._task = None
+        self._inflight = set()
+
+    async def start(self):
+        """Start the collector task on the running event loop"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._collect())
+        print(f"✓ Micro-batcher started (max {self.max_batch_size} items / "
+              f"{self.max_wait * 1000:.1f} ms)")
+
+    async def stop(self):
+        """Stop collecting and wait for batches already being scored"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Anything still queued never made it into a batch
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def submit(self, item):
+        """
+        Score one item as part of the next batch
+
+        Returns:
+            This item's result from batch_fn
+
+        Raises:
+            Whatever batch_fn raised for the batch the item was in
+        """
+        if self._task is None:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        start = time.perf_counter()
+        await self._queue.put((item, future, start))
+        try:
+            return await future
+        finally:
+            self.latency.observe(time.perf_counter() - start)
+
+    def stats(self):
+        """Batch size, queue wait and end-to-end latency summaries"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'batches_in_flight': len(self._inflight),
+            'batch_size': self.batch_sizes.summary(),
+            'queue_wait_seconds': self.queue_wait.summary(),
+            'latency_seconds': self.latency.summary()
+        }
+
+    async def _collect(self):
+        """Form batches from the queue and hand each one off for scoring"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already waiting without yielding per item
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                if len(batch) >= self.max_batch_size:
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            task = loop.create_task(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch):
+        """Score one batch and resolve each caller's future"""
+        now = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, start in batch:
+            self.queue_wait.observe(now - start)
+
+        items = [item for item, _, _ in batch]
+        try:
+            if self.runner is not None:
+                results = await self.runner(self.batch_fn, items)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.batch_fn, items
+                )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # The caller may have gone away (client disconnect / timeout)
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,38 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Deferred Module Imports
+"""
+
+import importlib.util
+import sys
+
+def lazy_import(name):
+    """
+    Import a module that only executes on first attribute access
+
+    Lets a module bind names like `pd` at import time without paying for
+    the library until something actually uses it. A module that is
+    already imported is returned as is.
+
+    Args:
+        name: Absolute module name (e.g. 'pandas')
+
+    Returns:
+        Module (possibly not yet executed)
+
+    Raises:
+        ImportError: Module can't be found
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -3,20 +3,42 @@ STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
 FastAPI Application for Anomaly Detection
 """
 
-from fastapi import FastAPI, HTTPException
+import time
+_import_start = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse, ORJSONResponse, JSONResponse
+from starlette.requests import ClientDisconnect
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
 import sys
-sys.path.append('..')
-
-from models.isolation_forest_detector import IsolationForestDetector
-from scoring.anomaly_scorer import AnomalyScorer
-from alerts.alert_manager import AlertManager
-import joblib
-import numpy as np
-import pandas as pd
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(API_DIR, '..'))
+
+from api.batcher import MicroBatcher
+from api.admission import AdmissionController, Overloaded, INTERACTIVE, BATCH
+from api.result_cache import ResultCache, payload_hash
+from models.model_registry import ModelRegistry, UNVERSIONED
+from api.metrics import (MetricsRegistry, RequestTimingMiddleware, PROMETHEUS_CONTENT_TYPE,
+                         STAGE_BUCKETS, ROW_COUNT_BUCKETS)
+from api import arrow_format
+from api.streaming_response import DuplexStreamingResponse, iter_line_chunks
+from api.lazy_imports import lazy_import
+import json
+import orjson
+import threading
 from datetime import datetime
 
+# Heavy libraries execute on first use, so importing this module stays
+# cheap; sklearn, joblib and psycopg2 are imported where they're needed
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
 # Initialize FastAPI
 app = FastAPI(
     title="Anomaly Detection API",
@@ -24,18 +46,373 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Load models on startup
-try:
-    if_detector = IsolationForestDetector()
-    if_detector.load('../../models/isolation_forest.pkl')
-    feature_engineer = joblib.load('../../models/feature_engineer.pkl')
-    scorer = AnomalyScorer()
-    alert_manager = AlertManager()
-    print("✓ Models loaded successfully")
-except Exception as e:
-    print(f"Warning: Could not load models: {e}")
-    if_detector = None
-    feature_engineer = None
+# MODEL_PATH may be absolute or relative to the project root (not the cwd)
+PROJECT_ROOT = os.path.abspath(os.path.join(API_DIR, '..', '..'))
+MODEL_DIR = os.path.join(PROJECT_ROOT, os.getenv('MODEL_PATH', 'models'))
+
+# Serves the version named by MODEL_DIR/CURRENT, or the flat *.pkl files
+# before anything has been published
+model_registry = ModelRegistry(MODEL_DIR)
+
+# LAZY_STARTUP=true: the process answers /health/live straight away and
+# loads models in the background; /health/ready flips once it can score.
+# Default is to load at import, which scripts/serve.py relies on to share
+# models copy-on-write across forked workers.
+LAZY_STARTUP = os.getenv('LAZY_STARTUP', 'False').lower() == 'true'
+
+# Seconds spent per startup phase (see scripts/profile_startup.py)
+startup_timings = {}
+
+class ModelSet:
+    """
+    One loaded model version - everything scoring needs, swapped as a unit
+    
+    Scoring reads `active_models` once per batch and uses only that
+    object, so a hot swap never mixes versions within a batch and batches
+    already running finish on the version they started with.
+    """
+    
+    def __init__(self, version, detector, feature_engineer, degraded_detector, cascade_detector=None):
+        """
+        Args:
+            version: Registry version name
+            detector: IsolationForestDetector
+            feature_engineer: Fitted FeatureEngineer
+            degraded_detector: Reduced tree set used while overloaded
+            cascade_detector: CascadeDetector (SCORING_MODEL=cascade) or None
+        """
+        self.version = version
+        self.detector = detector
+        self.feature_engineer = feature_engineer
+        self.degraded_detector = degraded_detector
+        self.cascade_detector = cascade_detector
+        self.loaded_at = datetime.now().isoformat()
+    
+    @property
+    def scoring_detector(self):
+        """Detector for normal (not degraded) scoring"""
+        return self.cascade_detector or self.detector
+
+active_models = None
+scorer = None  # kept across model swaps - thresholds aren't tied to a version
+# Running per-user history for /detect, so a coalesced request's user
+# features don't depend on which other requests share its micro-batch
+user_state = None
+
+# Database connections, the writer thread and outbox files belong to one
+# process, so they are created at startup (after any fork), not at import
+alert_manager = None
+alert_writer = None
+
+# True once models are loaded and the alert pipeline is running
+ready = False
+
+def load_model_set(version=None):
+    """
+    Load a model version from the registry without touching the live one
+    
+    Args:
+        version: Registry version (default: the one CURRENT names)
+    
+    Returns:
+        ModelSet
+    
+    Raises:
+        KeyError: Unknown version
+        ValueError: Artifacts don't match the version's manifest
+    """
+    import joblib
+    from models.isolation_forest_detector import IsolationForestDetector
+    from models.lof_detector import LOFDetector
+    from models.cascade_detector import CascadeDetector
+    
+    version, directory = model_registry.resolve(version)
+    if version != UNVERSIONED:
+        model_registry.verify(version)
+    
+    detector = IsolationForestDetector()
+    detector.load(os.path.join(directory, 'isolation_forest.pkl'))
+    # Concurrency comes from the scoring executor; joblib fan-out per call
+    # would oversubscribe the cores and costs more than it saves on small batches
+    detector.model.set_params(n_jobs=int(os.getenv('MODEL_N_JOBS', '1')))
+    feature_engineer = joblib.load(os.path.join(directory, 'feature_engineer.pkl'))
+    
+    cascade_detector = None
+    if os.getenv('SCORING_MODEL', 'isolation_forest').lower() == 'cascade':
+        lof = LOFDetector()
+        lof.load(os.path.join(directory, 'lof.pkl'))
+        lof.model.set_params(n_jobs=int(os.getenv('MODEL_N_JOBS', '1')))
+        cascade_detector = CascadeDetector(detector, lof, band=float(os.getenv('CASCADE_BAND', '0.03')))
+    
+    return ModelSet(
+        version, detector, feature_engineer,
+        degraded_detector=detector.reduced(int(os.getenv('DEGRADED_N_ESTIMATORS', '25'))),
+        cascade_detector=cascade_detector
+    )
+
+def load_models():
+    """
+    Import the ML stack and load the active model version
+    
+    Returns:
+        True if the models loaded
+    """
+    global active_models, scorer, user_state
+    
+    try:
+        start = time.perf_counter()
+        import joblib
+        from models.isolation_forest_detector import IsolationForestDetector
+        from models.lof_detector import LOFDetector
+        from models.cascade_detector import CascadeDetector
+        from scoring.anomaly_scorer import AnomalyScorer
+        from scoring.quantile_estimator import AdaptiveThresholds
+        from streaming.user_state import UserFeatureState
+        startup_timings['ml_imports'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        model_set = load_model_set()
+        adaptive = os.getenv('ADAPTIVE_THRESHOLDS', 'False').lower() == 'true'
+        scorer = AnomalyScorer(adaptive_thresholds=AdaptiveThresholds() if adaptive else None)
+        user_state = UserFeatureState(max_users=int(os.getenv('DETECT_MAX_USERS', '1000000')))
+        active_models = model_set
+        startup_timings['model_load'] = time.perf_counter() - start
+        
+        print(f"✓ Models loaded successfully (version {model_set.version})")
+        return True
+    except Exception as e:
+        print(f"Warning: Could not load models: {e}")
+        return False
+
+def warm_up(model_set=None):
+    """
+    Score one synthetic row so lazy imports and first-call caches are paid up front
+    
+    Args:
+        model_set: ModelSet to warm (default: the active one, timed as a startup phase)
+    """
+    timed = model_set is None
+    model_set = model_set or active_models
+    if model_set is None:
+        return
+    
+    start = time.perf_counter()
+    df = pd.DataFrame([{
+        'transaction_id': 'warmup', 'user_id': 'warmup', 'amount': 1.0,
+        'merchant_category': 'grocery', 'location_city': 'Mumbai',
+        'device_type': 'mobile', 'timestamp': pd.Timestamp.now(), 'is_fraud': 0
+    }])
+    features = model_set.feature_engineer.create_features(df)
+    X = model_set.feature_engineer.get_feature_matrix(features)
+    model_set.scoring_detector.predict_with_proba(X)
+    model_set.degraded_detector.predict_with_proba(X)
+    if timed:
+        startup_timings['warm_up'] = time.perf_counter() - start
+
+# One reload at a time, whether from the endpoint or the registry watcher
+_reload_lock = threading.Lock()
+model_reloads = {'succeeded': 0, 'failed': 0}
+last_reload = None
+
+def reload_models(version=None):
+    """
+    Hot-swap to another model version (blocking - run off the event loop)
+    
+    The new version is loaded, checked against its manifest and warmed
+    up while the old one keeps serving; the swap itself is a single
+    reference assignment between batches.
+    
+    Args:
+        version: Registry version (default: the one CURRENT names)
+    
+    Returns:
+        Dict with previous and new version and seconds taken
+    
+    Raises:
+        RuntimeError: Another reload is in progress
+        KeyError: Unknown version
+        ValueError: Artifacts don't match the version's manifest
+    """
+    global active_models, last_reload
+    
+    if not _reload_lock.acquire(blocking=False):
+        raise RuntimeError("A model reload is already in progress")
+    try:
+        start = time.perf_counter()
+        model_set = load_model_set(version)
+        warm_up(model_set)
+        
+        previous = active_models
+        active_models = model_set
+        
+        last_reload = {
+            'previous_version': previous.version if previous is not None else None,
+            'version': model_set.version,
+            'seconds': time.perf_counter() - start,
+            'completed_at': datetime.now().isoformat()
+        }
+        model_reloads['succeeded'] += 1
+        print(f"✓ Model version {last_reload['previous_version']} -> {model_set.version} "
+              f"({last_reload['seconds']:.2f}s)")
+        return last_reload
+    except Exception:
+        model_reloads['failed'] += 1
+        raise
+    finally:
+        _reload_lock.release()
+
+def create_alert_pipeline():
+    """
+    Build this process's AlertManager and background AlertWriter
+    
+    Returns:
+        (alert_manager, alert_writer)
+    """
+    from alerts.alert_manager import AlertManager
+    from alerts.alert_writer import AlertWriter
+    from alerts.alert_outbox import AlertOutbox
+    from alerts.alert_suppressor import AlertSuppressor
+    
+    suppression_ttl = float(os.getenv('ALERT_SUPPRESSION_TTL', '300'))
+    manager = AlertManager(
+        suppressor=AlertSuppressor(ttl_seconds=suppression_ttl) if suppression_ttl > 0 else None
+    )
+    outbox_dir = os.getenv('ALERT_OUTBOX_DIR', 'data/alert_outbox')
+    writer = AlertWriter(
+        manager,
+        max_queue_size=int(os.getenv('ALERT_QUEUE_SIZE', '10000')),
+        batch_size=int(os.getenv('ALERT_BATCH_SIZE', '500')),
+        flush_interval=float(os.getenv('ALERT_FLUSH_INTERVAL', '0.5')),
+        spill_path=os.getenv('ALERT_SPILL_PATH', 'logs/alert_spill.jsonl'),
+        outbox=AlertOutbox(outbox_dir) if outbox_dir else None
+    )
+    return manager, writer
+
+def start_alert_pipeline():
+    """Create and start the alert pipeline, then mark the process ready"""
+    global alert_manager, alert_writer, ready
+    
+    start = time.perf_counter()
+    alert_manager, alert_writer = create_alert_pipeline()
+    alert_writer.start()
+    startup_timings['alert_pipeline'] = time.perf_counter() - start
+    
+    ready = active_models is not None
+
+def prepare():
+    """Readiness phase for LAZY_STARTUP - load, warm up, start alerts"""
+    load_models()
+    warm_up()
+    start_alert_pipeline()
+    print(f"✓ Ready ({sum(startup_timings.values()):.2f}s of startup work)")
+
+if not LAZY_STARTUP:
+    load_models()
+
+startup_timings['module_import'] = (time.perf_counter() - _import_start
+                                    - startup_timings.get('ml_imports', 0)
+                                    - startup_timings.get('model_load', 0))
+
+# Dedicated executors: CPU-bound scoring and blocking psycopg2 calls each
+# get their own sized pool, so the event loop only does request I/O and a
+# burst of scoring can't starve database calls (or the other way round)
+SCORING_WORKERS = int(os.getenv('SCORING_WORKERS', str(os.cpu_count() or 1)))
+scoring_executor = ThreadPoolExecutor(
+    max_workers=SCORING_WORKERS,
+    thread_name_prefix='scoring'
+)
+db_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+    thread_name_prefix='db'
+)
+
+# Batch requests are deferred and then shed before /detect is refused, and
+# sustained scoring queue delay switches to the reduced-tree detector
+admission = AdmissionController(
+    max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '256')),
+    batch_max_in_flight=int(os.getenv('ADMISSION_BATCH_MAX_IN_FLIGHT', str(SCORING_WORKERS))),
+    batch_wait_ms=float(os.getenv('ADMISSION_BATCH_WAIT_MS', '1000')),
+    target_queue_ms=float(os.getenv('ADMISSION_TARGET_QUEUE_MS', '100')),
+    degrade_queue_ms=float(os.getenv('ADMISSION_DEGRADE_QUEUE_MS', '250')),
+    degrade_after_s=float(os.getenv('ADMISSION_DEGRADE_AFTER_S', '2')),
+    recover_after_s=float(os.getenv('ADMISSION_RECOVER_AFTER_S', '5')),
+    enabled=os.getenv('ADMISSION_CONTROL', 'True').lower() == 'true'
+)
+
+async def run_scoring(fn, *args):
+    """Run CPU-bound work on the scoring executor (recording its queue delay)"""
+    return await asyncio.get_running_loop().run_in_executor(
+        scoring_executor, admission.track(fn, *args)
+    )
+
+async def run_db(fn, *args):
+    """Run a blocking database call on the DB executor"""
+    return await asyncio.get_running_loop().run_in_executor(db_executor, fn, *args)
+
+_prepare_task = None
+_reload_watcher = None
+
+# Seconds between checks of the registry's CURRENT pointer (0 = reload only via the endpoint)
+MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', '30'))
+
+async def watch_model_registry(interval):
+    """
+    Hot-swap whenever the registry's active version changes
+    
+    Each worker process watches for itself, so activating a version
+    rolls it out to every worker within one interval. A version that
+    failed to load isn't retried until CURRENT changes again.
+    """
+    loop = asyncio.get_running_loop()
+    failed_version = None
+    while True:
+        await asyncio.sleep(interval)
+        current = model_registry.current_version()
+        if current is None or active_models is None or current in (active_models.version, failed_version):
+            continue
+        try:
+            await loop.run_in_executor(None, reload_models, current)
+        except RuntimeError:
+            continue  # a manual reload is running - look again next interval
+        except Exception as e:
+            failed_version = current
+            print(f"✗ Could not hot-swap to model version {current}: {e}")
+
+@app.on_event("startup")
+async def startup():
+    """Start the /detect micro-batcher, the alert pipeline and the model watcher"""
+    global _prepare_task, _reload_watcher
+    await detect_batcher.start()
+    
+    if LAZY_STARTUP:
+        # Serve liveness now; readiness follows once prepare() finishes
+        _prepare_task = asyncio.get_running_loop().run_in_executor(None, prepare)
+    else:
+        start_alert_pipeline()
+    
+    if MODEL_RELOAD_INTERVAL > 0:
+        _reload_watcher = asyncio.create_task(watch_model_registry(MODEL_RELOAD_INTERVAL))
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Finish in-flight batches, flush queued alerts and release pooled connections"""
+    if _reload_watcher is not None:
+        _reload_watcher.cancel()
+    if _prepare_task is not None:
+        await _prepare_task
+    await detect_batcher.stop()
+    if alert_writer is not None:
+        alert_writer.stop()
+    from alerts.connection_pool import close_shared_pools
+    close_shared_pools()
+    scoring_executor.shutdown(wait=True)
+    db_executor.shutdown(wait=True)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request, exc):
+    """Refused by admission control - ask the client to back off"""
+    return JSONResponse({'detail': exc.reason}, status_code=503,
+                        headers={'Retry-After': str(exc.retry_after)})
 
 # Pydantic models for request/response
 class Transaction(BaseModel):
@@ -54,10 +431,58 @@ class AnomalyResponse(BaseModel):
     priority: int
     is_anomaly: bool
     alert_created: bool
+    degraded: bool = False  # scored with the reduced tree set under overload
 
 class BatchRequest(BaseModel):
     transactions: List[Transaction]
 
+class ColumnarBatchRequest(BaseModel):
+    """Batch in column form - one equal-length list per Transaction field"""
+    transaction_id: List[str]
+    user_id: List[str]
+    amount: List[float]
+    merchant_category: List[str]
+    location_city: List[str]
+    device_type: List[str]
+    timestamp: List[str] = None
+
+COLUMNAR_FIELDS = ['transaction_id', 'user_id', 'amount', 'merchant_category',
+                   'location_city', 'device_type']
+
+# Rows scored per /detect/stream chunk (bounds per-request memory)
+STREAM_CHUNK_SIZE = int(os.getenv('DETECT_STREAM_CHUNK_SIZE', '1000'))
+STREAM_MAX_CHUNK_SIZE = 10000
+
+# Prometheus metrics (GET /metrics). Stages are timed once per scored
+# batch - a perf_counter() pair and one histogram update - never per row
+metrics = MetricsRegistry()
+
+STAGES = ['request_parse', 'feature_engineering', 'scaling', 'model_scoring',
+          'risk_scoring', 'alert_write']
+_stage_histograms = metrics.histogram(
+    'anomaly_stage_duration_seconds',
+    "Time spent in each scoring stage, per scored batch",
+    buckets=STAGE_BUCKETS, labels=['stage']
+)
+stage_seconds = {stage: _stage_histograms.labels(stage) for stage in STAGES}
+
+_batch_row_histograms = metrics.histogram(
+    'anomaly_batch_rows',
+    "Transactions per batch request or stream chunk",
+    buckets=ROW_COUNT_BUCKETS, labels=['endpoint']
+)
+batch_rows = {endpoint: _batch_row_histograms.labels(endpoint)
+              for endpoint in ['batch', 'columnar', 'arrow', 'stream']}
+
+app.add_middleware(
+    RequestTimingMiddleware,
+    histograms=metrics.histogram(
+        'anomaly_http_request_duration_seconds',
+        "HTTP request latency by route, including streamed response bodies",
+        labels=['method', 'route', 'status']
+    )
+)
+
 # Endpoints
 
 @app.get("/")
@@ -70,150 +495,638 @@ def root():
         "company": "ZeTheta Algorithms Pvt Ltd"
     }
 
+def require_ready():
+    """Reject scoring requests until models and the alert pipeline are up"""
+    if not ready:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+
+def require_alerts():
+    """Reject alert queries until the alert pipeline exists"""
+    if alert_manager is None:
+        raise HTTPException(status_code=503, detail="Alert pipeline not started")
+
 @app.get("/health")
 def health_check():
     """Detailed health check"""
     return {
         "status": "healthy",
-        "models_loaded": if_detector is not None,
+        "models_loaded": active_models is not None,
+        "model_version": active_models.version if active_models is not None else None,
+        "ready": ready,
+        "detect_batching": detect_batcher.stats(),
+        "admission": admission.stats(),
+        "result_cache": {**result_cache.stats, 'entries': len(result_cache)} if result_cache is not None else None,
         "timestamp": datetime.now().isoformat()
     }
 
-@app.post("/detect", response_model=AnomalyResponse)
-def detect_anomaly(transaction: Transaction):
+@app.get("/health/live")
+def liveness():
+    """Liveness probe - the process is up and serving HTTP"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """Readiness probe - 503 until models are loaded and alerts can be written"""
+    body = {
+        "status": "ready" if ready else "starting",
+        "startup_timings": startup_timings
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)"""
+    return Response(content=metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+def observe_parse(request):
+    """Record request arrival to handler entry (body read and validation) as request_parse"""
+    start = request.scope.get('state', {}).get('request_start')
+    if start is not None:
+        stage_seconds['request_parse'].observe(time.perf_counter() - start)
+
+def score_frame(df, degraded=False, user_state=None):
     """
-    Detect anomaly in a single transaction
+    Engineer features, run the model and assign risk for raw transactions
+    
+    Args:
+        df: DataFrame of transactions (Transaction fields)
+        degraded: Score with the reduced tree set (cheaper, less precise;
+            skips the cascade's LOF stage too)
+        user_state: UserFeatureState to take user features from (and fold
+            these transactions into); default derives them from df alone
     
-    Returns anomaly score, risk level, and creates alert if needed
+    Returns:
+        (scored DataFrame, model predictions)
     """
-    if if_detector is None or feature_engineer is None:
-        raise HTTPException(status_code=503, detail="Models not loaded")
+    start = time.perf_counter()
+    model_set = active_models  # one version for the whole batch, even if swapped meanwhile
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['is_fraud'] = 0  # Unknown at detection time
     
-    try:
-        # Convert to DataFrame
-        trans_dict = transaction.dict()
-        trans_dict['timestamp'] = trans_dict.get('timestamp') or datetime.now().isoformat()
-        trans_dict['is_fraud'] = 0  # Unknown at detection time
-        
-        df = pd.DataFrame([trans_dict])
-        
-        # Engineer features
-        df_features = feature_engineer.create_features(df)
-        X = feature_engineer.get_feature_matrix(df_features)
-        
-        # Predict
-        prediction = if_detector.predict(X)[0]
-        score = float(if_detector.predict_proba(X)[0])
-        
-        # Score
-        risk_level = scorer.assign_risk_level(score)
-        priority = scorer.assign_priority(risk_level)
-        is_anomaly = score >= scorer.thresholds['MEDIUM']
-        
-        # Create alert if high risk
+    # Engineer features
+    if user_state is not None:
+        df_features = user_state.featurize(df)
+    else:
+        df_features = model_set.feature_engineer.create_features(df)
+    X = model_set.feature_engineer.get_feature_matrix(df_features)
+    engineered = time.perf_counter()
+    
+    # Predict
+    detector = model_set.degraded_detector if degraded else model_set.scoring_detector
+    X_scaled = detector.scale(X)
+    scaled = time.perf_counter()
+    predictions, scores = detector.predict_scaled_with_proba(X_scaled)
+    predicted = time.perf_counter()
+    
+    # Score all transactions
+    df_scored = scorer.score_transactions(df_features, scores)
+    
+    stage_seconds['feature_engineering'].observe(engineered - start)
+    stage_seconds['scaling'].observe(scaled - engineered)
+    stage_seconds['model_scoring'].observe(predicted - scaled)
+    stage_seconds['risk_scoring'].observe(time.perf_counter() - predicted)
+    
+    return df_scored, predictions
+
+def score_transactions_each(transactions):
+    """
+    Score coalesced /detect requests together and queue their alerts
+    (runs on the scoring executor)
+    
+    Each transaction scores as it would alone: user features come from
+    the process-wide user history, not from the other requests in the
+    micro-batch.
+    
+    Args:
+        transactions: List of Transaction
+    
+    Returns:
+        List of AnomalyResponse in the same order
+    """
+    trans_list = [t.dict() for t in transactions]
+    now = datetime.now().isoformat()
+    for t in trans_list:
+        t['timestamp'] = t.get('timestamp') or now
+    
+    degraded = admission.degraded
+    df_scored, _ = score_frame(pd.DataFrame(trans_list), degraded, user_state)
+    
+    responses = []
+    alert_seconds = 0.0
+    for transaction, score, risk_level, priority, is_anomaly in zip(
+        transactions,
+        df_scored['anomaly_score'].to_numpy(dtype=float),
+        df_scored['risk_level'],
+        df_scored['priority'].to_numpy(dtype=int),
+        df_scored['is_anomaly'].to_numpy(dtype=bool)
+    ):
+        # Queue alert if high risk - written in bulk off the request path
         alert_created = False
         if risk_level in ['CRITICAL', 'HIGH']:
-            alert_id = alert_manager.create_alert(
-                transaction_id=transaction.transaction_id,
-                score=score,
-                risk_level=risk_level,
-                priority=priority
-            )
-            alert_created = alert_id is not None
+            submit_start = time.perf_counter()
+            alert_created = alert_writer.submit({
+                'transaction_id': transaction.transaction_id,
+                'score': float(score),
+                'risk_level': risk_level,
+                'priority': int(priority),
+                'user_id': transaction.user_id
+            })
+            alert_seconds += time.perf_counter() - submit_start
         
-        return AnomalyResponse(
+        responses.append(AnomalyResponse(
             transaction_id=transaction.transaction_id,
-            anomaly_score=score,
+            anomaly_score=float(score),
             risk_level=risk_level,
-            priority=priority,
-            is_anomaly=is_anomaly,
-            alert_created=alert_created
+            priority=int(priority),
+            is_anomaly=bool(is_anomaly),
+            alert_created=alert_created,
+            degraded=degraded
+        ))
+    
+    stage_seconds['alert_write'].observe(alert_seconds)
+    return responses
+
+# Concurrent /detect calls are scored together; DETECT_BATCH_MAX_SIZE=1
+# turns coalescing off
+detect_batcher = MicroBatcher(
+    score_transactions_each,
+    runner=run_scoring,
+    max_batch_size=int(os.getenv('DETECT_BATCH_MAX_SIZE', '64')),
+    max_wait_ms=float(os.getenv('DETECT_BATCH_MAX_WAIT_MS', '5'))
+)
+
+metrics.register_histogram(
+    'anomaly_detect_microbatch_size',
+    "Concurrent /detect requests scored together per micro-batch",
+    detect_batcher.batch_sizes
+)
+metrics.register_histogram(
+    'anomaly_detect_microbatch_queue_wait_seconds',
+    "Time a /detect request waits for its micro-batch to start",
+    detect_batcher.queue_wait
+)
+
+metrics.register_histogram(
+    'anomaly_scoring_queue_wait_seconds',
+    "Time scoring work waits for a scoring executor thread",
+    admission.queue_wait
+)
+
+# Scrape-time gauges read state the service already keeps
+metrics.gauge(
+    'anomaly_ready', "1 once models are loaded and alerts can be written",
+    lambda: ready
+)
+metrics.gauge(
+    'anomaly_degraded', "1 while scoring uses the reduced tree set",
+    lambda: admission.degraded
+)
+metrics.gauge(
+    'anomaly_in_flight_requests', "Admitted scoring requests in progress, by priority",
+    lambda: [({'priority': priority}, n) for priority, n in admission.in_flight.items()]
+)
+metrics.counter(
+    'anomaly_admission_rejected_total', "Requests refused by admission control, by priority",
+    lambda: [({'priority': priority}, n) for priority, n in admission.rejected.items()]
+)
+metrics.counter(
+    'anomaly_result_cache_requests_total', "/detect result cache lookups, by outcome",
+    lambda: ([({'result': result}, result_cache.stats[result])
+              for result in ['hits', 'coalesced', 'misses', 'conflicts']]
+             if result_cache is not None else None)
+)
+metrics.gauge(
+    'anomaly_result_cache_hit_rate', "Share of /detect calls answered from the result cache",
+    lambda: result_cache.hit_rate if result_cache is not None else None
+)
+metrics.gauge(
+    'anomaly_result_cache_entries', "Transactions held in the /detect result cache",
+    lambda: len(result_cache) if result_cache is not None else None
+)
+def active_cascade():
+    """Cascade detector of the live model version, if cascade mode is on"""
+    return active_models.cascade_detector if active_models is not None else None
+
+metrics.counter(
+    'anomaly_cascade_rows_total', "Rows scored in cascade mode, by the last stage that ran (resets on model swap)",
+    lambda: ([({'stage': 'isolation_forest'}, cascade.rows_scored - cascade.rows_escalated),
+              ({'stage': 'lof'}, cascade.rows_escalated)]
+             if (cascade := active_cascade()) is not None else None)
+)
+metrics.gauge(
+    'anomaly_cascade_hit_rate', "Share of cascade rows settled by Isolation Forest alone",
+    lambda: cascade.hit_rate if (cascade := active_cascade()) is not None else None
+)
+metrics.gauge(
+    'anomaly_model_version_info', "Live model version (value is always 1)",
+    lambda: [({'version': active_models.version}, 1)] if active_models is not None else None
+)
+metrics.counter(
+    'anomaly_model_reloads_total', "Model hot swaps, by outcome",
+    lambda: [({'result': result}, n) for result, n in model_reloads.items()]
+)
+metrics.gauge(
+    'anomaly_model_last_reload_seconds', "Seconds the last hot swap spent loading and warming up",
+    lambda: last_reload['seconds'] if last_reload is not None else None
+)
+metrics.gauge(
+    'anomaly_model_load_seconds', "Seconds spent loading models at startup",
+    lambda: startup_timings.get('model_load')
+)
+metrics.gauge(
+    'anomaly_startup_phase_seconds', "Seconds spent in each startup phase",
+    lambda: [({'phase': phase}, seconds) for phase, seconds in startup_timings.items()]
+)
+metrics.gauge(
+    'anomaly_alert_queue_depth', "Alerts waiting in memory for the background writer",
+    lambda: alert_writer.queue_depth if alert_writer is not None else None
+)
+metrics.gauge(
+    'anomaly_alert_outbox_pending_segments', "Sealed alert outbox segments not yet replayed",
+    lambda: (len(alert_writer.outbox.pending_segments())
+             if alert_writer is not None and alert_writer.outbox is not None else None)
+)
+metrics.counter(
+    'anomaly_alert_writer_alerts_total', "Alerts handled by the background writer, by outcome",
+    lambda: ([({'outcome': outcome}, n) for outcome, n in dict(alert_writer.stats).items()]
+             if alert_writer is not None else None)
+)
+
+# Retried /detect calls (same transaction_id and payload) get the first
+# response back instead of being rescored and alerted twice.
+# RESULT_CACHE_TTL=0 turns the cache off
+_result_cache_ttl = float(os.getenv('RESULT_CACHE_TTL', '600'))
+result_cache = ResultCache(
+    ttl_seconds=_result_cache_ttl,
+    max_entries=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '100000'))
+) if _result_cache_ttl > 0 else None
+
+def write_batch_alerts(df_scored):
+    """Bulk insert alerts for a scored batch, falling back to the writer"""
+    start = time.perf_counter()
+    alert_records = alert_manager.build_alert_records(df_scored)
+    alert_ids = alert_manager.create_alerts(alert_records)
+    if alert_ids is None:
+        # Database unavailable - hand off to the writer rather than drop them
+        alert_writer.submit_many(alert_records)
+    stage_seconds['alert_write'].observe(time.perf_counter() - start)
+    return len(alert_ids) if alert_ids else 0
+
+def score_batch(transactions):
+    """Score a batch and write its alerts (runs on the scoring executor)"""
+    # Convert to DataFrame
+    df = pd.DataFrame([t.dict() for t in transactions])
+    df['timestamp'] = df['timestamp'].fillna(datetime.now().isoformat())
+    
+    degraded = admission.degraded
+    df_scored, predictions = score_frame(df, degraded)
+    alerts_created = write_batch_alerts(df_scored)
+    
+    # Prepare response from whole columns, in request order
+    df_scored = df_scored.sort_index()
+    results = [
+        {
+            'transaction_id': transaction_id,
+            'anomaly_score': score,
+            'risk_level': risk_level,
+            'priority': priority,
+            'is_anomaly': is_anomaly
+        }
+        for transaction_id, score, risk_level, priority, is_anomaly in zip(
+            df_scored['transaction_id'].tolist(),
+            df_scored['anomaly_score'].astype(float).tolist(),
+            df_scored['risk_level'].tolist(),
+            df_scored['priority'].astype(int).tolist(),
+            df_scored['is_anomaly'].astype(bool).tolist()
         )
+    ]
+    
+    return {
+        'total_transactions': len(df_scored),
+        'anomalies_detected': int((predictions == -1).sum()),
+        'alerts_created': alerts_created,
+        'degraded': degraded,
+        'results': results
+    }
+
+def score_table(df):
+    """
+    Score a batch already in DataFrame form and write its alerts
+    
+    Args:
+        df: Transactions DataFrame (timestamp column optional)
+    
+    Returns:
+        (scored DataFrame in input order, batch totals dict)
+    """
+    if 'timestamp' not in df.columns:
+        df['timestamp'] = datetime.now().isoformat()
+    
+    degraded = admission.degraded
+    df_scored, predictions = score_frame(df, degraded)
+    alerts_created = write_batch_alerts(df_scored)
+    
+    summary = {
+        'total_transactions': len(df_scored),
+        'anomalies_detected': int((predictions == -1).sum()),
+        'alerts_created': alerts_created,
+        'degraded': degraded
+    }
+    return df_scored.sort_index(), summary
+
+def columnar_results(df_scored):
+    """Result arrays for a JSON columnar response"""
+    # Numeric columns go out as numpy arrays - orjson encodes them natively
+    return {
+        'transaction_id': df_scored['transaction_id'].tolist(),
+        'anomaly_score': df_scored['anomaly_score'].to_numpy(dtype=np.float64),
+        'risk_level': df_scored['risk_level'].tolist(),
+        'priority': df_scored['priority'].to_numpy(dtype=np.int64),
+        'is_anomaly': df_scored['is_anomaly'].to_numpy(dtype=bool)
+    }
+
+def score_columns(request):
+    """
+    Score a columnar batch and write its alerts (runs on the scoring executor)
+    
+    Args:
+        request: ColumnarBatchRequest
+    
+    Returns:
+        Response dict with one array per result field, in request order
+    """
+    columns = {field: getattr(request, field) for field in COLUMNAR_FIELDS}
+    if request.timestamp is not None:
+        columns['timestamp'] = request.timestamp
+    
+    df_scored, summary = score_table(pd.DataFrame(columns))
+    return {**summary, 'results': columnar_results(df_scored)}
+
+def score_arrow(df, arrow_response):
+    """
+    Score a decoded Arrow batch and write its alerts (runs on the scoring executor)
+    
+    Args:
+        df: DataFrame from arrow_format.decode_batch
+        arrow_response: Encode results as Arrow instead of a JSON dict
+    
+    Returns:
+        Arrow IPC bytes, or a columnar response dict
+    """
+    df_scored, summary = score_table(df)
+    
+    if arrow_response:
+        return arrow_format.encode_results(df_scored, summary)
+    return {**summary, 'results': columnar_results(df_scored)}
+
+def score_ndjson_chunk(lines, first_line):
+    """
+    Score one chunk of an NDJSON stream (runs on the scoring executor)
+    
+    Lines that aren't valid transactions become error records instead of
+    failing the stream.
+    
+    Args:
+        lines: Raw JSON lines (bytes)
+        first_line: 1-based line number of lines[0] in the stream
+    
+    Returns:
+        NDJSON bytes - one result or error object per input line
+    """
+    start = time.perf_counter()
+    records = []
+    line_numbers = []
+    output = {}  # line number -> result or error, emitted in input order
+    
+    for line_number, line in enumerate(lines, start=first_line):
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            output[line_number] = {'line': line_number, 'error': 'Invalid JSON'}
+            continue
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Detection error: {str(e)}")
+        missing = [field for field in COLUMNAR_FIELDS if not isinstance(record, dict) or field not in record]
+        if missing:
+            output[line_number] = {'line': line_number, 'error': f"Missing fields: {missing}"}
+            continue
+        
+        records.append(record)
+        line_numbers.append(line_number)
+    
+    if records:
+        df = pd.DataFrame(records, columns=COLUMNAR_FIELDS + ['timestamp'])
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+        df['timestamp'] = df['timestamp'].fillna(datetime.now().isoformat())
+        
+        line_numbers = np.asarray(line_numbers)
+        invalid = df['amount'].isna().to_numpy()
+        for line_number in line_numbers[invalid]:
+            output[int(line_number)] = {'line': int(line_number), 'error': 'Invalid amount'}
+        stage_seconds['request_parse'].observe(time.perf_counter() - start)
+        
+        if not invalid.all():
+            df_scored, summary = score_table(df[~invalid])
+            results = columnar_results(df_scored)
+            for line_number, transaction_id, score, risk_level, priority, is_anomaly in zip(
+                line_numbers[~invalid].tolist(),
+                *[results[column] for column in arrow_format.RESULT_COLUMNS]
+            ):
+                output[line_number] = {
+                    'transaction_id': transaction_id,
+                    'anomaly_score': float(score),
+                    'risk_level': risk_level,
+                    'priority': int(priority),
+                    'is_anomaly': bool(is_anomaly)
+                }
+                if summary['degraded']:
+                    output[line_number]['degraded'] = True
+    
+    return b''.join(orjson.dumps(output[line_number]) + b'\n' for line_number in sorted(output))
+
+@app.post("/detect", response_model=AnomalyResponse)
+async def detect_anomaly(transaction: Transaction, request: Request):
+    """
+    Detect anomaly in a single transaction
+    
+    Returns anomaly score, risk level, and queues an alert if needed
+    (alert_created means the alert was accepted by the background writer).
+    Concurrent calls are micro-batched and scored together. A retry with
+    the same transaction_id and payload returns the original response.
+    """
+    observe_parse(request)
+    require_ready()
+    
+    async def score():
+        await admission.acquire(INTERACTIVE)
+        try:
+            return await detect_batcher.submit(transaction)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Detection error: {str(e)}")
+        finally:
+            admission.release(INTERACTIVE)
+    
+    if result_cache is None:
+        return await score()
+    return await result_cache.fetch(transaction.transaction_id, payload_hash(transaction.dict()), score)
 
 @app.post("/detect/batch")
-def detect_batch(request: BatchRequest):
+async def detect_batch(request: BatchRequest, http_request: Request):
     """
     Detect anomalies in batch of transactions
     
     More efficient for processing multiple transactions at once
     """
-    if if_detector is None or feature_engineer is None:
-        raise HTTPException(status_code=503, detail="Models not loaded")
+    observe_parse(http_request)
+    require_ready()
+    batch_rows['batch'].observe(len(request.transactions))
+    await admission.acquire(BATCH)
     
     try:
-        # Convert to DataFrame
-        trans_list = [t.dict() for t in request.transactions]
-        for t in trans_list:
-            t['timestamp'] = t.get('timestamp') or datetime.now().isoformat()
-            t['is_fraud'] = 0
-        
-        df = pd.DataFrame(trans_list)
-        
-        # Engineer features
-        df_features = feature_engineer.create_features(df)
-        X = feature_engineer.get_feature_matrix(df_features)
-        
-        # Predict
-        predictions = if_detector.predict(X)
-        scores = if_detector.predict_proba(X)
-        
-        # Score all transactions
-        df_scored = scorer.score_transactions(df_features, scores)
-        
-        # Create alerts for high-risk transactions
-        alerts_created = 0
-        for idx, row in df_scored.iterrows():
-            if row['risk_level'] in ['CRITICAL', 'HIGH']:
-                alert_id = alert_manager.create_alert(
-                    transaction_id=row['transaction_id'],
-                    score=row['anomaly_score'],
-                    risk_level=row['risk_level'],
-                    priority=row['priority']
-                )
-                if alert_id:
-                    alerts_created += 1
-        
-        # Prepare response
-        results = []
-        for idx, row in df_scored.iterrows():
-            results.append({
-                'transaction_id': row['transaction_id'],
-                'anomaly_score': float(row['anomaly_score']),
-                'risk_level': row['risk_level'],
-                'priority': int(row['priority']),
-                'is_anomaly': bool(row['is_anomaly'])
-            })
-        
-        return {
-            'total_transactions': len(df),
-            'anomalies_detected': int((predictions == -1).sum()),
-            'alerts_created': alerts_created,
-            'results': results
-        }
-        
+        return ORJSONResponse(await run_scoring(score_batch, request.transactions))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch detection error: {str(e)}")
+    finally:
+        admission.release(BATCH)
+
+@app.post("/detect/batch/columnar")
+async def detect_batch_columnar(request: ColumnarBatchRequest, http_request: Request):
+    """
+    Detect anomalies in a batch sent as columns
+    
+    Same scoring as /detect/batch without per-row objects on the way in or
+    out: the body has one list per field and results come back the same
+    way, in request order. Much cheaper for batches in the thousands.
+    """
+    observe_parse(http_request)
+    require_ready()
+    
+    fields = COLUMNAR_FIELDS + (['timestamp'] if request.timestamp is not None else [])
+    lengths = {field: len(getattr(request, field)) for field in fields}
+    if len(set(lengths.values())) > 1:
+        raise HTTPException(status_code=422, detail=f"Columns must all have the same length: {lengths}")
+    batch_rows['columnar'].observe(lengths['transaction_id'])
+    await admission.acquire(BATCH)
+    
+    try:
+        return ORJSONResponse(await run_scoring(score_columns, request))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch detection error: {str(e)}")
+    finally:
+        admission.release(BATCH)
+
+@app.post("/detect/batch/arrow")
+async def detect_batch_arrow(request: Request):
+    """
+    Detect anomalies in a batch sent as an Arrow IPC stream
+    
+    The body is an Arrow IPC stream (application/vnd.apache.arrow.stream)
+    with the Transaction columns. Results come back as an Arrow stream
+    when the Accept header asks for one (batch totals in the schema
+    metadata), otherwise as the /detect/batch/columnar JSON shape.
+    """
+    if not arrow_format.is_available():
+        raise HTTPException(status_code=501, detail="pyarrow is not installed")
+    require_ready()
+    await admission.acquire(BATCH)
+    
+    try:
+        body = await request.body()
+        arrow_response = arrow_format.ARROW_STREAM_TYPE in request.headers.get('accept', '')
+        
+        try:
+            df = await run_scoring(arrow_format.decode_batch, body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        observe_parse(request)
+        batch_rows['arrow'].observe(len(df))
+        
+        try:
+            result = await run_scoring(score_arrow, df, arrow_response)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Batch detection error: {str(e)}")
+    finally:
+        admission.release(BATCH)
+    
+    if arrow_response:
+        return Response(content=result, media_type=arrow_format.ARROW_STREAM_TYPE)
+    return ORJSONResponse(result)
+
+@app.post("/detect/stream")
+async def detect_stream(request: Request, chunk_size: int = None):
+    """
+    Score newline-delimited transactions as they arrive
+    
+    The body is NDJSON, one Transaction object per line, of any length.
+    Lines are read incrementally and scored `chunk_size` at a time, and
+    each chunk's results are streamed back as NDJSON before the next
+    chunk is read, so server memory stays bounded by the chunk size.
+    Malformed lines produce {"line": n, "error": ...} records in place of
+    a result. Clients with very large inputs should read the response
+    while still sending. The stream holds one batch admission slot until
+    it ends.
+    """
+    require_ready()
+    
+    chunk_size = max(1, min(chunk_size or STREAM_CHUNK_SIZE, STREAM_MAX_CHUNK_SIZE))
+    
+    async def generate():
+        line_number = 1
+        try:
+            async for lines in iter_line_chunks(request.stream(), chunk_size=chunk_size):
+                batch_rows['stream'].observe(len(lines))
+                yield await run_scoring(score_ndjson_chunk, lines, line_number)
+                line_number += len(lines)
+        except ClientDisconnect:
+            return
+        except Exception as e:
+            # Headers are already sent - report the failure in-band and stop
+            yield orjson.dumps({'line': line_number, 'error': f"Stream aborted: {e}"}) + b'\n'
+    
+    await admission.acquire(BATCH)
+    return DuplexStreamingResponse(generate(), media_type='application/x-ndjson',
+                                   background=BackgroundTask(admission.release, BATCH))
 
 @app.get("/alerts")
-def get_alerts(limit: int = 100):
-    """Get open alerts"""
+async def get_alerts(limit: int = 100, after: str = None):
+    """
+    Get open alerts, one page at a time
+    
+    Pass the returned next_cursor as `after` to fetch the following page.
+    """
+    require_alerts()
+    try:
+        cursor = alert_manager.decode_cursor(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        alerts_df = alert_manager.get_open_alerts(limit=limit)
+        alerts_df, next_cursor = await run_db(alert_manager.get_open_alerts_page, limit, cursor)
         return {
             'count': len(alerts_df),
-            'alerts': alerts_df.to_dict('records')
+            'alerts': alerts_df.to_dict('records'),
+            'next_cursor': alert_manager.encode_cursor(next_cursor)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching alerts: {str(e)}")
 
+@app.get("/alerts/stream")
+def stream_alerts(batch_size: int = 1000):
+    """Stream all open alerts as newline-delimited JSON"""
+    require_alerts()
+    
+    def generate():
+        for alert in alert_manager.iter_open_alerts(batch_size=batch_size):
+            yield json.dumps(alert, default=str) + '\n'
+    
+    return StreamingResponse(generate(), media_type='application/x-ndjson')
+
 @app.get("/alerts/statistics")
-def get_alert_statistics():
+async def get_alert_statistics():
     """Get alert statistics"""
+    require_alerts()
     try:
-        stats_df = alert_manager.get_alert_statistics()
+        stats_df = await run_db(alert_manager.get_alert_statistics)
         return {
             'statistics': stats_df.to_dict('records')
         }
@@ -221,15 +1134,11 @@ def get_alert_statistics():
         raise HTTPException(status_code=500, detail=f"Error fetching statistics: {str(e)}")
 
 @app.put("/alerts/{alert_id}")
-def update_alert(alert_id: int, status: str, resolution: str = None, notes: str = None):
+async def update_alert(alert_id: int, status: str, resolution: str = None, notes: str = None):
     """Update alert status"""
+    require_alerts()
     try:
-        alert_manager.update_alert_status(
-            alert_id=alert_id,
-            status=status,
-            resolution=resolution,
-            notes=notes
-        )
+        await run_db(alert_manager.update_alert_status, alert_id, status, resolution, notes)
         return {
             'alert_id': alert_id,
             'status': status,
@@ -241,16 +1150,56 @@ def update_alert(alert_id: int, status: str, resolution: str = None, notes: str
 @app.get("/models/info")
 def model_info():
     """Get model information"""
-    if if_detector is None:
+    model_set = active_models
+    if model_set is None:
         raise HTTPException(status_code=503, detail="Models not loaded")
     
+    detector = model_set.detector
     return {
+        'version': model_set.version,
+        'loaded_at': model_set.loaded_at,
+        'registry_current': model_registry.current_version(),
+        'last_reload': last_reload,
         'isolation_forest': {
-            'contamination': if_detector.contamination,
-            'n_estimators': if_detector.n_estimators,
-            'is_fitted': if_detector.is_fitted
+            'contamination': detector.contamination,
+            'n_estimators': detector.n_estimators,
+            'degraded_n_estimators': model_set.degraded_detector.n_estimators,
+            'is_fitted': detector.is_fitted
         },
-        'features': feature_engineer.get_feature_names() if feature_engineer else []
+        'scoring_model': 'cascade' if model_set.cascade_detector is not None else 'isolation_forest',
+        'cascade': model_set.cascade_detector.stats() if model_set.cascade_detector is not None else None,
+        'features': model_set.feature_engineer.get_feature_names()
+    }
+
+@app.get("/models/versions")
+def model_versions():
+    """List published model versions (oldest first) and the live one"""
+    return {
+        'live': active_models.version if active_models is not None else None,
+        'current': model_registry.current_version(),
+        'versions': model_registry.list_versions()
     }
 
+@app.post("/models/reload")
+async def reload_model(version: str = None):
+    """
+    Hot-swap to a published model version without a restart
+    
+    Defaults to the version MODEL_PATH/CURRENT names. The new version is
+    loaded and warmed up in the background while the current one keeps
+    serving, then swapped in between batches. Batches already scoring
+    finish on the old version. Only this process is affected - with
+    several workers, activate the version in the registry and let each
+    worker's watcher (MODEL_RELOAD_INTERVAL) pick it up.
+    """
+    require_ready()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, reload_models, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+
 # Run with: uvicorn main:app --reload --host 0.0.0.0 --port 8000
@@ -0,0 +1,315 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+In-Process Serving Metrics
+"""
+
+import bisect
+import math
+import threading
+import time
+
+# Seconds - from sub-millisecond scoring up to multi-second queueing
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Seconds - individual pipeline stages (scaling a small batch takes microseconds)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005) + LATENCY_BUCKETS
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# Rows per scored batch - single transactions up to bulk uploads
+ROW_COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Histogram:
+    """
+    Fixed-bucket histogram (thread-safe)
+
+    Buckets are upper bounds; values above the last bound land in an
+    implicit +Inf bucket. Observing is O(log buckets), and memory is
+    constant no matter how many values are recorded.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            buckets: Increasing bucket upper bounds
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one value"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    @property
+    def count(self):
+        return self._count
+
+    def quantile(self, q):
+        """
+        Estimate a quantile as the upper bound of the bucket containing it
+
+        Returns:
+            Bucket bound (the largest value seen if it falls past the last
+            bound), or None if empty
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            largest = self._max
+
+        if total == 0:
+            return None
+
+        rank = q * total
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            if cumulative >= rank:
+                return bound
+        return largest
+
+    def snapshot(self):
+        """
+        Get cumulative bucket counts, sum and count
+
+        Returns:
+            Dict with 'buckets' ({upper bound: cumulative count}), 'sum', 'count'
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            total = self._count
+
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            cumulative += n
+            buckets['+Inf' if bound == float('inf') else bound] = cumulative
+
+        return {'buckets': buckets, 'sum': total_sum, 'count': total}
+
+    def summary(self):
+        """Count, mean and p50/p95/p99 bucket estimates"""
+        snap = self.snapshot()
+        return {
+            'count': snap['count'],
+            'mean': snap['sum'] / snap['count'] if snap['count'] else None,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+class HistogramFamily:
+    """
+    Histograms sharing a metric name, one per combination of label values
+
+    Look a child up once with labels() and keep it - observing on the
+    child is then as cheap as on a plain Histogram.
+    """
+
+    def __init__(self, label_names, buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            label_names: Label names, in the order labels() takes values
+            buckets: Increasing bucket upper bounds for every child
+        """
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Get (creating on first use) the histogram for these label values"""
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def children(self):
+        """List of (labels dict, Histogram)"""
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.label_names, values)), child) for values, child in items]
+
+class MetricsRegistry:
+    """
+    Named metrics rendered in the Prometheus text exposition format
+
+    Histograms are updated on the request path; gauges and counters are
+    read from a callback only when /metrics is scraped, so values the
+    service already tracks (queue depth, writer stats, startup timings)
+    cost nothing extra per request.
+    """
+
+    def __init__(self):
+        self._metrics = {}  # name -> (kind, help, source), in registration order
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labels=None):
+        """
+        Create and register a histogram
+
+        Args:
+            name: Metric name (base name, without _bucket/_sum/_count)
+            help_text: HELP line
+            buckets: Increasing bucket upper bounds
+            labels: Label names - returns a HistogramFamily if given
+
+        Returns:
+            Histogram, or HistogramFamily when labels are given
+        """
+        metric = HistogramFamily(labels, buckets) if labels else Histogram(buckets)
+        return self.register_histogram(name, help_text, metric)
+
+    def register_histogram(self, name, help_text, histogram):
+        """Expose an existing Histogram or HistogramFamily under a name"""
+        self._register(name, 'histogram', help_text, histogram)
+        return histogram
+
+    def gauge(self, name, help_text, fn):
+        """
+        Register a gauge read from a callback at scrape time
+
+        Args:
+            name: Metric name
+            help_text: HELP line
+            fn: Returns a number, a list of (labels dict, number), or
+                None to skip the metric
+        """
+        self._register(name, 'gauge', help_text, fn)
+
+    def counter(self, name, help_text, fn):
+        """Register a counter read from a callback (same fn contract as gauge)"""
+        self._register(name, 'counter', help_text, fn)
+
+    def _register(self, name, kind, help_text, source):
+        if name in self._metrics:
+            raise ValueError(f"Metric already registered: {name}")
+        self._metrics[name] = (kind, help_text, source)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format (version 0.0.4)
+
+        A callback that raises is skipped rather than failing the scrape.
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        for name, (kind, help_text, source) in self._metrics.items():
+            if kind == 'histogram':
+                samples = _histogram_samples(name, source)
+            else:
+                try:
+                    samples = _callback_samples(name, source())
+                except Exception:
+                    continue
+            if not samples:
+                continue
+
+            lines.append(f"# HELP {name} {_escape_help(help_text)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware timing whole requests per route
+
+    Stamps scope['state']['request_start'] (request.state.request_start in
+    handlers) so endpoints can time their own parse stage, and observes
+    the full request duration - including the body of streamed responses -
+    labelled by method, route template and status code. Unmatched paths
+    share one label so clients can't grow the metric without bound.
+    """
+
+    def __init__(self, app, histograms):
+        """
+        Args:
+            app: Wrapped ASGI application
+            histograms: HistogramFamily labelled (method, route, status)
+        """
+        self.app = app
+        self.histograms = histograms
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        scope.setdefault('state', {})['request_start'] = start
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            self.histograms.labels(
+                scope['method'],
+                getattr(route, 'path', 'unmatched'),
+                status[0]
+            ).observe(time.perf_counter() - start)
+
+def _histogram_samples(name, source):
+    """Bucket, sum and count samples for a Histogram or HistogramFamily"""
+    children = source.children() if isinstance(source, HistogramFamily) else [({}, source)]
+    samples = []
+    for labels, histogram in children:
+        snap = histogram.snapshot()
+        for bound, cumulative in snap['buckets'].items():
+            le = bound if bound == '+Inf' else float(bound)
+            samples.append((f"{name}_bucket", {**labels, 'le': _format_value(le)}, cumulative))
+        samples.append((f"{name}_sum", labels, snap['sum']))
+        samples.append((f"{name}_count", labels, snap['count']))
+    return samples
+
+def _callback_samples(name, value):
+    """Samples for a gauge/counter callback result"""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        return [(name, {}, value)]
+    return [(name, labels, v) for labels, v in value if v is not None]
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return '{' + pairs + '}'
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+def _format_value(value):
+    if value == '+Inf' or value == math.inf:
+        return '+Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    return repr(value)
@@ -0,0 +1,159 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Idempotent Result Cache for Retried Requests
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+
+def payload_hash(payload):
+    """
+    Stable digest of a request payload (key order doesn't matter)
+
+    Args:
+        payload: JSON-serializable dict
+
+    Returns:
+        Hex digest string
+    """
+    return hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS),
+                           digest_size=16).hexdigest()
+
+class ResultCache:
+    """
+    Remember recent results by transaction_id so retries aren't rescored
+
+    An entry answers a later request only if the payload hash matches -
+    a different payload under a reused transaction_id is scored afresh
+    and replaces the entry (counted as a conflict). Requests arriving
+    while the same transaction is still being scored wait for that
+    result instead of starting another (counted as coalesced).
+
+    Entries live for `ttl_seconds`; at most `max_entries` are kept, least
+    recently used evicted first. Lookups are thread-safe; fetch() must be
+    awaited on one event loop.
+    """
+
+    def __init__(self, ttl_seconds=600, max_entries=100000, clock=time.monotonic):
+        """
+        Args:
+            ttl_seconds: How long a result answers retries
+            max_entries: Max transactions remembered at once
+            clock: Time source (seconds)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self.stats = {'hits': 0, 'coalesced': 0, 'misses': 0, 'conflicts': 0, 'evicted': 0}
+
+        self._entries = OrderedDict()  # transaction_id -> (hash, result, expires_at), LRU first
+        self._pending = {}  # transaction_id -> (hash, future) while being scored
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, transaction_id, digest):
+        """
+        Cached result for this transaction and payload
+
+        Returns:
+            Result, or None (miss, expired or different payload)
+        """
+        with self._lock:
+            entry = self._entries.get(transaction_id)
+            if entry is None:
+                return None
+
+            cached_digest, result, expires_at = entry
+            if expires_at <= self.clock():
+                del self._entries[transaction_id]
+                self.stats['evicted'] += 1
+                return None
+            if cached_digest != digest:
+                return None
+
+            self._entries.move_to_end(transaction_id)
+            return result
+
+    def put(self, transaction_id, digest, result):
+        """Remember a result, evicting the least recently used entries over the cap"""
+        with self._lock:
+            self._entries.pop(transaction_id, None)
+            self._entries[transaction_id] = (digest, result, self.clock() + self.ttl_seconds)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    async def fetch(self, transaction_id, digest, compute):
+        """
+        Return the cached result, join an in-flight one, or compute it
+
+        Failures aren't cached - every waiter sees the exception and the
+        next retry computes again.
+
+        Args:
+            transaction_id: Cache key
+            digest: payload_hash() of the request
+            compute: Zero-argument coroutine function producing the result
+
+        Returns:
+            Result
+        """
+        result = self.get(transaction_id, digest)
+        if result is not None:
+            self._count('hits')
+            return result
+
+        pending = self._pending.get(transaction_id)
+        if pending is not None and pending[0] == digest:
+            self._count('coalesced')
+            try:
+                return await asyncio.shield(pending[1])
+            except asyncio.CancelledError:
+                if not pending[1].cancelled():
+                    raise
+                # The request scoring it went away - score it here instead
+                return await self.fetch(transaction_id, digest, compute)
+
+        with self._lock:
+            entry = self._entries.get(transaction_id)
+            self.stats['conflicts' if entry is not None and entry[0] != digest else 'misses'] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[transaction_id] = (digest, future)
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved - no "never retrieved" warning without waiters
+            raise
+        else:
+            self.put(transaction_id, digest, result)
+            future.set_result(result)
+            return result
+        finally:
+            if self._pending.get(transaction_id, (None, None))[1] is future:
+                del self._pending[transaction_id]
+
+    @property
+    def hit_rate(self):
+        """Share of lookups answered without scoring (None before any)"""
+        with self._lock:
+            served = self.stats['hits'] + self.stats['coalesced']
+            total = served + self.stats['misses'] + self.stats['conflicts']
+        return served / total if total else None
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
@@ -0,0 +1,64 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Incremental NDJSON Request Streaming
+"""
+
+from starlette.responses import StreamingResponse
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies still being read while the response is sent
+
+    StreamingResponse normally watches receive() for a client disconnect
+    while it streams, which would swallow request body messages the
+    generator is still reading. Here the generator owns receive() (via
+    request.stream(), which raises ClientDisconnect itself), so the
+    response only sends. The background task runs even if sending fails,
+    so it can release resources held for the stream.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        finally:
+            if self.background is not None:
+                await self.background()
+
+async def iter_line_chunks(byte_stream, chunk_size=1000, max_line_bytes=1048576):
+    """
+    Group newline-delimited records from a byte stream into fixed-size chunks
+
+    Holds at most one chunk of lines plus one partial line, whatever the
+    total stream size.
+
+    Args:
+        byte_stream: Async iterator of bytes (e.g. request.stream())
+        chunk_size: Lines per yielded chunk (the last may be shorter)
+        max_line_bytes: Longest line accepted
+
+    Yields:
+        Lists of non-empty lines (bytes, without the newline)
+
+    Raises:
+        ValueError: A line is longer than max_line_bytes
+    """
+    partial = b''
+    lines = []
+
+    async for data in byte_stream:
+        if not data:
+            continue
+        pieces = (partial + data).split(b'\n')
+        partial = pieces.pop()
+        if len(partial) > max_line_bytes:
+            raise ValueError(f"Line longer than {max_line_bytes} bytes")
+
+        lines.extend(piece for piece in pieces if piece.strip())
+        while len(lines) >= chunk_size:
+            yield lines[:chunk_size]
+            lines = lines[chunk_size:]
+
+    if partial.strip():
+        lines.append(partial)
+    if lines:
+        yield lines
@@ -7,6 +7,17 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Categories the training data covers, in sorted order. Encoding against
+# this fixed list gives every row the same code whatever else is in its
+# batch; values outside it get -1 as a missing value would.
+CATEGORY_VOCABULARY = {
+    'device_type': ['mobile', 'pos', 'web'],
+    'merchant_category': ['electronics', 'entertainment', 'gas', 'grocery', 'international',
+                          'jewelry', 'online', 'restaurant', 'retail'],
+    'location_city': ['Bangalore', 'Chennai', 'Delhi', 'Hyderabad', 'International',
+                      'Mumbai', 'Unknown']
+}
+
 class FeatureEngineer:
     """Create features for fraud detection"""
     
@@ -54,9 +65,8 @@ class FeatureEngineer:
         print("  ✓ Velocity features")
         
         # 5. Categorical Encoding
-        df['device_type_encoded'] = pd.Categorical(df['device_type']).codes
-        df['merchant_category_encoded'] = pd.Categorical(df['merchant_category']).codes
-        df['location_city_encoded'] = pd.Categorical(df['location_city']).codes
+        for column, categories in CATEGORY_VOCABULARY.items():
+            df[f'{column}_encoded'] = pd.Categorical(df[column], categories=categories).codes
         print("  ✓ Categorical features")
         
         # 6. Interaction Features
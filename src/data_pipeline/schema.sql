@@ -70,14 +70,22 @@ CREATE TABLE IF NOT EXISTS alerts (
     assigned_to VARCHAR(100),
     investigated_by VARCHAR(100),
     resolution VARCHAR(50),
+    hit_count INTEGER DEFAULT 1,
+    last_hit_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     resolved_at TIMESTAMP
 );
 
+-- Repeat alerts coalesced by AlertSuppressor (for databases created earlier)
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS hit_count INTEGER DEFAULT 1;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS last_hit_at TIMESTAMP;
+
 CREATE INDEX idx_alerts_transaction_id ON alerts(transaction_id);
 CREATE INDEX idx_alerts_status ON alerts(status);
 CREATE INDEX idx_alerts_severity ON alerts(severity);
 CREATE INDEX idx_alerts_created_at ON alerts(created_at);
+-- Investigation queue: keyset pagination over open alerts
+CREATE INDEX IF NOT EXISTS idx_alerts_open_queue ON alerts(status, priority, created_at DESC, alert_id DESC);
 
 -- Model Metrics Table
 CREATE TABLE IF NOT EXISTS model_metrics (
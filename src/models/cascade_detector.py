@@ -0,0 +1,147 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Cascade Detector - Isolation Forest first, LOF only where it is unsure
+"""
+
+import threading
+import numpy as np
+
+class CascadeDetector:
+    """
+    Two-stage ensemble: cheap Isolation Forest for every row, LOF for the few near its threshold
+
+    Isolation Forest's decision function is 0 at its contamination
+    threshold. Rows within `band` of it are the ones the ensemble could
+    plausibly decide differently, so only those go through the k-NN
+    search in LOF. They get the EnsembleDetector combination (weighted
+    scores, both models must flag an anomaly); every other row keeps its
+    Isolation Forest result, as if LOF had agreed.
+
+    LOF scores are mapped to [0, 1] using its training outlier factors
+    rather than the batch, so scoring a handful of escalated rows gives
+    the same values as scoring them among many.
+    """
+
+    def __init__(self, if_detector, lof_detector, weights=None, band=0.05):
+        """
+        Args:
+            if_detector: Fitted IsolationForestDetector
+            lof_detector: Fitted LOFDetector
+            weights: {'isolation_forest': w, 'lof': w} (default: EnsembleDetector's)
+            band: Half-width of the uncertain band, in Isolation Forest
+                decision function units
+        """
+        if not (if_detector.is_fitted and lof_detector.is_fitted):
+            raise ValueError("Both detectors must be fitted")
+
+        self.if_detector = if_detector
+        self.lof_detector = lof_detector
+        self.weights = weights or {'isolation_forest': 0.6, 'lof': 0.4}
+        self.band = band
+
+        self.contamination = if_detector.contamination
+        self.n_estimators = if_detector.n_estimators
+        self.is_fitted = True
+
+        # Outlier scores of the LOF training set (novelty mode keeps them)
+        lof_model = lof_detector.model
+        train_scores = -(lof_model.negative_outlier_factor_ - lof_model.offset_)
+        self.lof_range = tuple(np.percentile(train_scores, [1, 99]))
+
+        self.rows_scored = 0
+        self.rows_escalated = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_ensemble(cls, ensemble, band=0.05):
+        """Cascade over a fitted EnsembleDetector's models and weights"""
+        return cls(ensemble.if_detector, ensemble.lof_detector, ensemble.weights, band)
+
+    def scale(self, X):
+        """
+        Standardize features for the first stage
+
+        Returns:
+            Prepared input for predict_scaled_with_proba() (the raw rows
+            are kept for LOF, which has its own scaler)
+        """
+        return self.if_detector.scale(X), np.asarray(X)
+
+    def predict_scaled_with_proba(self, prepared):
+        """
+        Cascade predictions and anomaly scores
+
+        Args:
+            prepared: Output of scale()
+
+        Returns:
+            (predictions, anomaly_proba)
+        """
+        X_scaled, X = prepared
+        decision = self.if_detector.model.decision_function(X_scaled)
+
+        predictions = np.where(decision < 0, -1, 1)
+        scores = self.if_detector.normalize(decision)
+
+        uncertain = np.abs(decision) <= self.band
+        n_escalated = int(uncertain.sum())
+        if n_escalated:
+            lof_predictions, lof_scores = self.lof_predict_with_proba(X[uncertain])
+            scores[uncertain] = (self.weights['isolation_forest'] * scores[uncertain] +
+                                 self.weights['lof'] * lof_scores)
+            # Same voting as EnsembleDetector.predict - both must flag it
+            predictions[uncertain] = np.where(predictions[uncertain] + lof_predictions < 0, -1, 1)
+
+        with self._lock:
+            self.rows_scored += len(decision)
+            self.rows_escalated += n_escalated
+
+        return predictions, scores
+
+    def predict_with_proba(self, X):
+        """Cascade predictions and anomaly scores for a feature matrix"""
+        return self.predict_scaled_with_proba(self.scale(X))
+
+    def predict(self, X):
+        """Predict anomalies (-1 for anomaly, 1 for normal)"""
+        return self.predict_with_proba(X)[0]
+
+    def predict_proba(self, X):
+        """Get anomaly scores (0 to 1, higher = more anomalous)"""
+        return self.predict_with_proba(X)[1]
+
+    def lof_predict_with_proba(self, X):
+        """
+        LOF predictions and scores on the training-set scale
+
+        Args:
+            X: Unscaled feature rows
+
+        Returns:
+            (predictions, anomaly_proba clipped to [0, 1])
+        """
+        X_scaled = self.lof_detector.scaler.transform(X)
+        raw = -self.lof_detector.model.decision_function(X_scaled)
+
+        low, high = self.lof_range
+        proba = np.clip((raw - low) / (high - low + 1e-10), 0.0, 1.0)
+        return np.where(raw > 0, -1, 1), proba
+
+    @property
+    def hit_rate(self):
+        """Share of rows settled by Isolation Forest alone (None before any scoring)"""
+        with self._lock:
+            if self.rows_scored == 0:
+                return None
+            return 1 - self.rows_escalated / self.rows_scored
+
+    def stats(self):
+        """Rows scored, rows escalated to LOF and hit rate"""
+        with self._lock:
+            scored, escalated = self.rows_scored, self.rows_escalated
+        return {
+            'band': self.band,
+            'rows_scored': scored,
+            'rows_escalated': escalated,
+            'hit_rate': 1 - escalated / scored if scored else None
+        }
@@ -7,6 +7,7 @@ from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import numpy as np
 import joblib
+import copy
 
 class IsolationForestDetector:
     """
@@ -39,6 +40,8 @@ class IsolationForestDetector:
         
         self.scaler = StandardScaler()
         self.is_fitted = False
+        # (min, max) of the training decision function, for normalize()
+        self.score_range = None
     
     def fit(self, X):
         """
@@ -59,8 +62,24 @@ class IsolationForestDetector:
         self.model.fit(X_scaled)
         
         self.is_fitted = True
+        self.calibrate(X)
         print("✓ Model trained")
     
+    def calibrate(self, X):
+        """
+        Record the decision function range that normalize() maps onto [0, 1]
+        
+        fit() calls this with the training data. Scores are normalized
+        against that fixed range rather than the batch, so a row gets the
+        same score alone as among others. Call it directly to calibrate a
+        model saved before the range was recorded.
+        
+        Args:
+            X: Reference feature matrix (normally the training data)
+        """
+        scores = self.model.decision_function(self.scale(X))
+        self.score_range = (float(scores.min()), float(scores.max()))
+    
     def predict(self, X):
         """
         Predict anomalies
@@ -95,12 +114,111 @@ class IsolationForestDetector:
         X_scaled = self.scaler.transform(X)
         scores = self.model.decision_function(X_scaled)
         
-        # Convert to probabilities (0-1 range, higher = more anomalous)
-        # Normalize scores to [0, 1]
-        scores_normalized = (scores - scores.min()) / (scores.max() - scores.min())
-        anomaly_proba = 1 - scores_normalized  # Invert so high = anomalous
+        return self.normalize(scores)
+    
+    def normalize(self, scores):
+        """
+        Convert decision function values to anomaly scores
+        
+        Maps the training set's decision range onto [0, 1], inverted so
+        high = anomalous, and clips rows beyond it. Independent of the
+        other rows scored alongside.
+        
+        Args:
+            scores: decision_function output
+            
+        Returns:
+            anomaly_proba in [0, 1]
+        """
+        if self.score_range is None:
+            # Model saved before score_range existed - fall back to the
+            # raw isolation score, which is also batch-independent
+            return np.clip(-(scores + self.model.offset_), 0.0, 1.0)
+        
+        low, high = self.score_range
+        return np.clip((high - scores) / (high - low), 0.0, 1.0)
+    
+    def predict_with_proba(self, X):
+        """
+        Predictions and anomaly scores from a single pass over the trees
+        
+        Same results as predict() and predict_proba(), at half the cost.
+        
+        Args:
+            X: Feature matrix
+            
+        Returns:
+            (predictions, anomaly_proba)
+        """
+        return self.predict_scaled_with_proba(self.scale(X))
+    
+    def scale(self, X):
+        """
+        Standardize features with the fitted scaler
+        
+        Args:
+            X: Feature matrix
+            
+        Returns:
+            Scaled feature matrix for predict_scaled_with_proba()
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before prediction")
+        
+        return self.scaler.transform(X)
+    
+    def predict_scaled_with_proba(self, X_scaled):
+        """
+        predict_with_proba() for features already passed through scale()
+        
+        Args:
+            X_scaled: Scaled feature matrix
+            
+        Returns:
+            (predictions, anomaly_proba)
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before prediction")
+        
+        scores = self.model.decision_function(X_scaled)
+        
+        predictions = np.where(scores < 0, -1, 1)
+        
+        return predictions, self.normalize(scores)
+    
+    def reduced(self, n_estimators):
+        """
+        Cheaper detector scoring with only the first n_estimators trees
+        
+        Trees share the fitted scaler and tree objects with this detector
+        (nothing is copied). Scores are averages over trees, so a subset
+        gives a noisier estimate on the same scale and the fitted
+        contamination threshold still applies.
+        
+        Args:
+            n_estimators: Trees to keep (capped at the fitted count)
+            
+        Returns:
+            IsolationForestDetector
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before reducing")
+        
+        n_estimators = min(n_estimators, len(self.model.estimators_))
+        model = copy.copy(self.model)
+        # Per-tree attributes scoring reads; the private ones vary by sklearn version
+        for attr in ['estimators_', 'estimators_features_', '_decision_path_lengths',
+                     '_average_path_length_per_tree', '_seeds']:
+            if hasattr(self.model, attr):
+                setattr(model, attr, getattr(self.model, attr)[:n_estimators])
+        model.n_estimators = n_estimators
         
-        return anomaly_proba
+        detector = IsolationForestDetector(self.contamination, n_estimators)
+        detector.model = model
+        detector.scaler = self.scaler
+        detector.score_range = self.score_range
+        detector.is_fitted = True
+        return detector
     
     def save(self, filepath):
         """Save model to disk"""
@@ -111,7 +229,8 @@ class IsolationForestDetector:
             'model': self.model,
             'scaler': self.scaler,
             'contamination': self.contamination,
-            'n_estimators': self.n_estimators
+            'n_estimators': self.n_estimators,
+            'score_range': self.score_range
         }
         
         joblib.dump(model_data, filepath)
@@ -125,9 +244,12 @@ class IsolationForestDetector:
         self.scaler = model_data['scaler']
         self.contamination = model_data['contamination']
         self.n_estimators = model_data['n_estimators']
+        self.score_range = model_data.get('score_range')
         self.is_fitted = True
         
         print(f"✓ Model loaded from {filepath}")
+        if self.score_range is None:
+            print("⚠ Model has no training score range - retrain or calibrate() it on training data")
 
 
 if __name__ == "__main__":
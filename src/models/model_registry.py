@@ -0,0 +1,203 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Versioned Model Artifact Registry
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+# Files that make up one model version (the first two are required)
+ARTIFACTS = ['isolation_forest.pkl', 'feature_engineer.pkl', 'lof.pkl', 'optimal_threshold.pkl']
+REQUIRED_ARTIFACTS = ARTIFACTS[:2]
+
+# Version served when the directory has no registry yet (flat models/*.pkl)
+UNVERSIONED = 'unversioned'
+
+class ModelRegistry:
+    """
+    Immutable model versions under one directory, plus a pointer to the live one
+
+    Layout:
+        <root>/versions/<version>/*.pkl, manifest.json
+        <root>/CURRENT              (name of the active version)
+
+    Publishing copies into a temporary directory and renames it into
+    place, and activating replaces CURRENT in one rename, so readers
+    never see a half-written version. Without CURRENT the flat
+    <root>/*.pkl files are served as version 'unversioned'.
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root: Model directory (e.g. models/)
+        """
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.current_file = os.path.join(root, 'CURRENT')
+
+    def publish(self, source_dir, version=None, metadata=None):
+        """
+        Copy a trained model's artifacts into a new version
+
+        Args:
+            source_dir: Directory holding the artifact files
+            version: Version name (default: timestamp plus content hash)
+            metadata: Extra JSON-serializable details for the manifest
+                (e.g. evaluation metrics)
+
+        Returns:
+            Version name
+
+        Raises:
+            FileNotFoundError: A required artifact is missing
+            ValueError: The version already exists
+        """
+        files = [name for name in ARTIFACTS if os.path.exists(os.path.join(source_dir, name))]
+        missing = [name for name in REQUIRED_ARTIFACTS if name not in files]
+        if missing:
+            raise FileNotFoundError(f"Missing model artifacts in {source_dir}: {missing}")
+
+        checksums = {name: file_sha256(os.path.join(source_dir, name)) for name in files}
+        if version is None:
+            digest = hashlib.sha256(''.join(checksums[name] for name in files).encode()).hexdigest()
+            version = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{digest[:8]}"
+
+        target = os.path.join(self.versions_dir, version)
+        if os.path.exists(target):
+            raise ValueError(f"Model version already exists: {version}")
+
+        staging = os.path.join(self.versions_dir, f'.staging-{version}')
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in files:
+            shutil.copy2(os.path.join(source_dir, name), os.path.join(staging, name))
+
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'files': checksums,
+            'metadata': metadata or {}
+        }
+        with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        os.rename(staging, target)
+        print(f"✓ Published model version {version}")
+        return version
+
+    def activate(self, version):
+        """
+        Make a published version the live one
+
+        Raises:
+            KeyError: Version not found
+        """
+        self.manifest(version)
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f'{self.current_file}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.current_file)
+        print(f"✓ Activated model version {version}")
+
+    def current_version(self):
+        """Active version name, or None if nothing has been activated"""
+        try:
+            with open(self.current_file) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version):
+        """
+        Manifest of a published version
+
+        Raises:
+            KeyError: Version not found
+        """
+        try:
+            with open(os.path.join(self.versions_dir, version, 'manifest.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"Unknown model version: {version}")
+
+    def list_versions(self):
+        """Manifests of all published versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+
+        manifests = []
+        for name in os.listdir(self.versions_dir):
+            if name.startswith('.'):
+                continue
+            try:
+                manifests.append(self.manifest(name))
+            except KeyError:
+                continue
+        return sorted(manifests, key=lambda m: m['created_at'])
+
+    def resolve(self, version=None):
+        """
+        Directory holding a version's artifacts
+
+        Args:
+            version: Version name (default: the active one)
+
+        Returns:
+            (version, directory) - ('unversioned', root) when no version
+            has been activated
+
+        Raises:
+            KeyError: Version not found
+        """
+        version = version or self.current_version()
+        if version is None or version == UNVERSIONED:
+            return UNVERSIONED, self.root
+
+        self.manifest(version)
+        return version, os.path.join(self.versions_dir, version)
+
+    def verify(self, version):
+        """
+        Check a version's files against its manifest checksums
+
+        Raises:
+            ValueError: A file is missing or changed
+        """
+        manifest = self.manifest(version)
+        directory = os.path.join(self.versions_dir, version)
+        for name, checksum in manifest['files'].items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path) or file_sha256(path) != checksum:
+                raise ValueError(f"Model version {version}: {name} is missing or corrupt")
+
+    def prune(self, keep=5):
+        """
+        Delete the oldest versions beyond `keep`, never the active one
+
+        Returns:
+            Deleted version names
+        """
+        current = self.current_version()
+        candidates = [m['version'] for m in self.list_versions() if m['version'] != current]
+        excess = len(candidates) - max(keep - (1 if current else 0), 0)
+
+        removed = candidates[:max(excess, 0)]
+        for version in removed:
+            shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
+        return removed
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,231 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Stage-Cached Training Pipeline Runner
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import joblib
+
+class Stage:
+    """One step of a pipeline: fn(**dependency outputs, **params) -> output"""
+
+    def __init__(self, name, fn, deps=(), params=None, version=1):
+        """
+        Args:
+            name: Stage name (also the keyword its output is passed under)
+            fn: Module-level function (pool workers import it by name)
+            deps: Names of stages whose outputs fn takes
+            params: JSON-serializable keyword arguments for fn
+            version: Bump to invalidate the cache when code fn calls
+                (but the hash of fn's own source can't see) changes
+        """
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.version = version
+
+    def code_hash(self):
+        """Digest of fn's source, so editing a stage invalidates it"""
+        try:
+            source = inspect.getsource(self.fn)
+        except (OSError, TypeError):
+            source = f'{self.fn.__module__}.{self.fn.__qualname__}'
+        return hashlib.sha256(source.encode()).hexdigest()
+
+class StagePipeline:
+    """
+    Run a DAG of stages, reusing cached outputs whose inputs haven't changed
+
+    A stage's cache key hashes its name, version, source code, params and
+    the content digests of its dependencies' outputs. A stage that reruns
+    but produces byte-identical output therefore leaves everything
+    downstream cached. Outputs are pickled under
+    <cache_dir>/<stage>/<key>.pkl with a JSON manifest beside them.
+
+    Stages whose dependencies are done run concurrently in a process pool
+    (e.g. detectors fitted on the same split). Workers read their inputs
+    from the cache and write their output there, so large arrays never
+    pass through the parent.
+    """
+
+    def __init__(self, cache_dir, stages, workers=2):
+        """
+        Args:
+            cache_dir: Where stage outputs persist
+            stages: List of Stage, dependencies before dependents
+            workers: Pool processes for stages that need running
+                (0 runs them one at a time in this process)
+        """
+        self.cache_dir = cache_dir
+        self.stages = {stage.name: stage for stage in stages}
+        self.workers = workers
+        self.results = {}
+
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {missing}")
+
+    def run(self, force=()):
+        """
+        Bring every stage up to date
+
+        Args:
+            force: Stage names to rerun even if cached (dependents rerun
+                only if the output changes)
+
+        Returns:
+            Dict of stage name -> {'status': 'cached' | 'ran', 'key', 'seconds'}
+        """
+        unknown = set(force) - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}")
+
+        self.results = {}
+        digests = {}
+        pending = list(self.stages)
+        running = {}  # future -> (stage name, key)
+
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        try:
+            while pending or running:
+                # Cache hits and inline runs free their dependents immediately, so keep scanning
+                while True:
+                    ready = [n for n in pending if all(dep in digests for dep in self.stages[n].deps)]
+                    if not ready:
+                        break
+                    name = ready[0]
+                    pending.remove(name)
+                    stage = self.stages[name]
+                    key = self._key(stage, digests)
+                    manifest = self._manifest(name, key)
+                    if manifest is not None and name not in force:
+                        digests[name] = manifest['digest']
+                        self.results[name] = {'status': 'cached', 'key': key, 'seconds': 0.0}
+                        print(f"  ✓ {name:<22} cached")
+                        continue
+
+                    args = (stage.fn, {dep: self._output_path(dep, self.results[dep]['key'])
+                                       for dep in stage.deps},
+                            stage.params, self._output_path(name, key))
+                    if pool is None:
+                        self._finish(name, key, _run_stage(*args), digests)
+                    else:
+                        print(f"  … {name:<22} running")
+                        running[pool.submit(_run_stage, *args)] = (name, key)
+
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, key = running.pop(future)
+                        self._finish(name, key, future.result(), digests)
+                elif pending:
+                    raise ValueError(f"Dependency cycle among stages: {pending}")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        return self.results
+
+    def load(self, name):
+        """Output of a stage from the last run()"""
+        return joblib.load(self._output_path(name, self.results[name]['key']))
+
+    def prune(self, keep=3):
+        """
+        Delete cached outputs beyond the newest `keep` per stage, never the last run's
+
+        Returns:
+            Number of entries deleted
+        """
+        removed = 0
+        for name in self.stages:
+            directory = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(directory):
+                continue
+            manifests = []
+            for filename in os.listdir(directory):
+                if filename.endswith('.json'):
+                    with open(os.path.join(directory, filename)) as f:
+                        manifests.append(json.load(f))
+            manifests.sort(key=lambda m: m['created_at'], reverse=True)
+
+            current = self.results.get(name, {}).get('key')
+            for manifest in [m for m in manifests if m['key'] != current][max(keep - 1, 0):]:
+                for extension in ('.pkl', '.json'):
+                    path = os.path.join(directory, manifest['key'] + extension)
+                    if os.path.exists(path):
+                        os.remove(path)
+                removed += 1
+        return removed
+
+    def _finish(self, name, key, outcome, digests):
+        """Record a stage that ran and write its manifest"""
+        digest, seconds = outcome
+        digests[name] = digest
+        self.results[name] = {'status': 'ran', 'key': key, 'seconds': seconds}
+        with open(self._manifest_path(name, key), 'w') as f:
+            json.dump({
+                'stage': name,
+                'key': key,
+                'digest': digest,
+                'seconds': seconds,
+                'params': self.stages[name].params,
+                'created_at': datetime.now().isoformat()
+            }, f, indent=2)
+        print(f"  ✓ {name:<22} ran in {seconds:.2f}s")
+
+    def _key(self, stage, digests):
+        payload = json.dumps({
+            'stage': stage.name,
+            'version': stage.version,
+            'code': stage.code_hash(),
+            'params': stage.params,
+            'inputs': {dep: digests[dep] for dep in stage.deps}
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+    def _manifest(self, name, key):
+        """Manifest of a complete cache entry, or None"""
+        if not os.path.exists(self._output_path(name, key)):
+            return None
+        try:
+            with open(self._manifest_path(name, key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _output_path(self, name, key):
+        return os.path.join(self.cache_dir, name, f'{key}.pkl')
+
+    def _manifest_path(self, name, key):
+        return os.path.join(self.cache_dir, name, f'{key}.json')
+
+def _run_stage(fn, input_paths, params, output_path):
+    """
+    Load inputs, run a stage function and store its output (runs in a pool worker)
+
+    Returns:
+        (sha256 of the stored output, seconds taken)
+    """
+    start = time.perf_counter()
+    inputs = {name: joblib.load(path) for name, path in input_paths.items()}
+    output = fn(**inputs, **params)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f'{output_path}.tmp-{os.getpid()}'
+    joblib.dump(output, tmp_path)
+    digest = hashlib.sha256()
+    with open(tmp_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    os.replace(tmp_path, output_path)
+    return digest.hexdigest(), time.perf_counter() - start
@@ -0,0 +1,152 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Training Pipeline Stages
+"""
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, precision_recall_curve
+from sklearn.model_selection import train_test_split
+
+from .training_pipeline import Stage, StagePipeline
+
+# Stage functions take their dependencies' outputs as keyword arguments
+# named after the stage, plus the stage's params. They live at module
+# level so pool workers can import them.
+
+def generate(seed, n_normal, n_fraud):
+    """Synthetic labelled transactions"""
+    from data_pipeline.data_generator import TransactionGenerator
+    return TransactionGenerator(seed=seed).generate_dataset(n_normal=n_normal, n_fraud=n_fraud)
+
+def features(generate):
+    """Fitted FeatureEngineer plus the feature matrix and labels"""
+    from data_pipeline.feature_engineering import FeatureEngineer
+    engineer = FeatureEngineer()
+    df_features = engineer.create_features(generate)
+    return {
+        'engineer': engineer,
+        'X': engineer.get_feature_matrix(df_features),
+        'y': df_features['is_fraud'].values
+    }
+
+def split(features, test_size, random_state):
+    """Stratified train/test split"""
+    X_train, X_test, y_train, y_test = train_test_split(
+        features['X'], features['y'], test_size=test_size,
+        random_state=random_state, stratify=features['y']
+    )
+    return {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test}
+
+def isolation_forest(split, contamination, n_estimators, random_state):
+    """Isolation Forest fitted on the training split"""
+    from .isolation_forest_detector import IsolationForestDetector
+    detector = IsolationForestDetector(contamination=contamination, n_estimators=n_estimators,
+                                       random_state=random_state)
+    detector.fit(split['X_train'])
+    return detector
+
+def lof(split, contamination, n_neighbors):
+    """LOF fitted on the training split"""
+    from .lof_detector import LOFDetector
+    detector = LOFDetector(n_neighbors=n_neighbors, contamination=contamination)
+    detector.fit(split['X_train'])
+    return detector
+
+def ensemble_scores(isolation_forest, lof, split, weights):
+    """Weighted ensemble scores and voting predictions on the test split"""
+    model = assemble_ensemble(isolation_forest, lof, weights)
+    return {
+        'scores': model.predict_proba(split['X_test']),
+        'votes': model.predict(split['X_test'])
+    }
+
+def threshold(ensemble_scores, split, target_recall):
+    """
+    Score threshold with the best F1 among those reaching target_recall
+
+    Returns:
+        {'threshold', 'precision', 'target_recall'}, or None when
+        target_recall is None (evaluate by ensemble voting instead)
+    """
+    if target_recall is None:
+        return None
+
+    precisions, recalls, thresholds = precision_recall_curve(split['y_test'], ensemble_scores['scores'])
+
+    best_threshold = 0.5
+    best_precision = 0
+    best_f1 = 0
+    for i in range(len(thresholds)):
+        if recalls[i] >= target_recall:
+            precision = precisions[i]
+            recall = recalls[i]
+            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+            if f1 > best_f1:
+                best_f1 = f1
+                best_precision = precision
+                best_threshold = thresholds[i]
+
+    return {'threshold': float(best_threshold), 'precision': float(best_precision),
+            'target_recall': target_recall}
+
+def evaluate(ensemble_scores, split, threshold):
+    """Confusion matrix and headline metrics on the test split"""
+    if threshold is None:
+        y_pred_binary = (ensemble_scores['votes'] == -1).astype(int)
+    else:
+        y_pred_binary = (ensemble_scores['scores'] >= threshold['threshold']).astype(int)
+
+    cm = confusion_matrix(split['y_test'], y_pred_binary)
+    tp, fp, tn, fn = cm[1, 1], cm[0, 1], cm[0, 0], cm[1, 0]
+
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+    return {
+        'confusion_matrix': cm,
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1': float(2 * precision * recall / (precision + recall)) if (precision + recall) > 0 else 0.0,
+        'fpr': float(fp / (fp + tn)) if (fp + tn) > 0 else 0.0
+    }
+
+def assemble_ensemble(isolation_forest, lof, weights):
+    """EnsembleDetector wrapping already fitted detectors"""
+    from .ensemble_detector import EnsembleDetector
+    model = EnsembleDetector(contamination=isolation_forest.contamination)
+    model.if_detector = isolation_forest
+    model.lof_detector = lof
+    model.weights = dict(weights)
+    model.is_fitted = True
+    return model
+
+def build_training_pipeline(config, cache_dir, workers=2):
+    """
+    Training DAG for a config; the two detectors fit in parallel
+
+    Args:
+        config: Dict with seed, n_normal, n_fraud, test_size, split_seed,
+            contamination, n_estimators, n_neighbors, weights and
+            target_recall (None = evaluate by voting)
+        cache_dir: Where stage outputs persist
+        workers: Pool processes (0 = run stages inline)
+
+    Returns:
+        StagePipeline
+    """
+    return StagePipeline(cache_dir, [
+        Stage('generate', generate, params={
+            'seed': config['seed'], 'n_normal': config['n_normal'], 'n_fraud': config['n_fraud']}),
+        Stage('features', features, deps=['generate']),
+        Stage('split', split, deps=['features'], params={
+            'test_size': config['test_size'], 'random_state': config['split_seed']}),
+        Stage('isolation_forest', isolation_forest, deps=['split'], params={
+            'contamination': config['contamination'], 'n_estimators': config['n_estimators'],
+            'random_state': config['seed']}),
+        Stage('lof', lof, deps=['split'], params={
+            'contamination': config['contamination'], 'n_neighbors': config['n_neighbors']}),
+        Stage('ensemble_scores', ensemble_scores, deps=['isolation_forest', 'lof', 'split'], params={
+            'weights': config['weights']}),
+        Stage('threshold', threshold, deps=['ensemble_scores', 'split'], params={
+            'target_recall': config['target_recall']}),
+        Stage('evaluate', evaluate, deps=['ensemble_scores', 'split', 'threshold'])
+    ], workers=workers)
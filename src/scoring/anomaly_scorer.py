@@ -8,7 +8,12 @@ import numpy as np
 class AnomalyScorer:
     """Convert raw anomaly scores to risk levels and priorities"""
     
-    def __init__(self):
+    def __init__(self, adaptive_thresholds=None):
+        """
+        Args:
+            adaptive_thresholds: Optional AdaptiveThresholds that recalibrates
+                the cutoffs below from live scores once warmed up
+        """
         # Risk level thresholds
         self.thresholds = {
             'CRITICAL': 0.90,
@@ -16,6 +21,27 @@ class AnomalyScorer:
             'MEDIUM': 0.50,
             'LOW': 0.25
         }
+        self.adaptive_thresholds = adaptive_thresholds
+    
+    def update_thresholds(self, scores):
+        """
+        Feed scores to the adaptive estimator and refresh thresholds
+        
+        Args:
+            scores: Iterable of anomaly scores
+        
+        Returns:
+            Current thresholds dict
+        """
+        if self.adaptive_thresholds is None:
+            return self.thresholds
+        
+        self.adaptive_thresholds.update(scores)
+        if self.adaptive_thresholds.is_ready():
+            # Swap in a new dict so concurrent readers never see a half update
+            self.thresholds = {**self.thresholds, **self.adaptive_thresholds.get_thresholds()}
+        
+        return self.thresholds
     
     def calculate_composite_score(self, scores_dict):
         """
@@ -95,9 +121,17 @@ class AnomalyScorer:
         """
         df = transactions_df.copy()
         
+        thresholds = self.update_thresholds(scores)
+        
+        # Vectorized equivalents of assign_risk_level / assign_priority,
+        # using one thresholds snapshot for the whole batch
+        scores = np.asarray(scores, dtype=float)
+        risk_levels = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+        conditions = [scores >= thresholds[level] for level in risk_levels]
+        
         df['anomaly_score'] = scores
-        df['risk_level'] = df['anomaly_score'].apply(self.assign_risk_level)
-        df['priority'] = df['risk_level'].apply(self.assign_priority)
-        df['is_anomaly'] = (df['anomaly_score'] >= self.thresholds['MEDIUM']).astype(int)
+        df['risk_level'] = np.select(conditions, risk_levels, default='NORMAL').astype(object)
+        df['priority'] = np.select(conditions, [1, 2, 3, 4], default=5)
+        df['is_anomaly'] = (scores >= thresholds['MEDIUM']).astype(int)
         
         return df
@@ -0,0 +1,419 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Resumable Chunked Batch Scoring Job
+"""
+
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import pandas as pd
+
+CHECKPOINT_FILE = '_checkpoint.json'
+
+# Scoring columns added to every output row
+SCORE_COLUMNS = ['anomaly_score', 'risk_level', 'priority', 'is_anomaly']
+
+def iter_file_chunks(path, chunk_size):
+    """
+    Read a Parquet or CSV file in chunks of at most chunk_size rows
+
+    Chunk boundaries depend only on the file and chunk_size, so a resumed
+    run sees the same chunks as the one that crashed.
+
+    Args:
+        path: .parquet or .csv file
+        chunk_size: Rows per chunk
+
+    Yields:
+        DataFrame per chunk
+    """
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+def iter_query_chunks(query, chunk_size, conn_params=None):
+    """
+    Stream a Postgres query in chunks through a server-side cursor
+
+    The query needs a deterministic ORDER BY for resumed runs to see the
+    same chunks.
+
+    Args:
+        query: SELECT returning the transaction columns
+        chunk_size: Rows per chunk
+        conn_params: Keyword arguments for psycopg2.connect (default: DB_* env vars)
+
+    Yields:
+        DataFrame per chunk
+    """
+    import psycopg2
+
+    conn_params = conn_params or {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'database': os.getenv('DB_NAME', 'anomaly_detection'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD')
+    }
+    conn = psycopg2.connect(**conn_params)
+    try:
+        # Named cursor - rows stay on the server until fetched
+        cursor = conn.cursor(name='batch_scoring')
+        cursor.itersize = chunk_size
+        cursor.execute(query)
+        columns = None
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            columns = columns or [column[0] for column in cursor.description]
+            yield pd.DataFrame(rows, columns=columns)
+        cursor.close()
+    finally:
+        conn.close()
+
+def source_fingerprint(path=None, query=None):
+    """
+    Identify an input so a checkpoint is never resumed against different data
+
+    Files are identified by path, size and modification time; queries
+    by their text.
+    """
+    if path is not None:
+        stat = os.stat(path)
+        return f"file:{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    return 'query:' + hashlib.sha256(query.encode()).hexdigest()[:16]
+
+class JobCheckpoint:
+    """
+    Record of completed chunks, rewritten atomically after each one
+
+    A chunk is marked complete only after its output file is in place
+    and its alerts are in the outbox, so a crash at any point loses at
+    most the chunks still being scored.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Checkpoint JSON file
+        """
+        self.path = path
+        self.state = None
+
+    def load(self):
+        """Previous state, or None if there is no checkpoint"""
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = None
+        return self.state
+
+    def start(self, source, chunk_size, model_version):
+        """
+        Begin a new run or check a resumed one matches the checkpoint
+
+        Returns:
+            Set of chunk indices already completed
+
+        Raises:
+            ValueError: Checkpoint belongs to a different input, chunk
+                size or model version
+        """
+        previous = self.load()
+        if previous is None:
+            self.state = {
+                'source': source,
+                'chunk_size': chunk_size,
+                'model_version': model_version,
+                'started_at': datetime.now().isoformat(),
+                'completed': {}
+            }
+            self._write()
+            return set()
+
+        for key, value in [('source', source), ('chunk_size', chunk_size), ('model_version', model_version)]:
+            if previous[key] != value:
+                raise ValueError(f"Checkpoint {self.path} was written for {key}={previous[key]!r}, "
+                                 f"not {value!r} - use a new output directory or restart")
+        return {int(index) for index in previous['completed']}
+
+    def complete(self, index, stats):
+        """Mark a chunk done with its summary stats"""
+        self.state['completed'][str(index)] = stats
+        self.state['updated_at'] = datetime.now().isoformat()
+        self._write()
+
+    def _write(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+# Per-process model state, loaded once by _init_worker
+_worker = {}
+
+def _init_worker(model_dir, model_version):
+    """Load the model version into this process (process pool initializer)"""
+    import joblib
+    from models.isolation_forest_detector import IsolationForestDetector
+    from models.model_registry import ModelRegistry
+    from scoring.anomaly_scorer import AnomalyScorer
+
+    _, directory = ModelRegistry(model_dir).resolve(model_version)
+    detector = IsolationForestDetector()
+    detector.load(os.path.join(directory, 'isolation_forest.pkl'))
+    # Parallelism comes from the pool - one core per worker
+    detector.model.set_params(n_jobs=1)
+
+    threshold_path = os.path.join(directory, 'optimal_threshold.pkl')
+    threshold = joblib.load(threshold_path)['threshold'] if os.path.exists(threshold_path) else 0.5
+
+    _worker.update(
+        detector=detector,
+        feature_engineer=joblib.load(os.path.join(directory, 'feature_engineer.pkl')),
+        scorer=AnomalyScorer(),
+        threshold=threshold
+    )
+
+def _score_chunk(index, df, output_path, output_format, top_k_columns):
+    """
+    Score one chunk, write its output file and return what the parent needs
+
+    Runs in a pool worker (or inline). The output file is written under
+    a temporary name and renamed, so a partial file is never mistaken for
+    a finished chunk.
+
+    Returns:
+        Dict with index, stats, alert records and top rows by score
+    """
+    from alerts.alert_manager import AlertManager
+
+    start = time.perf_counter()
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+
+    # Feature engineering reports every step - fine for one batch, noise per chunk
+    with contextlib.redirect_stdout(io.StringIO()):
+        features = _worker['feature_engineer'].create_features(df)
+    X = _worker['feature_engineer'].get_feature_matrix(features)
+    scores = _worker['detector'].predict_proba(X)
+    scored = _worker['scorer'].score_transactions(features, scores)
+
+    output = scored[list(df.columns) + SCORE_COLUMNS]
+    tmp_path = output_path + '.tmp'
+    if output_format == 'parquet':
+        output.to_parquet(tmp_path, index=False)
+    else:
+        output.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+
+    stats = {
+        'rows': len(scored),
+        'anomalies': int((scores >= _worker['threshold']).sum()),
+        'risk_levels': {level: int(n) for level, n in scored['risk_level'].value_counts().items()},
+        'seconds': time.perf_counter() - start
+    }
+    if 'is_fraud' in scored.columns:
+        stats['fraud'] = int(scored['is_fraud'].sum())
+        stats['fraud_caught'] = int(scored.loc[scored['is_anomaly'] == 1, 'is_fraud'].sum())
+
+    columns = [column for column in top_k_columns if column in scored.columns]
+    return {
+        'index': index,
+        'stats': stats,
+        'alerts': AlertManager.build_alert_records(scored),
+        'top': scored.nlargest(10, 'anomaly_score')[columns]
+    }
+
+class BatchScoringJob:
+    """
+    Score a large input chunk by chunk across a process pool, resumably
+
+    The parent reads chunks and hands them to workers (at most two per
+    worker in flight, so memory stays bounded). Each worker loads the
+    model once, scores its chunk and writes part-NNNNNN.<format> to the
+    output directory. The parent appends the chunk's alerts to the
+    durable outbox in one write and then checkpoints the chunk. Alerts
+    are bulk-inserted from the outbox every `alert_flush_chunks` chunks
+    and at the end; with the database down they stay in the outbox.
+
+    Rerunning against the same output directory skips completed chunks.
+    The resumed run uses the model version the checkpoint recorded, so
+    one output never mixes versions. Alerts are at-least-once: a crash
+    between the outbox write and the checkpoint rescores that chunk.
+
+    Each chunk is scored as one batch, like an API request - per-user
+    features and score normalization are computed within the chunk.
+    """
+
+    def __init__(self, output_dir, model_dir='models', model_version=None, workers=None,
+                 chunk_size=100000, output_format='parquet', outbox_dir=None,
+                 alert_manager=None, alert_flush_chunks=20):
+        """
+        Args:
+            output_dir: Where scored parts and the checkpoint go
+            model_dir: Model registry directory
+            model_version: Registry version (default: active, or the
+                checkpoint's when resuming)
+            workers: Pool processes (default: CPU count; 0 scores in this process)
+            chunk_size: Rows per chunk
+            output_format: 'parquet' or 'csv'
+            outbox_dir: Alert outbox directory (default: <output_dir>/alert_outbox)
+            alert_manager: AlertManager for bulk inserts (None keeps alerts
+                in the outbox)
+            alert_flush_chunks: Chunks between alert bulk inserts
+        """
+        if output_format not in ('parquet', 'csv'):
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        self.output_dir = output_dir
+        self.model_dir = model_dir
+        self.model_version = model_version
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.output_format = output_format
+        self.outbox_dir = outbox_dir or os.path.join(output_dir, 'alert_outbox')
+        self.alert_manager = alert_manager
+        self.alert_flush_chunks = alert_flush_chunks
+
+        self.checkpoint = JobCheckpoint(os.path.join(output_dir, CHECKPOINT_FILE))
+
+    def run(self, chunks, source, top_k_columns=('transaction_id', 'amount', 'anomaly_score', 'risk_level')):
+        """
+        Score every chunk not already completed
+
+        Args:
+            chunks: Iterable of DataFrames (e.g. iter_file_chunks())
+            source: source_fingerprint() of the input
+            top_k_columns: Columns kept for the highest-risk summary
+
+        Returns:
+            Summary dict: totals over all completed chunks (including
+            earlier runs) plus this run's chunk count, timing and top rows
+
+        Raises:
+            FileNotFoundError: No trained model
+            ValueError: Existing checkpoint doesn't match this run
+        """
+        from alerts.alert_outbox import AlertOutbox
+        from models.model_registry import ModelRegistry
+        from scoring.top_k_tracker import TopKTracker
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        previous = self.checkpoint.load()
+        if previous is not None and self.model_version is None:
+            self.model_version = previous['model_version']
+        self.model_version, model_path = ModelRegistry(self.model_dir).resolve(self.model_version)
+        if not os.path.exists(os.path.join(model_path, 'isolation_forest.pkl')):
+            # Fail here rather than in every pool worker's initializer
+            raise FileNotFoundError(f"No trained model in {model_path}")
+
+        completed = self.checkpoint.start(source, self.chunk_size, self.model_version)
+        if completed:
+            print(f"  Resuming: {len(completed)} chunks already scored")
+        self._remove_partial_parts()
+
+        outbox = AlertOutbox(self.outbox_dir)
+        top_k = TopKTracker(k=10)  # workers already trimmed the columns
+        start = time.perf_counter()
+        scored_chunks = 0
+
+        def finish(result):
+            nonlocal scored_chunks
+            outbox.append_many(result['alerts'], durable=True)
+            self.checkpoint.complete(result['index'], result['stats'])
+            top_k.update(result['top'])
+            scored_chunks += 1
+            stats = result['stats']
+            print(f"  ✓ Chunk {result['index']}: {stats['rows']} rows, "
+                  f"{len(result['alerts'])} alerts ({stats['seconds']:.2f}s)")
+            if self.alert_manager is not None and scored_chunks % self.alert_flush_chunks == 0:
+                outbox.replay(self.alert_manager)
+
+        pending = self._pending_chunks(chunks, completed, top_k_columns)
+        try:
+            if self.workers == 0:
+                _init_worker(self.model_dir, self.model_version)
+                for args in pending:
+                    finish(_score_chunk(*args))
+            else:
+                self._run_pool(pending, finish)
+        finally:
+            outbox.sync()
+
+        alerts_written = outbox.replay(self.alert_manager) if self.alert_manager is not None else 0
+        outbox.close()
+
+        summary = self._totals()
+        summary.update({
+            'model_version': self.model_version,
+            'chunks_this_run': scored_chunks,
+            'seconds': time.perf_counter() - start,
+            'alerts_written': alerts_written,
+            'alerts_pending': outbox.pending_count(),
+            'top': top_k.get_top_k()
+        })
+        return summary
+
+    def _run_pool(self, pending, finish):
+        """Score chunks in worker processes with bounded chunks in flight"""
+        max_in_flight = 2 * self.workers
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.model_dir, self.model_version)) as pool:
+            in_flight = set()
+            for args in pending:
+                in_flight.add(pool.submit(_score_chunk, *args))
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future.result())
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future.result())
+
+    def _pending_chunks(self, chunks, completed, top_k_columns):
+        """Argument tuples for _score_chunk, skipping completed chunks"""
+        for index, df in enumerate(chunks):
+            if index in completed:
+                continue
+            yield index, df, self._part_path(index), self.output_format, list(top_k_columns)
+
+    def _part_path(self, index):
+        return os.path.join(self.output_dir, f'part-{index:06d}.{self.output_format}')
+
+    def _remove_partial_parts(self):
+        """Delete output files a crashed run left half-written"""
+        for path in glob.glob(os.path.join(self.output_dir, 'part-*.tmp')):
+            os.remove(path)
+
+    def _totals(self):
+        """Totals over every completed chunk in the checkpoint"""
+        chunk_stats = self.checkpoint.state['completed'].values()
+        totals = {'chunks': len(chunk_stats), 'rows': 0, 'anomalies': 0, 'risk_levels': {}}
+        for stats in chunk_stats:
+            totals['rows'] += stats['rows']
+            totals['anomalies'] += stats['anomalies']
+            for level, n in stats['risk_levels'].items():
+                totals['risk_levels'][level] = totals['risk_levels'].get(level, 0) + n
+            if 'fraud' in stats:
+                totals['fraud'] = totals.get('fraud', 0) + stats['fraud']
+                totals['fraud_caught'] = totals.get('fraud_caught', 0) + stats['fraud_caught']
+        return totals
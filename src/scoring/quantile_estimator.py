@@ -0,0 +1,167 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Streaming Quantile Estimation for Adaptive Risk Thresholds
+"""
+
+import threading
+
+class P2QuantileEstimator:
+    """
+    P-square streaming quantile estimator (Jain & Chlamtac, 1985)
+
+    Tracks a single quantile with five markers, so memory and per-update
+    cost are constant no matter how many scores are observed.
+    """
+
+    def __init__(self, p):
+        """
+        Args:
+            p: Quantile to track (0-1), e.g. 0.95
+        """
+        if not 0 < p < 1:
+            raise ValueError("p must be between 0 and 1")
+
+        self.p = p
+        self.count = 0
+
+        self._heights = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x):
+        """Add one observation"""
+        self.count += 1
+        q = self._heights
+
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell containing x, stretching the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Nudge the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        """Piecewise-parabolic marker height prediction"""
+        q = self._heights
+        n = self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        """Current quantile estimate (None before any observation)"""
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # Too few points for markers - use the exact sample quantile
+            idx = min(int(round(self.p * (self.count - 1))), self.count - 1)
+            return self._heights[idx]
+        return self._heights[2]
+
+
+class AdaptiveThresholds:
+    """
+    Recompute risk level thresholds from the live score distribution
+
+    Each risk level gets a target alert rate - the share of transactions
+    that should score at or above its threshold - and the threshold tracks
+    the matching upper quantile of observed scores.
+    """
+
+    def __init__(self, target_rates=None, min_samples=500):
+        """
+        Args:
+            target_rates: Dict of risk level -> target share of traffic at or above it
+            min_samples: Observations required before thresholds are trusted
+        """
+        self.target_rates = target_rates or {
+            'CRITICAL': 0.01,
+            'HIGH': 0.05,
+            'MEDIUM': 0.15,
+            'LOW': 0.30
+        }
+        self.min_samples = min_samples
+
+        self.estimators = {
+            level: P2QuantileEstimator(1 - rate)
+            for level, rate in self.target_rates.items()
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def count(self):
+        """Number of scores observed"""
+        return next(iter(self.estimators.values())).count
+
+    def update(self, scores):
+        """
+        Feed a batch of scores into the estimators
+
+        Args:
+            scores: Iterable of anomaly scores (0-1)
+        """
+        with self._lock:
+            for score in scores:
+                score = float(score)
+                if score != score:  # skip NaN
+                    continue
+                for estimator in self.estimators.values():
+                    estimator.update(score)
+
+    def is_ready(self):
+        """Whether enough scores have been seen to trust the estimates"""
+        return self.count >= self.min_samples
+
+    def get_thresholds(self):
+        """
+        Get the current risk level thresholds
+
+        Returns:
+            Dict of risk level -> score threshold, ordered so stricter
+            levels never fall below looser ones
+        """
+        with self._lock:
+            if self.count == 0:
+                return {}
+            values = {level: est.value() for level, est in self.estimators.items()}
+
+        thresholds = {}
+        floor = None
+        # Walk from the loosest level to the strictest, keeping cutoffs monotonic
+        for level in sorted(values, key=lambda lvl: self.target_rates[lvl], reverse=True):
+            value = values[level]
+            if floor is not None and value < floor:
+                value = floor
+            thresholds[level] = value
+            floor = value
+
+        return thresholds
@@ -0,0 +1,130 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Streaming Top-K Risk Tracker
+"""
+
+import heapq
+import itertools
+import numpy as np
+import pandas as pd
+
+class TopKTracker:
+    """
+    Keep the K highest-risk transactions seen in a stream of score batches
+
+    Memory is bounded by K rows regardless of how many transactions are
+    scored. Each batch is pre-filtered with a partial selection
+    (np.argpartition) so only its own top-K candidates touch the heap.
+    """
+
+    def __init__(self, k=10, score_column='anomaly_score', columns=None, window_size=None):
+        """
+        Args:
+            k: Number of highest-risk transactions to keep
+            score_column: Column holding the anomaly score
+            columns: Columns to keep for each tracked transaction (None = all)
+            window_size: Transactions per window (None = one open-ended window)
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        self.k = k
+        self.score_column = score_column
+        self.columns = columns
+        self.window_size = window_size
+
+        self.window_id = 0
+        self.window_count = 0
+        self.total_count = 0
+        self.last_window = None
+
+        self._heap = []  # min-heap of (score, seq, row)
+        self._seq = itertools.count()
+
+    def update(self, batch_df):
+        """
+        Consume a batch of scored transactions
+
+        Args:
+            batch_df: DataFrame with the score column (e.g. AnomalyScorer output)
+
+        Returns:
+            List of top-K DataFrames for windows closed by this batch
+        """
+        closed = []
+        start = 0
+        n = len(batch_df)
+
+        while start < n:
+            end = n
+            if self.window_size:
+                end = min(n, start + self.window_size - self.window_count)
+
+            self._consume(batch_df.iloc[start:end])
+            self.window_count += end - start
+            self.total_count += end - start
+            start = end
+
+            if self.window_size and self.window_count >= self.window_size:
+                closed.append(self.roll_window())
+
+        return closed
+
+    def _consume(self, df):
+        """Push the top-K candidates of one window segment onto the heap"""
+        if len(df) == 0:
+            return
+
+        scores = df[self.score_column].to_numpy(dtype=float)
+        candidates = np.flatnonzero(~np.isnan(scores))
+
+        # Anything not beating the current K-th best cannot enter the heap
+        if len(self._heap) == self.k:
+            candidates = candidates[scores[candidates] > self._heap[0][0]]
+
+        if len(candidates) > self.k:
+            top = np.argpartition(-scores[candidates], self.k - 1)[:self.k]
+            candidates = candidates[top]
+
+        if len(candidates) == 0:
+            return
+
+        rows = df.iloc[candidates]
+        if self.columns is not None:
+            rows = rows[self.columns]
+        records = rows.to_dict('records')
+
+        for score, record in zip(scores[candidates], records):
+            item = (float(score), next(self._seq), record)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def get_top_k(self):
+        """
+        Get the current window's highest-risk transactions
+
+        Returns:
+            DataFrame sorted by score, highest first
+        """
+        ranked = sorted(self._heap, key=lambda item: (-item[0], item[1]))
+        return pd.DataFrame([record for _, _, record in ranked], columns=self.columns)
+
+    def roll_window(self):
+        """
+        Close the current window and start a new one
+
+        Returns:
+            Top-K DataFrame of the closed window
+        """
+        top_k = self.get_top_k()
+        top_k.attrs['window_id'] = self.window_id
+        top_k.attrs['window_count'] = self.window_count
+
+        self.last_window = top_k
+        self.window_id += 1
+        self.window_count = 0
+        self._heap = []
+
+        return top_k
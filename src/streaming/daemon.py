@@ -0,0 +1,206 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Streaming Detection Daemon
+"""
+
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from api.metrics import Histogram, LATENCY_BUCKETS, ROW_COUNT_BUCKETS
+
+# Fields every streamed transaction must carry
+REQUIRED_FIELDS = ['transaction_id', 'user_id', 'amount', 'timestamp',
+                   'merchant_category', 'location_city', 'device_type']
+
+class StreamingDetector:
+    """
+    Long-running consumer: poll a source, score micro-batches, alert, commit
+
+    Records are gathered until `batch_size` are waiting or `max_wait`
+    seconds have passed since the first, featurized against per-user
+    state and scored as one batch (a row's score depends only on it and
+    its user's history, not on the rest of the batch). Alerts go to the
+    durable outbox with an fsync, and only then is the source offset
+    committed and the batch folded into the user state - a crash never
+    loses an alert, and replays at most the uncommitted batch without
+    counting it twice. Unparseable records and ones missing required
+    fields are counted and skipped.
+
+    A scoring or outbox failure stops run() with the exception and the
+    batch uncommitted, for a supervisor to restart from the last commit
+    and snapshot.
+    """
+
+    def __init__(self, source, detector, feature_names, user_state, outbox, scorer=None,
+                 batch_size=500, max_wait=0.2, report_interval=10.0, state_path=None,
+                 snapshot_interval=60.0):
+        """
+        Args:
+            source: Stream source (see streaming.sources)
+            detector: Fitted detector with predict_with_proba (e.g. IsolationForestDetector)
+            feature_names: Feature column order the detector was trained on
+            user_state: UserFeatureState
+            outbox: AlertOutbox alerts are written ahead to
+            scorer: AnomalyScorer (default: fixed thresholds)
+            batch_size: Max records per micro-batch
+            max_wait: Max seconds the first record of a batch waits for more
+            report_interval: Seconds between status lines (0 = silent)
+            state_path: Where user state snapshots go (None = not persisted)
+            snapshot_interval: Min seconds between snapshots
+        """
+        from scoring.anomaly_scorer import AnomalyScorer
+
+        self.source = source
+        self.detector = detector
+        self.feature_names = list(feature_names)
+        self.user_state = user_state
+        self.outbox = outbox
+        self.scorer = scorer or AnomalyScorer()
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.report_interval = report_interval
+        self.state_path = state_path
+        self.snapshot_interval = snapshot_interval
+
+        self.stats = {'records': 0, 'batches': 0, 'alerts': 0, 'invalid': 0}
+        self.batch_seconds = Histogram(LATENCY_BUCKETS)
+        self.batch_rows = Histogram(ROW_COUNT_BUCKETS)
+
+        self._recent = deque()  # (monotonic time, records) of recent batches, for throughput
+        self._first_batch_at = None
+        self._stop = threading.Event()
+        self._next_report = time.monotonic() + report_interval
+        self._next_snapshot = time.monotonic() + snapshot_interval
+
+    def run(self, max_batches=None):
+        """
+        Consume until stop() (or max_batches batches), then snapshot state
+
+        An exception propagates without a snapshot, so the state on disk
+        never runs ahead of the committed offset.
+
+        Args:
+            max_batches: Stop after this many batches (None = run until stopped)
+        """
+        batches = 0
+        while not self._stop.is_set() and (max_batches is None or batches < max_batches):
+            records = self._collect()
+            if records:
+                self.process(records)
+                batches += 1
+            self._maybe_report()
+
+        if self.state_path is not None:
+            self.user_state.snapshot(self.state_path)
+
+    def stop(self):
+        """Ask run() to return after the batch in progress"""
+        self._stop.set()
+
+    def process(self, records):
+        """
+        Score, alert and commit one micro-batch
+
+        Args:
+            records: [(offset, record dict), ...] in source order
+        """
+        start = time.perf_counter()
+        valid = [record for _, record in records if _is_valid(record)]
+        invalid = len(records) - len(valid)
+
+        alerts = []
+        pending = {}
+        if valid:
+            from alerts.alert_manager import AlertManager
+
+            features, pending = self.user_state.featurize_pending(pd.DataFrame(valid))
+            X = features[self.feature_names].fillna(0).values
+            _, scores = self.detector.predict_with_proba(X)
+            scored = self.scorer.score_transactions(features, scores)
+            alerts = AlertManager.build_alert_records(scored)
+            if alerts:
+                self.outbox.append_many(alerts, durable=True)
+
+        self.source.commit(records[-1][0])
+        self.user_state.apply(pending)
+
+        now = time.monotonic()
+        self.stats['records'] += len(valid)
+        self.stats['invalid'] += invalid
+        self.stats['alerts'] += len(alerts)
+        self.stats['batches'] += 1
+        self.batch_seconds.observe(time.perf_counter() - start)
+        self.batch_rows.observe(len(records))
+        self._recent.append((now, len(valid)))
+        if self._first_batch_at is None:
+            self._first_batch_at = now
+
+        if self.state_path is not None and now >= self._next_snapshot:
+            # Right after a commit, so the snapshot lines up with the offset
+            self.user_state.snapshot(self.state_path)
+            self._next_snapshot = now + self.snapshot_interval
+
+    def throughput(self, window=10.0):
+        """Records scored per second over the last `window` seconds (or since the first batch)"""
+        now = time.monotonic()
+        while self._recent and self._recent[0][0] < now - window:
+            self._recent.popleft()
+        if self._first_batch_at is None:
+            return 0.0
+        return sum(n for _, n in self._recent) / max(min(window, now - self._first_batch_at), 1e-3)
+
+    def lag(self):
+        """Records the source holds that aren't committed yet (None if unknown)"""
+        return self.source.lag()
+
+    def register_metrics(self, registry):
+        """Export the daemon's stats on a MetricsRegistry"""
+        registry.register_histogram('anomaly_stream_batch_seconds',
+                                    "Micro-batch time from poll to offset commit", self.batch_seconds)
+        registry.register_histogram('anomaly_stream_batch_records',
+                                    "Records per micro-batch", self.batch_rows)
+        registry.counter('anomaly_stream_records_total', "Transactions scored",
+                         lambda: self.stats['records'])
+        registry.counter('anomaly_stream_invalid_total', "Records skipped as unparseable or missing fields",
+                         lambda: self.stats['invalid'])
+        registry.counter('anomaly_stream_alerts_total', "Alerts written to the outbox",
+                         lambda: self.stats['alerts'])
+        registry.gauge('anomaly_stream_lag_records', "Records in the source not yet committed",
+                       self.lag)
+        registry.gauge('anomaly_stream_throughput_records_per_second',
+                       "Records scored per second over the last 10 seconds", self.throughput)
+        registry.gauge('anomaly_stream_users', "Users with feature state in memory",
+                       lambda: len(self.user_state))
+
+    def _collect(self):
+        """Gather one micro-batch, lingering up to max_wait after the first record"""
+        records = self.source.poll(self.batch_size, timeout=0.5)  # wakes up to check stop()
+        if not records:
+            return records
+
+        deadline = time.monotonic() + self.max_wait
+        while len(records) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            records.extend(self.source.poll(self.batch_size - len(records), timeout=remaining))
+        return records
+
+    def _maybe_report(self):
+        if not self.report_interval or time.monotonic() < self._next_report:
+            return
+        self._next_report = time.monotonic() + self.report_interval
+        lag = self.lag()
+        print(f"  Stream: {self.throughput():,.0f} rec/s | lag {lag if lag is not None else '?'} | "
+              f"{self.stats['records']} scored | {self.stats['alerts']} alerts | "
+              f"{len(self.user_state)} users | batch p95 "
+              f"{(self.batch_seconds.quantile(0.95) or 0) * 1000:.0f} ms")
+
+def _is_valid(record):
+    """True if a record has every required field and a numeric amount"""
+    if not isinstance(record, dict) or any(record.get(field) is None for field in REQUIRED_FIELDS):
+        return False
+    return isinstance(record['amount'], (int, float)) and not isinstance(record['amount'], bool)
@@ -0,0 +1,186 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Transaction Stream Sources
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+# Every source provides:
+#   poll(max_records, timeout) -> [(offset, record dict or None), ...]
+#       records after the last poll; waits up to `timeout` seconds only
+#       while nothing is available
+#   commit(offset)  - everything up to and including `offset` is handled
+#   lag()           - records received by the source but not yet committed
+#   close()
+
+class FileTailSource:
+    """
+    Follow a newline-delimited JSON file as it grows (like `tail -F`)
+
+    Offsets are byte positions just past each line. commit() writes the
+    position to `offset_path` atomically, and a restarted source resumes
+    from there. A trailing line without its newline is left until the
+    writer finishes it. If the file is replaced (new inode) or truncated,
+    reading starts again from the beginning of the new file. Lines that
+    aren't a JSON object are returned as None records.
+    """
+
+    def __init__(self, path, offset_path=None, poll_interval=0.1):
+        """
+        Args:
+            path: NDJSON file to follow (may not exist yet)
+            offset_path: Where committed offsets persist (default: <path>.offset)
+            poll_interval: Seconds between checks for new data while idle
+        """
+        self.path = path
+        self.offset_path = offset_path or f'{path}.offset'
+        self.poll_interval = poll_interval
+
+        self.committed = self._load_offset()
+        self._position = self.committed
+        self._file = None
+        self._inode = None
+        self._line_bytes = None  # running average, for estimating lag in records
+
+    def poll(self, max_records, timeout=0.0):
+        """Read up to max_records complete lines, waiting up to timeout for the first"""
+        deadline = time.monotonic() + timeout
+        while True:
+            records = self._read(max_records)
+            if records or time.monotonic() >= deadline:
+                return records
+            time.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+
+    def commit(self, offset):
+        """Persist the byte position processing has reached"""
+        tmp_path = f'{self.offset_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(f'{offset}\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offset_path)
+        self.committed = offset
+
+    def lag(self):
+        """Estimated records written to the file but not yet committed"""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+        behind = max(size - self.committed, 0)
+        if behind == 0:
+            return 0
+        return max(int(round(behind / self._line_bytes)), 1) if self._line_bytes else None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read(self, max_records):
+        if not self._ensure_open():
+            return []
+
+        records = []
+        self._file.seek(self._position)
+        while len(records) < max_records:
+            line = self._file.readline()
+            if not line.endswith(b'\n'):
+                break  # nothing new, or a line still being written
+            self._position += len(line)
+            self._line_bytes = len(line) if self._line_bytes is None else \
+                0.99 * self._line_bytes + 0.01 * len(line)
+
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            # Unparseable lines come through as None so the consumer counts and commits past them
+            records.append((self._position, record if isinstance(record, dict) else None))
+        return records
+
+    def _ensure_open(self):
+        """Open the file, reopening from the start after rotation or truncation"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        if self._file is not None and (stat.st_ino != self._inode or stat.st_size < self._position):
+            print(f"⚠ {self.path} was rotated or truncated - reading from the start")
+            self.close()
+            self._position = 0
+            self.committed = 0
+
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+            self._inode = stat.st_ino
+            if stat.st_size < self._position:
+                # Committed offset is beyond the current file - it was replaced while stopped
+                print(f"⚠ {self.path} is shorter than the committed offset - reading from the start")
+                self._position = 0
+                self.committed = 0
+        return True
+
+    def _load_offset(self):
+        try:
+            with open(self.offset_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+class QueueSource:
+    """
+    In-process stand-in for a message broker partition
+
+    Producers call put(); each record gets the next sequence number as
+    its offset. Nothing is redelivered after a crash (the queue lives in
+    memory) - it exists to drive the daemon in tests, demos and
+    benchmarks with the same interface as a durable source.
+    """
+
+    def __init__(self, maxsize=0):
+        """
+        Args:
+            maxsize: Records buffered before put() blocks (0 = unbounded)
+        """
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.produced = 0
+        self.committed = 0
+
+    def put(self, record, timeout=None):
+        """Append a record to the stream"""
+        with self._lock:
+            self.produced += 1
+            offset = self.produced
+        self._queue.put((offset, record), timeout=timeout)
+
+    def poll(self, max_records, timeout=0.0):
+        """Take up to max_records, waiting up to timeout for the first"""
+        try:
+            records = [self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        while len(records) < max_records:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def commit(self, offset):
+        self.committed = offset
+
+    def lag(self):
+        """Records produced but not yet committed"""
+        return self.produced - self.committed
+
+    def close(self):
+        pass
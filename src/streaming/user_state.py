@@ -0,0 +1,206 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Per-User Feature State for Streaming Detection
+"""
+
+import math
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.feature_engineering import CATEGORY_VOCABULARY
+
+# Hours since the previous transaction for a user's first one (FeatureEngineer's fill value)
+FIRST_TRANSACTION_GAP_HOURS = 24
+
+class UserFeatureState:
+    """
+    Running per-user statistics, so streamed transactions get user features from history
+
+    FeatureEngineer computes user features from whichever batch it is
+    given. A stream has no natural batch, so this keeps each user's
+    count, mean and variance (Welford's method) and last timestamp, and
+    every transaction is featurized against everything the user did up
+    to and including it. The columns match FeatureEngineer's, so the
+    trained models score the output directly.
+
+    At most `max_users` users are kept; the least recently active are
+    evicted first and start over when they return. State can be
+    snapshotted to disk so a restarted daemon keeps its history.
+    """
+
+    def __init__(self, max_users=1000000):
+        """
+        Args:
+            max_users: Users kept in memory before evicting the least recent
+        """
+        self.max_users = max_users
+        self.evicted = 0
+        self._users = OrderedDict()  # user_id -> [count, mean, m2, last_timestamp]
+        self._lock = threading.Lock()
+        self._codes = {column: {value: code for code, value in enumerate(values)}
+                       for column, values in CATEGORY_VOCABULARY.items()}
+
+    def __len__(self):
+        return len(self._users)
+
+    def featurize(self, df):
+        """
+        Fold transactions into the state and return their features
+
+        Rows are applied in order, so a user's earlier rows in the same
+        batch count as history for the later ones. A timestamp older
+        than the user's last one (out-of-order delivery) gets a gap of 0.
+
+        Args:
+            df: Transactions with user_id, amount, timestamp and the
+                categorical columns
+
+        Returns:
+            DataFrame of df's columns plus FeatureEngineer's feature columns
+        """
+        features, pending = self.featurize_pending(df)
+        self.apply(pending)
+        return features
+
+    def featurize_pending(self, df):
+        """
+        featurize() without changing the state
+
+        The batch's per-user totals come back separately, so a caller can
+        apply() them only once the batch has been handled - a batch that
+        fails and is retried is then not counted twice.
+
+        Args:
+            df: Transactions, as for featurize()
+
+        Returns:
+            (features DataFrame, pending update for apply())
+        """
+        df = df.copy()
+        timestamps = pd.to_datetime(df['timestamp'])
+        amounts = df['amount'].to_numpy(dtype=float)
+        seconds = (timestamps - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+
+        n = len(df)
+        avg = np.empty(n)
+        std = np.empty(n)
+        count = np.empty(n)
+        gap = np.empty(n)
+
+        # Per user: running state including this batch, and the batch alone
+        running = {}
+        pending = {}
+        with self._lock:
+            for i, (user_id, amount, ts) in enumerate(zip(df['user_id'].tolist(), amounts, seconds)):
+                state = running.get(user_id)
+                if state is None:
+                    stored = self._users.get(user_id)
+                    state = list(stored) if stored is not None else [0, 0.0, 0.0, None]
+                    running[user_id] = state
+                    pending[user_id] = [0, 0.0, 0.0, None]
+
+                gap[i] = FIRST_TRANSACTION_GAP_HOURS if state[3] is None else max(ts - state[3], 0) / 3600
+                for target in (state, pending[user_id]):
+                    _welford_update(target, amount, ts)
+
+                count[i] = state[0]
+                avg[i] = state[1]
+                # Sample std like pandas; undefined for one transaction (0 after fillna)
+                std[i] = math.sqrt(state[2] / (state[0] - 1)) if state[0] > 1 else np.nan
+
+        df['hour_of_day'] = timestamps.dt.hour.to_numpy()
+        df['day_of_week'] = timestamps.dt.dayofweek.to_numpy()
+        df['is_weekend'] = np.isin(df['day_of_week'], [5, 6]).astype(int)
+        df['is_night'] = (df['hour_of_day'] < 6).astype(int)
+        df['amount_log'] = np.log1p(amounts)
+        df['amount_sqrt'] = np.sqrt(amounts)
+
+        df['user_avg_amount'] = avg
+        df['user_std_amount'] = std
+        df['user_transaction_count'] = count
+        df['user_total_transactions'] = count
+        df['amount_vs_user_avg'] = amounts / (avg + 1)
+        df['amount_zscore_user'] = (amounts - avg) / (std + 1)
+        df['time_since_last_transaction'] = gap
+
+        for column, codes in self._codes.items():
+            df[f'{column}_encoded'] = [codes.get(value, -1) for value in df[column].tolist()]
+
+        df['amount_x_hour'] = amounts * df['hour_of_day']
+        df['amount_x_is_night'] = amounts * df['is_night']
+        return df, pending
+
+    def apply(self, pending):
+        """
+        Fold a featurize_pending() batch into the state
+
+        Batch totals are merged into whatever the state holds now (Chan's
+        parallel variance update), so batches applied concurrently or
+        out of order don't lose each other's transactions.
+
+        Args:
+            pending: Second value returned by featurize_pending()
+        """
+        with self._lock:
+            for user_id, batch in pending.items():
+                state = self._users.get(user_id)
+                if state is None:
+                    self._users[user_id] = list(batch)
+                    if len(self._users) > self.max_users:
+                        self._users.popitem(last=False)
+                        self.evicted += 1
+                    continue
+
+                self._users.move_to_end(user_id)
+                total = state[0] + batch[0]
+                delta = batch[1] - state[1]
+                state[1] += delta * batch[0] / total
+                state[2] += batch[2] + delta * delta * state[0] * batch[0] / total
+                state[0] = total
+                state[3] = batch[3] if state[3] is None else max(state[3], batch[3])
+
+    def snapshot(self, path):
+        """Write the state to disk atomically"""
+        with self._lock:
+            data = pickle.dumps({'users': self._users, 'evicted': self.evicted},
+                                protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def restore(self, path):
+        """
+        Load a snapshot written by snapshot()
+
+        Returns:
+            True if a snapshot was found
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return False
+
+        with self._lock:
+            self._users = data['users']
+            self.evicted = data['evicted']
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evicted += 1
+        return True
+
+def _welford_update(state, amount, ts):
+    """Add one transaction to a [count, mean, m2, last_timestamp] state in place"""
+    state[0] += 1
+    delta = amount - state[1]
+    state[1] += delta / state[0]
+    state[2] += delta * (amount - state[1])
+    state[3] = ts if state[3] is None else max(ts, state[3])
@@ -0,0 +1,408 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Performance Benchmarks for the Hot Paths
+
+Skipped unless RUN_BENCHMARKS=true:
+
+    RUN_BENCHMARKS=true python -m pytest -q tests/benchmarks
+    python tests/benchmarks/test_benchmarks.py --sizes 1000 10000 --save-baseline
+
+Every run writes its timings to tests/benchmarks/results/ (a timestamped
+file and latest.json). If results/baseline.json exists (or
+BENCHMARK_BASELINE names another file), each timing is compared with it
+and a benchmark fails when its best time is more than
+BENCHMARK_THRESHOLD slower (after one re-measurement). Baselines are
+only meaningful on the machine that recorded them; on shared or
+throttled hosts raise BENCHMARK_THRESHOLD.
+
+Other knobs: BENCHMARK_SIZES (rows, comma-separated), BENCHMARK_REPEAT,
+BENCHMARK_MIN_TIME and BENCHMARK_RESULTS_DIR.
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+sys.path.append('src')
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import pytest
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(BENCHMARK_DIR, '..', '..'))
+
+RUN_BENCHMARKS = os.getenv('RUN_BENCHMARKS', 'False').lower() == 'true'
+SIZES = [int(size) for size in os.getenv('BENCHMARK_SIZES', '1000,10000').split(',')]
+REPEAT = int(os.getenv('BENCHMARK_REPEAT', '5'))
+MIN_TIME = float(os.getenv('BENCHMARK_MIN_TIME', '0.5'))
+RESULTS_DIR = os.getenv('BENCHMARK_RESULTS_DIR', os.path.join(BENCHMARK_DIR, 'results'))
+BASELINE_PATH = os.getenv('BENCHMARK_BASELINE', os.path.join(RESULTS_DIR, 'baseline.json'))
+THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', '0.25'))
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_DELTA_SECONDS = 0.002
+
+# Sequential single-transaction requests per /detect measurement
+DETECT_REQUESTS = 100
+
+pytestmark = pytest.mark.skipif(not RUN_BENCHMARKS, reason="set RUN_BENCHMARKS=true to run benchmarks")
+
+# ---------------------------------------------------------------------------
+# Shared inputs - built once per size, outside the timed region
+# ---------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def _dataset(size):
+    """Generated transactions, their features and the feature matrix"""
+    from data_pipeline.data_generator import TransactionGenerator
+    from data_pipeline.feature_engineering import FeatureEngineer
+
+    n_fraud = max(size // 20, 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = TransactionGenerator(seed=42).generate_dataset(n_normal=size - n_fraud, n_fraud=n_fraud)
+        engineer = FeatureEngineer()
+        df_features = engineer.create_features(df)
+    return {
+        'df': df,
+        'features': df_features,
+        'X': engineer.get_feature_matrix(df_features)
+    }
+
+@functools.lru_cache(maxsize=None)
+def _fitted(name, size):
+    """Detector fitted on the dataset of this size"""
+    X = _dataset(size)['X']
+    detector = _new_detector(name)
+    with contextlib.redirect_stdout(io.StringIO()):
+        detector.fit(X)
+    return detector
+
+def _new_detector(name):
+    from models.isolation_forest_detector import IsolationForestDetector
+    from models.lof_detector import LOFDetector
+    from models.ensemble_detector import EnsembleDetector
+    return {
+        'isolation_forest': IsolationForestDetector,
+        'lof': LOFDetector,
+        'ensemble': EnsembleDetector
+    }[name]()
+
+def _transactions(size, prefix):
+    """JSON-ready /detect payloads with ids unique to this call (no result cache hits)"""
+    records = _dataset(size)['df'].drop(columns=['is_fraud']).copy()
+    records['timestamp'] = records['timestamp'].astype(str)
+    records['transaction_id'] = [f'{prefix}_{time.time_ns()}_{i}' for i in range(len(records))]
+    return records.to_dict('records')
+
+_api = {}
+
+def _api_client():
+    """In-process TestClient for the API, started once (needs trained models)"""
+    if 'client' not in _api:
+        if not os.path.exists(os.path.join(PROJECT_ROOT, 'models', 'isolation_forest.pkl')):
+            pytest.skip("no trained models - run scripts/train_models_aggressive.py")
+
+        _api['outbox'] = tempfile.TemporaryDirectory()
+        os.environ.setdefault('ALERT_OUTBOX_DIR', _api['outbox'].name)
+        os.environ.setdefault('MODEL_RELOAD_INTERVAL', '0')
+
+        from fastapi.testclient import TestClient
+        with contextlib.redirect_stdout(io.StringIO()):
+            from api import main
+            client = TestClient(main.app)
+            client.__enter__()
+        _api['client'] = client
+    return _api['client']
+
+def _close_api():
+    if 'client' in _api:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _api.pop('client').__exit__(None, None, None)
+        _api.pop('outbox').cleanup()
+
+# ---------------------------------------------------------------------------
+# Benchmarks - each takes a size, does its setup and returns the callable
+# to time. Unsized ones get size None.
+# ---------------------------------------------------------------------------
+
+def bench_generate(size):
+    from data_pipeline.data_generator import TransactionGenerator
+    n_fraud = max(size // 20, 1)
+    return lambda: TransactionGenerator(seed=42).generate_dataset(n_normal=size - n_fraud, n_fraud=n_fraud)
+
+def bench_create_features(size):
+    from data_pipeline.feature_engineering import FeatureEngineer
+    df = _dataset(size)['df']
+    return lambda: FeatureEngineer().create_features(df)
+
+def _bench_fit(name):
+    def bench(size):
+        X = _dataset(size)['X']
+        return lambda: _new_detector(name).fit(X)
+    return bench
+
+def _bench_score(name):
+    def bench(size):
+        X = _dataset(size)['X']
+        detector = _fitted(name, size)
+        return lambda: detector.predict_proba(X)
+    return bench
+
+def bench_score_transactions(size):
+    from scoring.anomaly_scorer import AnomalyScorer
+    data = _dataset(size)
+    scores = _fitted('isolation_forest', size).predict_proba(data['X'])
+    return lambda: AnomalyScorer().score_transactions(data['features'], scores)
+
+def bench_api_detect(size):
+    client = _api_client()
+    payloads = _transactions(DETECT_REQUESTS, 'bench_detect')
+    calls = iter(range(10 ** 9))
+
+    def run():
+        # Fresh ids each repetition, so nothing comes from the result cache
+        suffix = next(calls)
+        for payload in payloads:
+            response = client.post('/detect', json=dict(payload, transaction_id=f"{payload['transaction_id']}_{suffix}"))
+            assert response.status_code == 200, response.text
+    return run
+
+def bench_api_detect_batch(size):
+    client = _api_client()
+    transactions = _transactions(size, 'bench_batch')
+
+    def run():
+        response = client.post('/detect/batch', json={'transactions': transactions})
+        assert response.status_code == 200, response.text
+    return run
+
+# name -> (bench function, rows per measurement; None = the size)
+BENCHMARKS = {
+    'generate': (bench_generate, None),
+    'create_features': (bench_create_features, None),
+    'isolation_forest_fit': (_bench_fit('isolation_forest'), None),
+    'isolation_forest_score': (_bench_score('isolation_forest'), None),
+    'lof_fit': (_bench_fit('lof'), None),
+    'lof_score': (_bench_score('lof'), None),
+    'ensemble_fit': (_bench_fit('ensemble'), None),
+    'ensemble_score': (_bench_score('ensemble'), None),
+    'score_transactions': (bench_score_transactions, None),
+    'api_detect': (bench_api_detect, DETECT_REQUESTS),
+    'api_detect_batch': (bench_api_detect_batch, None)
+}
+
+def cases(sizes=SIZES, names=None):
+    """(name, size) pairs to run; fixed-row benchmarks run once with size None"""
+    selected = [name for name in BENCHMARKS if names is None or name in names]
+    return [(name, size) for name in selected
+            for size in (sizes if BENCHMARKS[name][1] is None else [None])]
+
+def case_key(name, size):
+    return name if size is None else f'{name}[{size}]'
+
+# ---------------------------------------------------------------------------
+# Measuring, persisting and comparing
+# ---------------------------------------------------------------------------
+
+def run_benchmark(name, size, repeat=REPEAT, min_time=MIN_TIME):
+    """
+    Time one benchmark: one warm-up call, then at least `repeat` timed calls
+
+    Fast benchmarks keep repeating (up to 200 calls) until `min_time`
+    seconds have been timed, so their best time is stable enough to
+    compare across runs.
+
+    Returns:
+        Dict with min / median seconds, rows and rows per second (from min)
+    """
+    bench, fixed_rows = BENCHMARKS[name]
+    rows = fixed_rows or size
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = bench(size)
+        run()
+        timings = []
+        while len(timings) < repeat or (sum(timings) < min_time and len(timings) < 200):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        'min': best,
+        'median': statistics.median(timings),
+        'repeat': len(timings),
+        'rows': rows,
+        'rows_per_second': rows / best if best > 0 else None
+    }
+
+def load_baseline(path=BASELINE_PATH):
+    """Saved results to compare against, or None"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def find_regression(key, result, baseline, threshold=THRESHOLD):
+    """
+    Describe how `result` regressed against the baseline, or None
+
+    Best times are compared (the least noisy statistic); a benchmark
+    missing from the baseline is never a regression.
+    """
+    if baseline is None or key not in baseline['results']:
+        return None
+    old = baseline['results'][key]['min']
+    new = result['min']
+    if new <= old * (1 + threshold) or new - old < MIN_DELTA_SECONDS:
+        return None
+    return (f"{key}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms "
+            f"(+{(new / old - 1) * 100:.0f}%, limit +{threshold * 100:.0f}%)")
+
+def measure(name, size, baseline, threshold=THRESHOLD, repeat=REPEAT):
+    """
+    Run a benchmark and check it, re-measuring once before reporting a regression
+
+    A slowdown that shows up in both measurements is real; one that
+    doesn't was another process stealing the CPU.
+
+    Returns:
+        (result, regression message or None)
+    """
+    key = case_key(name, size)
+    result = run_benchmark(name, size, repeat=repeat)
+    regression = find_regression(key, result, baseline, threshold)
+    if regression is not None:
+        retry = run_benchmark(name, size, repeat=repeat)
+        if retry['min'] < result['min']:
+            result = retry
+        regression = find_regression(key, result, baseline, threshold)
+    return result, regression
+
+def save_results(results, results_dir=RESULTS_DIR, baseline=False):
+    """
+    Write results as <timestamp>.json and latest.json (and baseline.json)
+
+    Returns:
+        Path of the timestamped file
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    document = {
+        'created_at': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    targets = [path, os.path.join(results_dir, 'latest.json')]
+    if baseline:
+        targets.append(os.path.join(results_dir, 'baseline.json'))
+    for target in targets:
+        tmp_path = f'{target}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(document, f, indent=2)
+        os.replace(tmp_path, target)
+    return path
+
+# ---------------------------------------------------------------------------
+# pytest entry point
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope='module')
+def benchmark_results():
+    """Collects every case's timing and persists them once the module finishes"""
+    results = {}
+    yield results
+    _close_api()
+    if results:
+        print(f"\n✓ Benchmark results saved to {save_results(results)}")
+
+@pytest.mark.parametrize('name,size', cases(), ids=[case_key(n, s) for n, s in cases()])
+def test_benchmark(name, size, benchmark_results):
+    """Time one hot path and fail if it regressed against the baseline"""
+    key = case_key(name, size)
+    result, regression = measure(name, size, load_baseline())
+    benchmark_results[key] = result
+    print(f"\n[BENCH] {key}: {result['min'] * 1000:.2f} ms")
+    assert regression is None, f"Performance regression - {regression}"
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the hot-path benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=None,
+                        help="Run only these benchmarks")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--compare', default=BASELINE_PATH,
+                        help="Results file to compare against (skipped if missing)")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="Allowed slowdown as a fraction (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Also write these results as results/baseline.json")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("HOT PATH BENCHMARKS")
+    print("ZeTheta Algorithms Pvt Ltd - CONFIDENTIAL")
+    print("="*60)
+
+    baseline = None if args.save_baseline else load_baseline(args.compare)
+    if baseline is not None:
+        print(f"Comparing with {args.compare} ({baseline.get('commit')}, {baseline['created_at']})")
+
+    print(f"\n{'Benchmark':<32} {'Best':>10} {'Median':>10} {'Rows/s':>12} {'vs base':>8}")
+    results = {}
+    regressions = []
+    try:
+        for name, size in cases(args.sizes, args.only):
+            key = case_key(name, size)
+            try:
+                result, regression = measure(name, size, baseline, args.threshold, args.repeat)
+            except pytest.skip.Exception as e:
+                print(f"{key:<32} ⚠ skipped - {e}")
+                continue
+            results[key] = result
+
+            change = ''
+            if baseline is not None and key in baseline['results']:
+                change = f"{(result['min'] / baseline['results'][key]['min'] - 1) * 100:+.0f}%"
+            if regression:
+                regressions.append(regression)
+            print(f"{key:<32} {result['min'] * 1000:>8.1f}ms {result['median'] * 1000:>8.1f}ms "
+                  f"{result['rows_per_second'] or 0:>12,.0f} {change:>8}{' ✗' if regression else ''}")
+    finally:
+        _close_api()
+
+    print(f"\n✓ Results saved to {save_results(results, baseline=args.save_baseline)}")
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond +{args.threshold * 100:.0f}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("✓ No regressions" if baseline is not None else "⚠ No baseline to compare with")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,488 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Unit Tests for Alert Management
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append('src')
+
+from alerts.connection_pool import ConnectionPool
+from alerts.alert_manager import AlertManager
+from alerts.alert_writer import AlertWriter
+from alerts.alert_suppressor import AlertSuppressor
+from alerts.alert_statistics import AlertStatistics
+from alerts.alert_outbox import AlertOutbox
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+from psycopg2.pool import PoolError
+import threading
+import time
+import tempfile
+import pandas as pd
+from datetime import datetime
+
+class FakeCursor:
+    """Cursor stand-in that records executed statements"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.connection = conn
+        self._rows = []
+
+    def mogrify(self, template, args):
+        self._rows.append(args)
+        return repr(args).encode()
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise Exception("connection lost")
+        self.conn.executed.append((query, params))
+        self.conn.status = TRANSACTION_STATUS_INTRANS
+        self.conn.inserted.extend(self._rows if self._rows else [params])
+
+    def fetchone(self):
+        self.conn.next_id += 1
+        return (self.conn.next_id,)
+
+    def fetchall(self):
+        rows = self._rows
+        self._rows = []
+        ids = [(self.conn.next_id + i + 1,) for i in range(len(rows))]
+        self.conn.next_id += len(rows)
+        return ids
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """psycopg2 connection stand-in (no database needed)"""
+
+    def __init__(self, **kwargs):
+        self.closed = 0
+        self.broken = False
+        self.executed = []
+        self.inserted = []
+        self.next_id = 0
+        self.encoding = 'UTF8'
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+class FakeAlertManager:
+    """AlertManager stand-in that records bulk inserts"""
+
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self.available = True
+        self.fail_after = fail_after
+
+    def create_alerts(self, alerts):
+        if not self.available:
+            return None
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            return None
+        self.batches.append(list(alerts))
+        return list(range(len(alerts)))
+
+    def flush_suppressed_hits(self):
+        pass
+
+def _alert(i):
+    return {'transaction_id': f'TXN_{i:06d}', 'score': 0.95, 'risk_level': 'CRITICAL', 'priority': 1}
+
+def test_connection_pool_reuse():
+    """Test connections are reused and bounded by max_size"""
+    print("\n[TEST] Connection Pool Reuse")
+
+    opened = []
+    def connect(**kwargs):
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    pool = ConnectionPool({}, min_size=2, max_size=3, timeout=0.1, connect=connect)
+    assert pool.size == 2, "min_size connections should be opened up front"
+
+    for _ in range(20):
+        with pool.connection() as conn:
+            conn.cursor().execute("SELECT 1")
+
+    assert len(opened) == 2, "Idle connections should be reused"
+
+    held = [pool.getconn() for _ in range(3)]
+    assert pool.size == 3, "Pool should grow up to max_size"
+
+    start = time.monotonic()
+    try:
+        pool.getconn()
+        assert False, "Checkout beyond max_size should time out"
+    except PoolError:
+        pass
+    assert time.monotonic() - start >= 0.1, "Checkout gave up before timeout"
+
+    for conn in held:
+        pool.putconn(conn)
+    assert pool.idle_count == 3
+
+    pool.close()
+    assert all(conn.closed for conn in opened), "close() should close idle connections"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_connection_pool_health_check():
+    """Test stale and dirty connections are not handed out"""
+    print("\n[TEST] Connection Pool Health Check")
+
+    pool = ConnectionPool({}, min_size=1, max_size=2, health_check_interval=0,
+                          connect=lambda **kwargs: FakeConnection())
+
+    conn = pool.getconn()
+    conn.cursor().execute("INSERT ...")
+    pool.putconn(conn)
+    assert conn.rollbacks >= 1, "Open transaction should be rolled back on return"
+
+    # Connection dies while idle - health check must replace it
+    conn.broken = True
+    fresh = pool.getconn()
+    assert fresh is not conn, "Broken connection should be discarded"
+    assert conn.closed, "Broken connection should be closed"
+    assert pool.size == 1, "Discarded connection should free its slot"
+    pool.putconn(fresh)
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_connection_pool_threads():
+    """Test concurrent checkouts never exceed max_size"""
+    print("\n[TEST] Connection Pool Threads")
+
+    pool = ConnectionPool({}, min_size=0, max_size=4, timeout=5,
+                          connect=lambda **kwargs: FakeConnection())
+    in_use = []
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            with pool.connection():
+                with lock:
+                    in_use.append(1)
+                    peak.append(len(in_use))
+                time.sleep(0.0005)
+                with lock:
+                    in_use.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(peak) <= 4, "More connections in use than max_size"
+    assert pool.size <= 4
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_create_alerts_bulk():
+    """Test bulk alert creation uses one statement for all rows"""
+    print("\n[TEST] Bulk Alert Creation")
+
+    conn = FakeConnection()
+    pool = ConnectionPool({}, min_size=1, max_size=1, connect=lambda **kwargs: conn)
+    manager = AlertManager(pool=pool)
+
+    df_scored = pd.DataFrame({
+        'transaction_id': [f'TXN_{i:06d}' for i in range(6)],
+        'anomaly_score': [0.95, 0.2, 0.8, 0.6, 0.99, 0.1],
+        'risk_level': ['CRITICAL', 'NORMAL', 'HIGH', 'MEDIUM', 'CRITICAL', 'NORMAL'],
+        'priority': [1, 5, 2, 3, 1, 5]
+    })
+
+    records = AlertManager.build_alert_records(df_scored)
+    assert [r['transaction_id'] for r in records] == ['TXN_000000', 'TXN_000002', 'TXN_000004']
+
+    alert_ids = manager.create_alerts(records)
+
+    assert alert_ids == [1, 2, 3], "Expected one alert_id per record in order"
+    assert len(conn.executed) == 1, "Bulk insert should be a single statement"
+    assert conn.inserted[1] == ('TXN_000002', 'MODEL_BASED', 'HIGH', 2, 'OPEN')
+    assert manager.create_alerts([]) == [], "Empty input should not hit the database"
+
+    conn.broken = True
+    assert manager.create_alerts(records) is None, "Errors should return None"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_alert_writer_batches():
+    """Test the writer flushes in bulk and drains on stop"""
+    print("\n[TEST] Alert Writer Batching")
+
+    manager = FakeAlertManager()
+    writer = AlertWriter(manager, batch_size=50, flush_interval=0.05)
+    writer.start()
+
+    for i in range(120):
+        assert writer.submit(_alert(i)), "Alert should be accepted"
+
+    writer.stop()
+
+    written = [a['transaction_id'] for batch in manager.batches for a in batch]
+    assert written == [_alert(i)['transaction_id'] for i in range(120)], "Alerts lost or reordered"
+    assert max(len(batch) for batch in manager.batches) <= 50, "Batch exceeded batch_size"
+    assert len(manager.batches) < 120, "Alerts should be written in bulk"
+    assert writer.stats['written'] == 120
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_alert_writer_spill():
+    """Test overflow and failed writes spill to disk and replay later"""
+    print("\n[TEST] Alert Writer Spill")
+
+    manager = FakeAlertManager()
+    manager.available = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, 'spill.jsonl')
+        writer = AlertWriter(manager, max_queue_size=5, put_timeout=0.01, spill_path=spill_path)
+
+        # Writer not started - queue fills, the rest spills
+        for i in range(8):
+            assert writer.submit(_alert(i))
+        assert writer.queue_depth == 5
+        assert writer.stats['spilled'] == 3
+
+        # Database down on shutdown - queued alerts spill too
+        writer.stop()
+        assert writer.stats['spilled'] == 8
+        assert writer.stats['dropped'] == 0
+
+        manager.available = True
+        assert writer.replay_spill() == 8, "All spilled alerts should replay"
+        assert not os.path.exists(spill_path)
+
+    replayed = sorted(a['transaction_id'] for batch in manager.batches for a in batch)
+    assert replayed == [_alert(i)['transaction_id'] for i in range(8)]
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_alert_suppression():
+    """Test repeat alerts for one user coalesce into a single row"""
+    print("\n[TEST] Alert Suppression")
+
+    now = [0.0]
+    suppressor = AlertSuppressor(ttl_seconds=60, clock=lambda: now[0])
+    conn = FakeConnection()
+    pool = ConnectionPool({}, min_size=1, max_size=1, connect=lambda **kwargs: conn)
+    manager = AlertManager(pool=pool, suppressor=suppressor)
+
+    # Card-testing burst: 100 CRITICAL alerts from one user, 1 from another
+    burst = [dict(_alert(i), user_id='USER_0001') for i in range(100)]
+    burst.append(dict(_alert(100), user_id='USER_0002'))
+    alert_ids = manager.create_alerts(burst)
+
+    assert len(set(alert_ids[:100])) == 1, "Burst should map to one alert"
+    assert alert_ids[100] != alert_ids[0], "Other users must not be suppressed"
+    insert_rows = [row for row in conn.inserted if row[1] == 'MODEL_BASED']
+    assert len(insert_rows) == 2, "Only one row per (user, severity) should be inserted"
+    assert (alert_ids[0], 99) in conn.inserted, "Repeats should become a hit_count update"
+
+    # Later single alerts are absorbed without any database write
+    statements = len(conn.executed)
+    assert manager.create_alert('TXN_X', 0.97, 'CRITICAL', 1, user_id='USER_0001') == alert_ids[0]
+    assert len(conn.executed) == statements, "Suppressed alert should not touch the database"
+
+    # Different severity is a different key
+    high_id = manager.create_alert('TXN_Y', 0.8, 'HIGH', 2, user_id='USER_0001')
+    assert high_id not in alert_ids
+
+    # After the TTL the user gets a fresh alert
+    now[0] = 61.0
+    fresh_id = manager.create_alert('TXN_Z', 0.97, 'CRITICAL', 1, user_id='USER_0001')
+    assert fresh_id not in alert_ids, "Expired key should produce a new alert"
+    assert len(conn.executed) > statements
+
+    manager.flush_suppressed_hits()
+    assert suppressor.collect_hits() == {}, "Hits should be flushed"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_page_cursor_roundtrip():
+    """Test keyset page cursors survive the API token round trip"""
+    print("\n[TEST] Page Cursor Round Trip")
+
+    cursor = (2, datetime(2026, 1, 15, 9, 30, 12, 345678), 98765)
+    token = AlertManager.encode_cursor(cursor)
+
+    assert AlertManager.decode_cursor(token) == cursor, "Cursor changed in round trip"
+    assert AlertManager.encode_cursor(None) is None
+    assert AlertManager.decode_cursor(None) is None
+
+    try:
+        AlertManager.decode_cursor('not-a-cursor')
+        assert False, "Malformed cursor should be rejected"
+    except ValueError:
+        pass
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_alert_statistics():
+    """Test counters track writes and reconcile against the table"""
+    print("\n[TEST] Alert Statistics")
+
+    now = [0.0]
+    table = [('OPEN', 'CRITICAL', 10), ('RESOLVED', 'HIGH', 4)]
+    queries = []
+
+    def count_fn():
+        queries.append(1)
+        return list(table)
+
+    stats = AlertStatistics(count_fn, reconcile_interval=60, clock=lambda: now[0])
+
+    snapshot = stats.snapshot()
+    assert {'status': 'OPEN', 'severity': 'CRITICAL', 'count': 10} in snapshot
+    assert len(queries) == 1, "First read should reconcile"
+
+    stats.record_created('CRITICAL', 3)
+    stats.record_created('HIGH')
+    stats.record_status_change('OPEN', 'RESOLVED', 'CRITICAL')
+    counts = {(r['status'], r['severity']): r['count'] for r in stats.snapshot()}
+
+    assert counts[('OPEN', 'CRITICAL')] == 12
+    assert counts[('OPEN', 'HIGH')] == 1
+    assert counts[('RESOLVED', 'CRITICAL')] == 1
+    assert len(queries) == 1, "Fresh counters should not query the table"
+
+    # Stale counters reconcile in the background and drop drift
+    table.append(('OPEN', 'LOW', 7))
+    now[0] = 61.0
+    stats.snapshot()
+    for _ in range(100):
+        if len(queries) == 2 and not stats._reconciling:
+            break
+        time.sleep(0.01)
+    counts = {(r['status'], r['severity']): r['count'] for r in stats.snapshot()}
+
+    assert len(queries) == 2, "Stale counters should reconcile once"
+    assert counts == {('OPEN', 'CRITICAL'): 10, ('RESOLVED', 'HIGH'): 4, ('OPEN', 'LOW'): 7}
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_alert_outbox_replay():
+    """Test the outbox survives DB outages and crashes without losing alerts"""
+    print("\n[TEST] Alert Outbox Replay")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = AlertOutbox(tmp, segment_max_records=40, fsync_batch=10)
+        outbox.append_many([_alert(i) for i in range(100)])
+        assert len(outbox.pending_segments()) == 2, "Full segments should rotate"
+
+        # Database fails part-way through - only the unwritten tail is kept
+        manager = FakeAlertManager(fail_after=3)
+        # Segments of 40/40/20 in batches of 25 - the 4th insert fails
+        assert outbox.replay(manager, batch_size=25) == 65
+        assert outbox.pending_count() == 35
+
+        # Simulate a crash: more alerts land in an open segment, process dies
+        outbox.append_many([_alert(i) for i in range(100, 110)])
+        outbox._file.flush()
+        outbox._file = None
+
+        recovered = AlertOutbox(tmp)
+        assert recovered.pending_count() == 45, "Open segment should be recovered"
+
+        manager.fail_after = None
+        assert recovered.replay(manager) == 45
+        assert recovered.pending_count() == 0
+        assert recovered.pending_segments() == []
+
+    written = sorted(a['transaction_id'] for batch in manager.batches for a in batch)
+    assert written == sorted(_alert(i)['transaction_id'] for i in range(110)), "Alerts lost or duplicated"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_alert_writer_outbox():
+    """Test write-ahead mode goes through the outbox"""
+    print("\n[TEST] Alert Writer Outbox Mode")
+
+    manager = FakeAlertManager()
+    manager.available = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = AlertWriter(manager, flush_interval=0.02, outbox=AlertOutbox(tmp))
+        writer.start()
+        for i in range(30):
+            assert writer.submit(_alert(i))
+        time.sleep(0.1)
+        assert manager.batches == [], "Database is down"
+
+        manager.available = True
+        writer.stop()
+        assert writer.stats['written'] == 30
+        assert AlertOutbox(tmp).pending_count() == 0
+
+    print("  ✓ All tests passed")
+    return True
+
+def run_all_tests():
+    """Run all alert tests"""
+    print("="*60)
+    print("RUNNING ALERT TESTS")
+    print("="*60)
+
+    tests = [
+        test_connection_pool_reuse,
+        test_connection_pool_health_check,
+        test_connection_pool_threads,
+        test_create_alerts_bulk,
+        test_alert_writer_batches,
+        test_alert_writer_spill,
+        test_alert_suppression,
+        test_page_cursor_roundtrip,
+        test_alert_statistics,
+        test_alert_outbox_replay,
+        test_alert_writer_outbox
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"  ✗ Test failed: {e}")
+            failed += 1
+
+    print("\n" + "="*60)
+    print(f"TEST RESULTS: {passed} passed, {failed} failed")
+    print("="*60)
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -11,6 +11,9 @@ sys.path.append('src')  # Also try relative path
 from models.isolation_forest_detector import IsolationForestDetector
 from models.lof_detector import LOFDetector
 from models.ensemble_detector import EnsembleDetector
+from models.cascade_detector import CascadeDetector
+from models.model_registry import ModelRegistry, UNVERSIONED
+from models.training_pipeline import Stage, StagePipeline
 from sklearn.datasets import make_classification
 import numpy as np
 
@@ -45,6 +48,88 @@ def test_isolation_forest():
     print("  ✓ All tests passed")
     return True
 
+def test_isolation_forest_single_pass():
+    """Test combined predictions/scores match the separate calls"""
+    print("\n[TEST] Isolation Forest Single-Pass Scoring")
+    
+    X, _ = make_classification(n_samples=500, n_features=10, random_state=42)
+    
+    detector = IsolationForestDetector(contamination=0.05)
+    detector.fit(X)
+    
+    predictions, scores = detector.predict_with_proba(X)
+    
+    assert (predictions == detector.predict(X)).all(), "Predictions differ"
+    assert np.allclose(scores, detector.predict_proba(X)), "Scores differ"
+    
+    # A lone row has nothing to normalize against - must not be NaN
+    _, single = detector.predict_with_proba(X[:1])
+    assert not np.isnan(single).any(), "Single-row score is NaN"
+    assert not np.isnan(detector.predict_proba(X[:1])).any(), "Single-row proba is NaN"
+    
+    print("  ✓ All tests passed")
+    return True
+
+def test_isolation_forest_single_row():
+    """Test a row scores the same alone as in a batch, and outliers still alert"""
+    print("\n[TEST] Isolation Forest Single-Row Scoring")
+    
+    X, _ = make_classification(n_samples=1000, n_features=10, random_state=42)
+    
+    detector = IsolationForestDetector(contamination=0.05)
+    detector.fit(X)
+    
+    _, batch_scores = detector.predict_with_proba(X[:50])
+    for i in [0, 7, 49]:
+        _, alone = detector.predict_with_proba(X[i:i + 1])
+        assert np.isclose(alone[0], batch_scores[i]), f"Row {i} scores differ alone"
+    
+    # An obvious outlier, scored on its own, must clear the HIGH cutoff
+    fraud = X.mean(axis=0) + 8 * X.std(axis=0)
+    predictions, scores = detector.predict_with_proba(fraud.reshape(1, -1))
+    assert predictions[0] == -1, "Outlier not flagged"
+    assert scores[0] >= 0.75, f"Lone outlier scored {scores[0]:.3f}"
+    
+    # The range survives save/load and the reduced detector
+    path = os.path.join(os.path.dirname(__file__), '_if_single_row.pkl')
+    try:
+        detector.save(path)
+        loaded = IsolationForestDetector()
+        loaded.load(path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    assert loaded.score_range == detector.score_range, "Score range not persisted"
+    assert detector.reduced(25).score_range == detector.score_range, "Reduced lost score range"
+    
+    print("  ✓ All tests passed")
+    return True
+
+def test_isolation_forest_reduced():
+    """Test the reduced-tree detector used in degraded mode"""
+    print("\n[TEST] Isolation Forest Reduced Tree Set")
+    
+    X, _ = make_classification(n_samples=500, n_features=10, random_state=42)
+    
+    detector = IsolationForestDetector(contamination=0.05, n_estimators=100)
+    detector.fit(X)
+    reduced = detector.reduced(25)
+    
+    assert reduced.n_estimators == 25, "Wrong tree count"
+    assert len(reduced.model.estimators_) == 25, "Trees not sliced"
+    assert len(detector.model.estimators_) == 100, "Original detector modified"
+    assert reduced.scaler is detector.scaler, "Scaler should be shared"
+    
+    predictions, scores = reduced.predict_with_proba(X)
+    assert len(scores) == len(X), "Wrong number of scores"
+    agreement = (predictions == detector.predict(X)).mean()
+    assert agreement > 0.9, f"Reduced predictions diverge too much ({agreement:.2f})"
+    
+    assert detector.reduced(500).n_estimators == 100, "Should cap at fitted trees"
+    
+    print("  ✓ All tests passed")
+    return True
+
 def test_lof_detector():
     """Test LOF detector"""
     print("\n[TEST] LOF Detector")
@@ -104,8 +189,14 @@ def run_all_tests():
     
     tests = [
         test_isolation_forest,
+        test_isolation_forest_single_pass,
+        test_isolation_forest_single_row,
+        test_isolation_forest_reduced,
         test_lof_detector,
-        test_ensemble_detector
+        test_ensemble_detector,
+        test_cascade_detector,
+        test_model_registry,
+        test_training_pipeline_cache
     ]
     
     passed = 0
@@ -123,5 +214,183 @@ def run_all_tests():
     print(f"TEST RESULTS: {passed} passed, {failed} failed")
     print("="*60)
 
+def test_cascade_detector():
+    """Test the cascade only escalates the uncertain band to LOF"""
+    print("\n[TEST] Cascade Detector")
+    
+    X, _ = make_classification(n_samples=600, n_features=10, random_state=42)
+    
+    ensemble = EnsembleDetector(contamination=0.05)
+    ensemble.fit(X)
+    
+    # No band: pure Isolation Forest
+    cascade = CascadeDetector.from_ensemble(ensemble, band=-1)
+    predictions, scores = cascade.predict_with_proba(X)
+    if_predictions, if_scores = ensemble.if_detector.predict_with_proba(X)
+    assert (predictions == if_predictions).all(), "Empty band should match IF predictions"
+    assert np.allclose(scores, if_scores), "Empty band should match IF scores"
+    assert cascade.hit_rate == 1.0, "Nothing should be escalated"
+    
+    # Band covering everything: ensemble voting on every row
+    cascade = CascadeDetector.from_ensemble(ensemble, band=10)
+    predictions, scores = cascade.predict_with_proba(X)
+    assert (predictions == ensemble.predict(X)).all(), "Full band should match ensemble voting"
+    assert cascade.hit_rate == 0.0, "Everything should be escalated"
+    assert ((scores >= 0) & (scores <= 1)).all(), "Scores out of range"
+    
+    # LOF scores don't depend on which rows are escalated with them
+    _, alone = cascade.lof_predict_with_proba(X[:3])
+    _, together = cascade.lof_predict_with_proba(X)
+    assert np.allclose(alone, together[:3]), "LOF scores should not be batch-relative"
+    
+    cascade = CascadeDetector.from_ensemble(ensemble, band=0.03)
+    cascade.predict_with_proba(X)
+    stats = cascade.stats()
+    assert stats['rows_scored'] == len(X), "Wrong row count"
+    assert 0 < stats['rows_escalated'] < len(X), "Band should escalate some rows"
+    
+    print("  ✓ All tests passed")
+    return True
+
+def test_model_registry():
+    """Test publishing, activating, verifying and pruning model versions"""
+    print("\n[TEST] Model Registry")
+    
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        assert registry.resolve() == (UNVERSIONED, root), "No registry should serve the flat files"
+        
+        for name, content in [('isolation_forest.pkl', b'if-v1'), ('feature_engineer.pkl', b'fe-v1')]:
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(content)
+        first = registry.publish(root, version='v1', metadata={'recall': 0.9})
+        with open(os.path.join(root, 'isolation_forest.pkl'), 'wb') as f:
+            f.write(b'if-v2')
+        second = registry.publish(root)
+        assert second != first, "Default version names should be unique"
+        
+        try:
+            registry.publish(root, version='v1')
+            assert False, "Publishing an existing version should fail"
+        except ValueError:
+            pass
+        
+        registry.activate(first)
+        version, directory = registry.resolve()
+        assert version == 'v1', "CURRENT should name the activated version"
+        with open(os.path.join(directory, 'isolation_forest.pkl'), 'rb') as f:
+            assert f.read() == b'if-v1', "Published files should be immutable copies"
+        assert registry.manifest('v1')['metadata'] == {'recall': 0.9}, "Metadata not kept"
+        
+        try:
+            registry.activate('missing')
+            assert False, "Activating an unknown version should fail"
+        except KeyError:
+            pass
+        assert registry.current_version() == 'v1', "Failed activation should leave CURRENT alone"
+        
+        registry.verify('v1')
+        with open(os.path.join(directory, 'feature_engineer.pkl'), 'wb') as f:
+            f.write(b'tampered')
+        try:
+            registry.verify('v1')
+            assert False, "Changed artifacts should fail verification"
+        except ValueError:
+            pass
+        
+        for version in ['v3', 'v4']:
+            registry.publish(root, version=version)
+        assert registry.prune(keep=2) == [second, 'v3'], "Oldest inactive versions should go first"
+        assert [m['version'] for m in registry.list_versions()] == ['v1', 'v4'], "Active version must survive"
+    
+    print("  ✓ All tests passed")
+    return True
+
+# Stage functions for the pipeline test - module level so pool workers can import them
+def _numbers(n):
+    return list(range(n))
+
+def _doubled(numbers, delay):
+    import time
+    time.sleep(delay)
+    return [2 * x for x in numbers]
+
+def _parity(numbers, delay):
+    import time
+    time.sleep(delay)
+    return len(numbers) % 2
+
+def _label(parity):
+    return 'odd' if parity else 'even'
+
+def _total(doubled, offset):
+    return sum(doubled) + offset
+
+def _pipeline(cache_dir, n=4, offset=0, delay=0.0, workers=0):
+    return StagePipeline(cache_dir, [
+        Stage('numbers', _numbers, params={'n': n}),
+        Stage('doubled', _doubled, deps=['numbers'], params={'delay': delay}),
+        Stage('parity', _parity, deps=['numbers'], params={'delay': delay}),
+        Stage('label', _label, deps=['parity']),
+        Stage('total', _total, deps=['doubled'], params={'offset': offset})
+    ], workers=workers)
+
+def test_training_pipeline_cache():
+    """Test stages rerun only when their code, params or input contents change"""
+    print("\n[TEST] Stage-Cached Training Pipeline")
+    
+    import contextlib
+    import io
+    import tempfile
+    import time
+    
+    def statuses(pipeline, force=()):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = pipeline.run(force=force)
+        return {name: result['status'] for name, result in results.items()}
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pipeline = _pipeline(cache_dir)
+        assert set(statuses(pipeline).values()) == {'ran'}, "Cold cache should run everything"
+        assert pipeline.load('total') == 12 and pipeline.load('label') == 'even', "Wrong outputs"
+        
+        assert set(statuses(_pipeline(cache_dir)).values()) == {'cached'}, "Unchanged rerun should be cached"
+        
+        pipeline = _pipeline(cache_dir, offset=1)
+        assert [n for n, s in statuses(pipeline).items() if s == 'ran'] == ['total'], \
+            "A param change should only rerun its stage"
+        assert pipeline.load('total') == 13, "Stale output served"
+        
+        # numbers changes, parity reruns but produces the same value - label stays cached
+        result = statuses(_pipeline(cache_dir, n=6))
+        assert result['numbers'] == result['doubled'] == result['parity'] == result['total'] == 'ran'
+        assert result['label'] == 'cached', "Unchanged input contents should not invalidate dependents"
+        
+        result = statuses(_pipeline(cache_dir), force=['numbers'])
+        assert result['numbers'] == 'ran' and result['doubled'] == 'cached', \
+            "Forced stage with identical output should leave dependents cached"
+        
+        try:
+            _pipeline(cache_dir).run(force=['missing'])
+            assert False, "Unknown stage names should be rejected"
+        except ValueError:
+            pass
+        
+        pipeline = _pipeline(cache_dir)
+        statuses(pipeline)
+        assert pipeline.prune(keep=1) > 0, "Older entries should be pruned"
+        assert set(statuses(_pipeline(cache_dir)).values()) == {'cached'}, "Pruning dropped the live entries"
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # doubled and parity only need numbers, so two workers overlap them
+        start = time.perf_counter()
+        statuses(_pipeline(cache_dir, delay=0.6, workers=2))
+        assert time.perf_counter() - start < 1.1, "Independent stages should run in parallel"
+    
+    print("  ✓ All tests passed")
+    return True
+
 if __name__ == "__main__":
     run_all_tests()
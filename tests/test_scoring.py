@@ -0,0 +1,213 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Unit Tests for Scoring
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append('src')
+
+from scoring.top_k_tracker import TopKTracker
+from scoring.quantile_estimator import P2QuantileEstimator, AdaptiveThresholds
+from scoring.anomaly_scorer import AnomalyScorer
+from scoring.batch_job import BatchScoringJob, iter_file_chunks, source_fingerprint
+import numpy as np
+import pandas as pd
+
+def _score_batch(start, n, rng):
+    """Build a scored batch with unique transaction ids"""
+    return pd.DataFrame({
+        'transaction_id': [f'TXN_{i:06d}' for i in range(start, start + n)],
+        'anomaly_score': rng.random(n)
+    })
+
+def test_top_k_tracker():
+    """Test streaming top-K matches a full sort"""
+    print("\n[TEST] Top-K Tracker")
+
+    rng = np.random.default_rng(42)
+    batches = [_score_batch(i * 500, 500, rng) for i in range(8)]
+
+    tracker = TopKTracker(k=10)
+    for batch in batches:
+        tracker.update(batch)
+
+    top_k = tracker.get_top_k()
+    expected = pd.concat(batches).nlargest(10, 'anomaly_score')
+
+    assert len(top_k) == 10, "Top-K size mismatch"
+    assert list(top_k['transaction_id']) == list(expected['transaction_id']), "Top-K ranking mismatch"
+    assert top_k['anomaly_score'].is_monotonic_decreasing, "Top-K not sorted"
+    assert tracker.total_count == 4000, "Transaction count mismatch"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_top_k_tracker_windows():
+    """Test top-K is reported per window"""
+    print("\n[TEST] Top-K Tracker Windows")
+
+    rng = np.random.default_rng(7)
+    batch = _score_batch(0, 1000, rng)
+
+    tracker = TopKTracker(k=5, window_size=300)
+    closed = tracker.update(batch)
+
+    assert len(closed) == 3, "Expected three closed windows"
+    for i, window in enumerate(closed):
+        expected = batch.iloc[i * 300:(i + 1) * 300].nlargest(5, 'anomaly_score')
+        assert list(window['transaction_id']) == list(expected['transaction_id']), "Window ranking mismatch"
+        assert window.attrs['window_id'] == i, "Window id mismatch"
+
+    # Last 100 rows are still in the open window
+    assert tracker.window_count == 100, "Open window count mismatch"
+    expected = batch.iloc[900:].nlargest(5, 'anomaly_score')
+    assert list(tracker.get_top_k()['transaction_id']) == list(expected['transaction_id'])
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_p2_quantile_estimator():
+    """Test P-square estimate against the exact quantile"""
+    print("\n[TEST] P2 Quantile Estimator")
+
+    rng = np.random.default_rng(42)
+    scores = rng.beta(2, 5, size=20000)
+
+    for p in [0.5, 0.9, 0.99]:
+        estimator = P2QuantileEstimator(p)
+        for x in scores:
+            estimator.update(x)
+        exact = np.quantile(scores, p)
+        assert abs(estimator.value() - exact) < 0.01, f"Quantile {p} estimate off"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_adaptive_thresholds():
+    """Test adaptive thresholds hold each tier near its target rate"""
+    print("\n[TEST] Adaptive Thresholds")
+
+    rng = np.random.default_rng(7)
+    scores = rng.beta(2, 5, size=20000)
+
+    adaptive = AdaptiveThresholds(min_samples=500)
+    scorer = AnomalyScorer(adaptive_thresholds=adaptive)
+    assert scorer.thresholds['CRITICAL'] == 0.90, "Fixed thresholds expected before warm-up"
+
+    df_scored = scorer.score_transactions(pd.DataFrame({'amount': scores}), scores)
+
+    for level, rate in adaptive.target_rates.items():
+        observed = (scores >= scorer.thresholds[level]).mean()
+        assert abs(observed - rate) < 0.01, f"{level} alert rate off target"
+
+    assert scorer.thresholds['CRITICAL'] >= scorer.thresholds['HIGH'] >= scorer.thresholds['MEDIUM']
+    assert (df_scored['risk_level'] == 'CRITICAL').mean() < 0.02, "Too many CRITICAL"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_score_transactions_vectorized():
+    """Test batch scoring matches the per-score risk/priority rules"""
+    print("\n[TEST] Vectorized Transaction Scoring")
+
+    scores = np.array([0.0, 0.25, 0.49, 0.5, 0.75, 0.8999, 0.9, 1.0])
+    scorer = AnomalyScorer()
+    df_scored = scorer.score_transactions(pd.DataFrame({'amount': scores}), scores)
+
+    expected_levels = [scorer.assign_risk_level(s) for s in scores]
+    assert df_scored['risk_level'].tolist() == expected_levels, "Risk levels differ"
+    assert df_scored['priority'].tolist() == [scorer.assign_priority(l) for l in expected_levels]
+    assert df_scored['is_anomaly'].tolist() == [0, 0, 0, 1, 1, 1, 1, 1], "is_anomaly differs"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_batch_job_resume():
+    """Test a crashed batch job resumes from its checkpoint with identical output"""
+    print("\n[TEST] Resumable Batch Scoring Job")
+
+    import tempfile
+    from data_pipeline.data_generator import TransactionGenerator
+
+    model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models')
+    if not os.path.exists(os.path.join(model_dir, 'isolation_forest.pkl')):
+        print("  ⚠ Skipped - no trained models")
+        return True
+
+    def crash_after(chunks, n):
+        for i, chunk in enumerate(chunks):
+            if i == n:
+                raise RuntimeError("simulated crash")
+            yield chunk
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'transactions.csv')
+        TransactionGenerator(seed=7).generate_dataset(n_normal=580, n_fraud=20).to_csv(path, index=False)
+        source = source_fingerprint(path=path)
+
+        def job(name, workers=0):
+            return BatchScoringJob(os.path.join(root, name), model_dir=model_dir, workers=workers,
+                                   chunk_size=200, output_format='csv')
+
+        clean = job('clean', workers=1).run(iter_file_chunks(path, 200), source)
+        assert clean['chunks'] == 3 and clean['rows'] == 600, "Every chunk should be scored"
+
+        try:
+            job('resumed').run(crash_after(iter_file_chunks(path, 200), 2), source)
+            assert False, "Crash should propagate"
+        except RuntimeError:
+            pass
+        resumed = job('resumed').run(iter_file_chunks(path, 200), source)
+        assert resumed['chunks_this_run'] == 1, "Completed chunks should be skipped"
+        assert resumed['rows'] == 600 and resumed['risk_levels'] == clean['risk_levels'], "Totals differ"
+
+        for index in range(3):
+            part = f'part-{index:06d}.csv'
+            expected = pd.read_csv(os.path.join(root, 'clean', part))
+            actual = pd.read_csv(os.path.join(root, 'resumed', part))
+            assert expected.equals(actual), f"{part} differs after resume"
+
+        try:
+            BatchScoringJob(os.path.join(root, 'resumed'), model_dir=model_dir, workers=0,
+                            chunk_size=100).run(iter_file_chunks(path, 100), source)
+            assert False, "A different chunk size should not resume the checkpoint"
+        except ValueError:
+            pass
+
+    print("  ✓ All tests passed")
+    return True
+
+def run_all_tests():
+    """Run all scoring tests"""
+    print("="*60)
+    print("RUNNING SCORING TESTS")
+    print("="*60)
+
+    tests = [
+        test_top_k_tracker,
+        test_top_k_tracker_windows,
+        test_p2_quantile_estimator,
+        test_adaptive_thresholds,
+        test_score_transactions_vectorized,
+        test_batch_job_resume
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"  ✗ Test failed: {e}")
+            failed += 1
+
+    print("\n" + "="*60)
+    print(f"TEST RESULTS: {passed} passed, {failed} failed")
+    print("="*60)
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,251 @@
+"""
+STRICTLY CONFIDENTIAL - ZeTheta Algorithms Pvt Ltd
+Unit Tests for Streaming Detection
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append('src')
+
+from streaming.sources import FileTailSource, QueueSource
+from streaming.user_state import UserFeatureState
+from streaming.daemon import StreamingDetector
+from data_pipeline.data_generator import TransactionGenerator
+from data_pipeline.feature_engineering import FeatureEngineer
+import contextlib
+import io
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+
+def _transaction(i, user_id='USER_0001', amount=25.0):
+    return {
+        'transaction_id': f'TXN_{i:06d}', 'user_id': user_id, 'amount': amount,
+        'merchant_category': 'grocery', 'location_city': 'Mumbai', 'device_type': 'mobile',
+        'timestamp': f'2024-01-01T{10 + i % 10:02d}:00:00'
+    }
+
+class FakeDetector:
+    """Scores the largest amount in a batch highest"""
+
+    def predict_with_proba(self, X):
+        amounts = X[:, 0]
+        scores = (amounts - amounts.min()) / (amounts.max() - amounts.min() + 1e-10)
+        return np.where(scores > 0.5, -1, 1), scores
+
+class FailingDetector:
+    """Raises on every batch"""
+
+    def predict_with_proba(self, X):
+        raise RuntimeError("scoring failed")
+
+class RecordingOutbox:
+    """Outbox stand-in logging calls into a shared event list"""
+
+    def __init__(self, events, fail=False):
+        self.events = events
+        self.fail = fail
+
+    def append_many(self, alerts, durable=False):
+        if self.fail:
+            raise OSError("disk full")
+        self.events.append(('alerts', len(alerts), durable))
+
+class RecordingSource(QueueSource):
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    def commit(self, offset):
+        self.events.append(('commit', offset))
+        super().commit(offset)
+
+def test_file_tail_source():
+    """Test tailing picks up appended lines, skips partial ones and resumes from commits"""
+    print("\n[TEST] File Tail Source")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stream.ndjson')
+        source = FileTailSource(path, poll_interval=0.01)
+        assert source.poll(10) == [], "Missing file should read as empty"
+
+        with open(path, 'w') as f:
+            f.write(json.dumps(_transaction(1)) + '\n')
+            f.write('not json\n')
+            f.write(json.dumps(_transaction(2))[:20])  # still being written
+
+        records = source.poll(10)
+        assert [r and r['transaction_id'] for _, r in records] == ['TXN_000001', None], records
+        source.commit(records[-1][0])
+        assert source.lag() == 1, "Only the partial line should be pending"
+
+        with open(path, 'a') as f:
+            f.write(json.dumps(_transaction(2))[20:] + '\n')
+            f.write(json.dumps(_transaction(3)) + '\n')
+
+        restarted = FileTailSource(path, poll_interval=0.01)
+        assert restarted.lag() is None or restarted.lag() >= 1, "Uncommitted lines are lag"
+        records = restarted.poll(10)
+        assert [r['transaction_id'] for _, r in records] == ['TXN_000002', 'TXN_000003'], \
+            "Restart should resume after the committed offset"
+        restarted.commit(records[-1][0])
+        assert restarted.lag() == 0, "Everything committed"
+
+        with open(path, 'w') as f:
+            f.write(json.dumps(_transaction(4)) + '\n')
+        records = restarted.poll(10)
+        assert [r['transaction_id'] for _, r in records] == ['TXN_000004'], \
+            "Truncated file should be read from the start"
+        restarted.close()
+        source.close()
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_user_feature_state():
+    """Test streamed user features match FeatureEngineer once a user's history is complete"""
+    print("\n[TEST] User Feature State")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = TransactionGenerator(seed=3).generate_dataset(n_normal=1500, n_fraud=75)
+        engineer = FeatureEngineer()
+        batch = engineer.create_features(df).set_index('transaction_id')
+
+    state = UserFeatureState()
+    streamed = state.featurize(df.sort_values('timestamp', kind='stable'))
+    last = streamed.groupby('user_id').tail(1).set_index('transaction_id')
+
+    for name in engineer.get_feature_names():
+        expected = batch.loc[last.index, name].fillna(0).to_numpy(dtype=float)
+        assert np.allclose(last[name].fillna(0).to_numpy(dtype=float), expected), f"{name} differs"
+
+    small = UserFeatureState(max_users=2)
+    for i, user in enumerate(['A', 'B', 'A', 'C']):
+        small.featurize(pd.DataFrame([_transaction(i, user_id=user)]))
+    assert len(small) == 2 and small.evicted == 1, "Least recently active user should go"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'state.pkl')
+        state.snapshot(path)
+        restored = UserFeatureState()
+        assert restored.restore(path) and len(restored) == len(state), "Snapshot lost users"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_streaming_detector_commits_after_alerts():
+    """Test offsets are committed only after alerts are durably written"""
+    print("\n[TEST] Streaming Detector Commit Order")
+
+    events = []
+    source = RecordingSource(events)
+    for i in range(5):
+        source.put(_transaction(i, amount=5000.0 if i == 3 else 20.0))
+    source.put({'transaction_id': 'broken'})
+
+    daemon = StreamingDetector(source, FakeDetector(), ['amount'], UserFeatureState(),
+                               RecordingOutbox(events), batch_size=10, max_wait=0.01,
+                               report_interval=0)
+    daemon.run(max_batches=1)
+
+    assert events == [('alerts', 1, True), ('commit', 6)], f"Wrong order: {events}"
+    assert daemon.stats['records'] == 5 and daemon.stats['invalid'] == 1, daemon.stats
+    assert daemon.lag() == 0 and daemon.throughput() > 0, "Lag and throughput not reported"
+
+    events.clear()
+    source = RecordingSource(events)
+    source.put(_transaction(1, amount=5000.0))
+    source.put(_transaction(2))
+    daemon = StreamingDetector(source, FakeDetector(), ['amount'], UserFeatureState(),
+                               RecordingOutbox(events, fail=True), batch_size=10, max_wait=0.01,
+                               report_interval=0)
+    try:
+        daemon.run(max_batches=1)
+        assert False, "Outbox failure should stop the daemon"
+    except OSError:
+        pass
+    assert events == [] and source.lag() == 2, "Batch must stay uncommitted"
+
+    print("  ✓ All tests passed")
+    return True
+
+def test_failed_batch_leaves_state_untouched():
+    """Test a failed batch neither updates user state nor writes a snapshot"""
+    print("\n[TEST] Failed Batch Leaves State Untouched")
+
+    # Pending updates merge like folding the rows in one by one
+    rows = pd.DataFrame([_transaction(i, amount=10.0 * (i + 1)) for i in range(6)])
+    sequential = UserFeatureState()
+    sequential.featurize(rows)
+    merged = UserFeatureState()
+    merged.featurize(rows.iloc[:2])
+    first, first_pending = merged.featurize_pending(rows.iloc[2:4])
+    second, second_pending = merged.featurize_pending(rows.iloc[4:])
+    assert len(merged) == 1 and merged._users['USER_0001'][0] == 2, "Pending batch changed state"
+    merged.apply(second_pending)
+    merged.apply(first_pending)
+    assert np.allclose(merged._users['USER_0001'], sequential._users['USER_0001']), \
+        "Merged state differs from sequential"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, 'state.pkl')
+        events = []
+        source = RecordingSource(events)
+        for i in range(3):
+            source.put(_transaction(i))
+        state = UserFeatureState()
+        daemon = StreamingDetector(source, FailingDetector(), ['amount'], state,
+                                   RecordingOutbox(events), batch_size=10, max_wait=0.01,
+                                   report_interval=0, state_path=state_path)
+        try:
+            daemon.run(max_batches=1)
+            assert False, "Scoring failure should stop the daemon"
+        except RuntimeError:
+            pass
+        assert len(state) == 0, "Failed batch was folded into user state"
+        assert not os.path.exists(state_path), "Snapshot written after a failure"
+        assert events == [] and source.lag() == 3, "Batch must stay uncommitted"
+
+        daemon = StreamingDetector(source, FakeDetector(), ['amount'], state,
+                                   RecordingOutbox(events), batch_size=10, max_wait=0.01,
+                                   report_interval=0, state_path=state_path)
+        daemon.run(max_batches=1)
+        restored = UserFeatureState()
+        assert restored.restore(state_path), "Clean stop should snapshot"
+        assert restored._users['USER_0001'][0] == 3, "Replayed batch counted twice"
+
+    print("  ✓ All tests passed")
+    return True
+
+def run_all_tests():
+    """Run all streaming tests"""
+    print("="*60)
+    print("RUNNING STREAMING TESTS")
+    print("="*60)
+
+    tests = [
+        test_file_tail_source,
+        test_user_feature_state,
+        test_streaming_detector_commits_after_alerts,
+        test_failed_batch_leaves_state_untouched
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"  ✗ Test failed: {e}")
+            failed += 1
+
+    print("\n" + "="*60)
+    print(f"TEST RESULTS: {passed} passed, {failed} failed")
+    print("="*60)
+
+if __name__ == "__main__":
+    run_all_tests()